@@ -0,0 +1,290 @@
+"""
+Headless HTTP API for the chat engine: chat turns streamed as Server-Sent Events
+and conversation CRUD on the same storage as the Streamlit app.
+
+Run with:
+    python api.py --workers 4 --port 8000
+"""
+
+import hmac
+import json
+import uuid
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Load environment variables from .env file BEFORE importing backend modules
+load_dotenv()
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from backend.storage import SUMMARY_FIELDS, normalize_user_id, save_conversation, load_conversation, list_conversations as list_stored_conversations, delete_conversation
+from backend.structured_output import render_reply
+from backend.turns import get_turn_runner
+from backend.utils import get_setting
+
+# Conversation titles are the first user message, cut to this length (as in the app)
+TITLE_LENGTH = 50
+
+
+def _authorized(request) -> bool:
+    """Requests authenticate with "Authorization: Bearer <APP_PASSWORD>"."""
+    password = get_setting("APP_PASSWORD")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    return bool(password) and scheme.lower() == "bearer" and hmac.compare_digest(token, password)
+
+
+def _user_id(request):
+    """The X-User-Id header selects the user's storage partition (default partition if absent)."""
+    return request.headers.get("x-user-id")
+
+
+def _get_job(request):
+    """The requested job if it belongs to the requesting user, else None."""
+    job = get_turn_runner().get_job(request.path_params["job_id"])
+    if job is None or normalize_user_id(job.user_id) != normalize_user_id(_user_id(request)):
+        return None
+    return job
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def _read_json(request) -> dict:
+    """The request's JSON object body ({} if empty), or None if it is not a JSON object."""
+    body = await request.body()
+    if not body:
+        return {}
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _summary(conversation: dict) -> dict:
+    return {key: conversation.get(key) for key in SUMMARY_FIELDS}
+
+
+def _live_conversation(conversation_id: str, user_id):
+    """
+    The conversation as a reply still streaming in this process holds it, or as
+    stored. Changes must go to the live copy, or the reply's next save undoes them.
+    Call with the conversation's lock held.
+    """
+    job = get_turn_runner().get_active_job(conversation_id)
+    if job is not None and normalize_user_id(job.user_id) == normalize_user_id(user_id):
+        return job.conversation
+    return load_conversation(conversation_id, user_id)
+
+
+def _load_full_conversation(conversation_id: str, user_id):
+    conversation = load_conversation(conversation_id, user_id)
+    if conversation is None:
+        return None
+    return {**conversation, "messages": [_full_message(message) for message in conversation["messages"]]}
+
+
+def _rename_conversation(conversation_id: str, user_id, title: str):
+    with get_turn_runner().conversation_lock(conversation_id):
+        conversation = _live_conversation(conversation_id, user_id)
+        if conversation is None:
+            return None
+        conversation["title"] = title
+        conversation["updated_at"] = datetime.now().isoformat()
+        save_conversation(conversation_id, conversation, user_id)
+        return _summary(conversation)
+
+
+def _remove_conversation(conversation_id: str, user_id) -> bool:
+    if load_conversation(conversation_id, user_id) is None:
+        return False
+    runner = get_turn_runner()
+    # A save already under way could otherwise write the deleted conversation back
+    with runner.conversation_lock(conversation_id):
+        runner.discard_conversation(conversation_id)
+        delete_conversation(conversation_id, user_id)
+    return True
+
+
+def _start_turn(conversation_id: str, user_id, content: str):
+    """Add the user's message and queue the reply; the job, or None if the conversation doesn't exist."""
+    runner = get_turn_runner()
+    with runner.conversation_lock(conversation_id):
+        conversation = _live_conversation(conversation_id, user_id)
+        if conversation is None:
+            return None
+        user_message = {"id": uuid.uuid4().hex, "role": "user", "content": content}
+        conversation["messages"].append(user_message)
+        conversation["updated_at"] = datetime.now().isoformat()
+        if conversation.get("title", "New Conversation") == "New Conversation":
+            conversation["title"] = content[:TITLE_LENGTH] + "..." if len(content) > TITLE_LENGTH else content
+        return runner.submit(conversation_id, conversation, user_message, user_id)
+
+
+def _full_message(message: dict) -> dict:
+    """A stored message with its structured tool output rendered back into "content"."""
+    return {**message, "content": render_reply(message)}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_job(job, start: int = 0):
+    """
+    Server-Sent Events for a turn: "start", one "chunk" per piece of text, then "done".
+
+    Followers wait on the event loop, not in a thread, so open streams don't use up
+    the threadpool. A client that disconnects only detaches; the turn finishes and
+    is saved anyway.
+    """
+    yield _sse("start", {"job_id": job.job_id, "conversation_id": job.conversation_id})
+    index = start
+    async for chunk in job.afollow(start):
+        yield _sse("chunk", {"index": index, "text": chunk})
+        index += 1
+    message = await run_in_threadpool(_full_message, job.message)
+    yield _sse("done", {"status": job.status, "message": message})
+
+
+def _event_stream(events) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+async def health(request):
+    return JSONResponse({"status": "ok"})
+
+
+async def list_conversations(request):
+    # File I/O: keep it off the event loop
+    conversations = sorted(
+        (await run_in_threadpool(list_stored_conversations, _user_id(request))).values(),
+        key=lambda conv: conv.get("created_at") or "0000-00-00T00:00:00",
+        reverse=True
+    )
+    return JSONResponse(conversations)
+
+
+async def create_conversation(request):
+    body = await _read_json(request)
+    if body is None:
+        return _error(400, "Body must be a JSON object")
+    now = datetime.now().isoformat()
+    conversation = {
+        "id": str(uuid.uuid4()),
+        "title": body.get("title") or "New Conversation",
+        "messages": [],
+        "created_at": now,
+        "updated_at": now
+    }
+    await run_in_threadpool(save_conversation, conversation["id"], conversation, _user_id(request))
+    return JSONResponse(conversation, status_code=201)
+
+
+async def get_conversation(request):
+    conversation = await run_in_threadpool(_load_full_conversation, request.path_params["conversation_id"], _user_id(request))
+    if conversation is None:
+        return _error(404, "Conversation not found")
+    return JSONResponse(conversation)
+
+
+async def update_conversation(request):
+    body = await _read_json(request)
+    if body is None or not isinstance(body.get("title"), str) or not body["title"].strip():
+        return _error(400, "Only a non-empty \"title\" can be updated")
+    summary = await run_in_threadpool(
+        _rename_conversation, request.path_params["conversation_id"], _user_id(request), body["title"].strip()
+    )
+    if summary is None:
+        return _error(404, "Conversation not found")
+    return JSONResponse(summary)
+
+
+async def remove_conversation(request):
+    if not await run_in_threadpool(_remove_conversation, request.path_params["conversation_id"], _user_id(request)):
+        return _error(404, "Conversation not found")
+    return Response(status_code=204)
+
+
+async def send_message(request):
+    """Add a user message and stream the assistant's reply (SSE)."""
+    body = await _read_json(request)
+    content = (body or {}).get("content")
+    if not isinstance(content, str) or not content.strip():
+        return _error(400, "\"content\" must be a non-empty string")
+    job = await run_in_threadpool(_start_turn, request.path_params["conversation_id"], _user_id(request), content)
+    if job is None:
+        return _error(404, "Conversation not found")
+    return _event_stream(_stream_job(job))
+
+
+async def stream_job(request):
+    """Re-attach to a turn by job id, optionally from chunk ?from=N (same worker process only)."""
+    job = _get_job(request)
+    if job is None:
+        return _error(404, "Job not found on this worker (it may have expired or run on another process)")
+    try:
+        start = max(0, int(request.query_params.get("from", 0)))
+    except ValueError:
+        return _error(400, "\"from\" must be an integer")
+    return _event_stream(_stream_job(job, start))
+
+
+async def cancel_job(request):
+    job = _get_job(request)
+    if job is None:
+        return _error(404, "Job not found on this worker")
+    job.cancel()
+    return JSONResponse({"job_id": job.job_id, "status": job.status})
+
+
+class BearerAuthMiddleware:
+    """Reject every request except the health check without a valid bearer token."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] != "/health":
+            if not _authorized(Request(scope)):
+                await _error(401, "Missing or invalid bearer token")(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+routes = [
+    Route("/health", health, methods=["GET"]),
+    Route("/conversations", list_conversations, methods=["GET"]),
+    Route("/conversations", create_conversation, methods=["POST"]),
+    Route("/conversations/{conversation_id}", get_conversation, methods=["GET"]),
+    Route("/conversations/{conversation_id}", update_conversation, methods=["PATCH"]),
+    Route("/conversations/{conversation_id}", remove_conversation, methods=["DELETE"]),
+    Route("/conversations/{conversation_id}/messages", send_message, methods=["POST"]),
+    Route("/jobs/{job_id}/stream", stream_job, methods=["GET"]),
+    Route("/jobs/{job_id}/cancel", cancel_job, methods=["POST"])
+]
+
+app = Starlette(routes=routes, middleware=[Middleware(BearerAuthMiddleware)])
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Headless chat API (Server-Sent Events)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=get_setting("API_WORKERS", 1),
+                        help="Worker processes (API_WORKERS); each has its own turn worker pool")
+    args = parser.parse_args()
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,16 @@ from datetime import datetime
 # Load environment variables from .env file BEFORE importing backend modules
 load_dotenv()
 
-from backend.chat import chat_with_ai_stream
-from backend.storage import save_conversation, load_all_conversations
+from backend.turns import get_turn_runner
+from backend.storage import save_conversation, list_conversations
 from frontend.utils import (
     create_new_conversation, 
     load_conversation, 
     delete_conversation_handler,
-    check_authentication
+    check_authentication,
+    current_user_id,
+    render_transcript,
+    stream_turn
 )
 
 
@@ -30,8 +33,8 @@ if not check_authentication():
 
 # Initialize session state
 if "conversations" not in st.session_state:
-    # Load conversations from storage
-    st.session_state.conversations = load_all_conversations()
+    # Load this user's conversation list; messages are read when a conversation is opened
+    st.session_state.conversations = list_conversations(current_user_id())
 if "current_conversation_id" not in st.session_state:
     st.session_state.current_conversation_id = None
 if "messages" not in st.session_state:
@@ -82,63 +85,62 @@ with st.sidebar:
 # Main Chat Area
 st.title("💬 Chat with AI Travel Assistant")
 
-# Display chat messages
-for idx, message in enumerate(st.session_state.messages):
-    with st.chat_message(message["role"]):
-        st.write(message["content"])
+# Display the most recent chat messages
+render_transcript(st.session_state.messages)
 
 # Chat input
 if prompt := st.chat_input("Ask me about travel..."):
     # Add user message to session state
-    user_message = {"role": "user", "content": prompt}
-    st.session_state.messages.append(user_message)
+    user_message = {"id": uuid.uuid4().hex, "role": "user", "content": prompt}
+    # A previous reply may still be streaming into (and saving) this conversation
+    with get_turn_runner().conversation_lock(st.session_state.current_conversation_id):
+        st.session_state.messages.append(user_message)
     
     # Display the new user message
     with st.chat_message("user"):
         st.write(prompt)
     
-    # Prepare conversation history for API (excluding the current message)
-    conversation_history = [
-        {"role": msg["role"], "content": msg["content"]}
-        for msg in st.session_state.messages[:-1]  # Exclude the current user message
-    ]
-    
-    # Get AI response with streaming
-    with st.chat_message("assistant"):
-        # Stream the response using Streamlit's write_stream
-        response = st.write_stream(chat_with_ai_stream(prompt, conversation_history))
-    
-    # Add assistant message to session state
-    assistant_message = {"role": "assistant", "content": response}
-    st.session_state.messages.append(assistant_message)
-    
+    # The new messages are shown in place; only rerun when the sidebar is stale
+    sidebar_changed = False
+
     # Create a new conversation if one doesn't exist
     if not st.session_state.current_conversation_id:
         conversation_id = str(uuid.uuid4())
         conversation_data = {
             "id": conversation_id,
             "title": "New Conversation",
-            "messages": st.session_state.messages.copy(),  # Use existing messages
+            "messages": st.session_state.messages,  # Shared with the session, not copied
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat()
         }
         st.session_state.conversations[conversation_id] = conversation_data
         st.session_state.current_conversation_id = conversation_id
         # Note: Don't clear st.session_state.messages here!
-        save_conversation(conversation_id, conversation_data)
+        save_conversation(conversation_id, conversation_data, current_user_id())
+        sidebar_changed = True
     
-    # Save to storage and rerun to show the complete conversation
+    # Update the conversation, then answer in the background
     if st.session_state.current_conversation_id:
         conv_id = st.session_state.current_conversation_id
-        st.session_state.conversations[conv_id]["messages"] = st.session_state.messages
-        st.session_state.conversations[conv_id]["updated_at"] = datetime.now().isoformat()
-        # Update title if it's still "New Conversation"
-        if len(st.session_state.messages) >= 2:
-            first_user_msg = next((msg["content"] for msg in st.session_state.messages if msg["role"] == "user"), None)
-            if first_user_msg:
-                title = first_user_msg[:50] + "..." if len(first_user_msg) > 50 else first_user_msg
-                if st.session_state.conversations[conv_id].get("title") != title:
-                    st.session_state.conversations[conv_id]["title"] = title
-        save_conversation(conv_id, st.session_state.conversations[conv_id])
-    st.rerun()
+        with get_turn_runner().conversation_lock(conv_id):
+            st.session_state.conversations[conv_id]["messages"] = st.session_state.messages
+            st.session_state.conversations[conv_id]["updated_at"] = datetime.now().isoformat()
+            # Update title if it's still "New Conversation"
+            if len(st.session_state.messages) >= 2:
+                first_user_msg = next((msg["content"] for msg in st.session_state.messages if msg["role"] == "user"), None)
+                if first_user_msg:
+                    title = first_user_msg[:50] + "..." if len(first_user_msg) > 50 else first_user_msg
+                    if st.session_state.conversations[conv_id].get("title") != title:
+                        st.session_state.conversations[conv_id]["title"] = title
+                        sidebar_changed = True
+        
+        # The turn runs in a worker and checkpoints the reply to storage as it streams,
+        # so a rerun (sidebar click, new input) only detaches this view from it.
+        job = get_turn_runner().submit(
+            conv_id, st.session_state.conversations[conv_id], user_message, current_user_id()
+        )
+        with st.chat_message("assistant"):
+            stream_turn(job)
+    if sidebar_changed:
+        st.rerun()
 
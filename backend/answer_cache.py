@@ -0,0 +1,171 @@
+"""Opt-in local answer cache for repeated first-turn travel questions."""
+
+import re
+import time
+import zlib
+import threading
+import numpy as np
+from backend.utils import get_setting, get_runtime_context
+
+# Hashed n-gram vector size (collisions are rare enough at this size for short questions)
+VECTOR_DIM = 2048
+NGRAM_SIZE = 3
+
+# Words that carry no meaning for "is this the same question?" comparisons
+STOPWORDS = {
+    "a", "an", "and", "are", "at", "be", "can", "do", "does", "for", "from", "go", "how",
+    "i", "in", "is", "it", "me", "my", "of", "on", "or", "should", "the", "there", "to",
+    "we", "what", "whats", "when", "whens", "where", "which", "who", "why", "with", "you"
+}
+
+
+def _normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = re.sub(r"[^\w\s]", "", text.lower())
+    return " ".join(text.split())
+
+
+def _keywords(normalized: str) -> set:
+    """Content words (and any numbers) that must largely agree for two questions to match."""
+    return {w for w in normalized.split() if w.isdigit() or (len(w) > 2 and w not in STOPWORDS)}
+
+
+def _vectorize(normalized: str) -> np.ndarray:
+    """Unit-length hashed vector of character n-grams and whole words, ignoring stopwords."""
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for word in normalized.split():
+        if word in STOPWORDS:
+            continue
+        padded = f" {word} "
+        grams = [padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)]
+        grams.append(word)
+        for gram in grams:
+            vector[zlib.crc32(gram.encode()) % VECTOR_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    """
+    Similarity index over first-turn questions and their final answers.
+
+    Vectors live in one preallocated NumPy matrix so a lookup is a single
+    matrix-vector product. Entries only match on the day they were stored (the
+    answer may depend on "today"), expire after `ttl_seconds`, and when full the
+    least recently used entry is evicted.
+    """
+
+    def __init__(self, threshold: float = 0.85, keyword_overlap: float = 0.6,
+                 ttl_seconds: int = 86400, max_entries: int = 500):
+        self.threshold = threshold
+        self.keyword_overlap = keyword_overlap
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._vectors = np.zeros((max_entries, VECTOR_DIM), dtype=np.float32)
+        self._entries = [None] * max_entries
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def lookup(self, question: str):
+        """
+        Find a cached answer for a near-duplicate question.
+
+        Returns:
+            str: The cached answer, or None on a miss
+        """
+        normalized = _normalize(question)
+        if not normalized:
+            return None
+        vector = _vectorize(normalized)
+        keywords = _keywords(normalized)
+        context = get_runtime_context()
+        now = time.time()
+
+        with self._lock:
+            scores = self._vectors @ vector
+            for slot in np.argsort(scores)[::-1]:
+                if scores[slot] < self.threshold:
+                    break
+                entry = self._entries[slot]
+                if entry is None or now - entry["created_at"] > self.ttl_seconds:
+                    continue
+                # Relative dates ("this weekend") were resolved against the stored day
+                if entry["context"] != context:
+                    continue
+                # Guard against "safe in Rome?" matching "safe in Paris?"
+                union = keywords | entry["keywords"]
+                if union and len(keywords & entry["keywords"]) / len(union) < self.keyword_overlap:
+                    continue
+                entry["last_used"] = now
+                self.stats["hits"] += 1
+                return entry["answer"]
+            self.stats["misses"] += 1
+        return None
+
+    def store(self, question: str, answer: str) -> None:
+        """Cache the final answer to a question, evicting an old entry if needed."""
+        normalized = _normalize(question)
+        if not normalized or not answer:
+            return
+        context = get_runtime_context()
+        now = time.time()
+
+        with self._lock:
+            slot = self._free_slot(now, context)
+            self._vectors[slot] = _vectorize(normalized)
+            self._entries[slot] = {
+                "question": normalized,
+                "keywords": _keywords(normalized),
+                "answer": answer,
+                "context": context,
+                "created_at": now,
+                "last_used": now
+            }
+            self.stats["stores"] += 1
+
+    def _free_slot(self, now: float, context: str) -> int:
+        """Return an empty, expired or previous-day slot, otherwise evict the least recently used one."""
+        oldest_slot, oldest_used = 0, float("inf")
+        for slot, entry in enumerate(self._entries):
+            if entry is None or now - entry["created_at"] > self.ttl_seconds or entry["context"] != context:
+                return slot
+            if entry["last_used"] < oldest_used:
+                oldest_slot, oldest_used = slot, entry["last_used"]
+        self.stats["evictions"] += 1
+        return oldest_slot
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """
+    Get the process-wide answer cache, shared across sessions.
+
+    Returns:
+        AnswerCache, or None when ANSWER_CACHE_ENABLED is not set
+    """
+    global _cache
+    if not get_setting("ANSWER_CACHE_ENABLED", False):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache(
+                threshold=get_setting("ANSWER_CACHE_THRESHOLD", 0.85),
+                keyword_overlap=get_setting("ANSWER_CACHE_KEYWORD_OVERLAP", 0.6),
+                ttl_seconds=get_setting("ANSWER_CACHE_TTL_SECONDS", 86400),
+                max_entries=get_setting("ANSWER_CACHE_MAX_ENTRIES", 500)
+            )
+    return _cache
+
+
+def replay_answer(answer: str):
+    """
+    Replay a cached answer word by word, like a live stream.
+
+    Yields:
+        Chunks of the cached answer
+    """
+    for chunk in re.findall(r"\S+\s*|\s+", answer):
+        yield chunk
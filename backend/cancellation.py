@@ -0,0 +1,127 @@
+"""Cooperative cancellation for in-flight LLM streams and tool calls."""
+
+import threading
+
+# Typical completion size (in tokens) used to estimate what a cut-short stream would have cost
+DEFAULT_EXPECTED_TOKENS = 600
+
+# Process-wide counters so we can see how much upstream work cancellation avoids
+CANCELLATION_STATS = {
+    "cancelled_turns": 0,
+    "closed_streams": 0,
+    "tokens_received": 0,
+    "tokens_saved_estimate": 0
+}
+_stats_lock = threading.Lock()
+
+
+class CancellationToken:
+    """
+    Shared flag for one chat turn, threaded through the chat loop and every tool.
+
+    Upstream resources (OpenAI streams, HTTP responses, sessions) are registered
+    on the token so that cancelling it closes them promptly instead of letting
+    them run to completion in the background.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._entries = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def register(self, resource, expected_tokens: int = 0) -> dict:
+        """
+        Track a closeable resource until it completes or the token is cancelled.
+
+        Returns:
+            dict: Handle used to report progress and release the resource
+        """
+        entry = {"resource": resource, "expected_tokens": expected_tokens, "received": 0, "closed": False}
+        with self._lock:
+            self._entries.append(entry)
+        if self.cancelled:
+            _close_entry(entry)
+        return entry
+
+    def release(self, entry: dict) -> None:
+        """Stop tracking a resource that finished normally."""
+        with self._lock:
+            if entry in self._entries:
+                self._entries.remove(entry)
+
+    def cancel(self) -> None:
+        """Cancel the turn and close every registered upstream resource."""
+        if self._event.is_set():
+            return
+        self._event.set()
+        with self._lock:
+            entries, self._entries = self._entries, []
+
+        for entry in entries:
+            _close_entry(entry)
+
+        with _stats_lock:
+            CANCELLATION_STATS["cancelled_turns"] += 1
+
+
+def _close_entry(entry: dict) -> None:
+    """Close a tracked resource once and record its token savings."""
+    if entry["closed"]:
+        return
+    entry["closed"] = True
+
+    try:
+        entry["resource"].close()
+    except Exception as e:
+        print(f"Error closing cancelled stream: {e}")
+
+    saved = max(0, entry["expected_tokens"] - entry["received"])
+    with _stats_lock:
+        CANCELLATION_STATS["closed_streams"] += 1
+        CANCELLATION_STATS["tokens_received"] += entry["received"]
+        CANCELLATION_STATS["tokens_saved_estimate"] += saved
+
+
+def iter_stream(stream, cancel_token: CancellationToken = None, expected_tokens: int = DEFAULT_EXPECTED_TOKENS):
+    """
+    Iterate over an OpenAI stream, closing it as soon as the turn is cancelled
+    or the consumer stops iterating (generator closed mid-stream). An error
+    raised by the stream propagates without cancelling the turn.
+
+    Each streamed chunk is counted as roughly one completion token.
+
+    Yields:
+        Chunks from the underlying stream
+    """
+    if cancel_token is None:
+        cancel_token = CancellationToken()
+
+    entry = cancel_token.register(stream, expected_tokens)
+    try:
+        for chunk in stream:
+            if cancel_token.cancelled:
+                # cancel() has closed the stream already
+                _close_entry(entry)
+                return
+            entry["received"] += 1
+            yield chunk
+    except GeneratorExit:
+        # Consumer went away mid-stream: abandon the whole turn
+        cancel_token.cancel()
+        _close_entry(entry)
+        raise
+    except Exception:
+        # Upstream failure, not a cancellation: the caller reports it
+        _release(cancel_token, entry)
+        raise
+    _release(cancel_token, entry)
+
+
+def _release(cancel_token: CancellationToken, entry: dict) -> None:
+    cancel_token.release(entry)
+    with _stats_lock:
+        CANCELLATION_STATS["tokens_received"] += entry["received"]
@@ -0,0 +1,399 @@
+"""
+Record/replay cassettes for upstream traffic (OpenAI streams and Open-Meteo HTTP),
+so chat turns can be benchmarked offline and deterministically.
+
+Record real traffic, then replay it as a benchmark:
+    python -m backend.cassettes record --cassette perf.json "3-day trip to Rome from 2026-05-04"
+    python -m backend.cassettes bench --cassette perf.json --speed 0 --repeat 5
+
+Or set CASSETTE_MODE=record|replay (with CASSETTE_PATH) to record or replay
+while running the app or the API.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from collections import deque
+from pathlib import Path
+
+from backend.utils import get_setting, get_runtime_context
+
+DEFAULT_CASSETTE_PATH = Path(__file__).parent.parent / "assets" / "cassettes" / "default.json"
+
+# 1.0 replays at recorded speed, 2.0 twice as fast, 0 as fast as possible
+DEFAULT_REPLAY_SPEED = 1.0
+
+# Version 2 tags each recorded interaction with the index of the turn that made it
+CASSETTE_VERSION = 2
+
+# The runtime context changes every day; it is left out of request keys so cassettes keep matching
+RUNTIME_CONTEXT_PLACEHOLDER = "<runtime context>"
+
+
+class CassetteMiss(RuntimeError):
+    """Replay found no recorded interaction for a request."""
+
+
+def _request_key(kind: str, request: dict) -> str:
+    text = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    text = text.replace(json.dumps(get_runtime_context(), ensure_ascii=False)[1:-1], RUNTIME_CONTEXT_PLACEHOLDER)
+    return f"{kind}:{hashlib.sha256(text.encode('utf-8')).hexdigest()[:24]}"
+
+
+class Cassette:
+    """
+    Recorded interactions, matched on replay by request key. Identical requests
+    are served in recorded order; a request with no exact match (e.g. a prompt
+    that embeds the time) gets the next unused interaction of the same kind.
+    """
+
+    def __init__(self, path, mode: str, speed: float = DEFAULT_REPLAY_SPEED):
+        self.path = Path(path)
+        self.mode = mode
+        self.speed = speed
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "replayed": 0, "exact_matches": 0, "fallback_matches": 0, "misses": 0}
+        self.data = {"version": CASSETTE_VERSION, "turns": [], "interactions": []}
+
+        if mode == "replay":
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        self._by_key = {}
+        self._unused = {}  # kind -> deque of interactions in recorded order
+        for interaction in self.data["interactions"]:
+            self._by_key.setdefault(interaction["key"], deque()).append(interaction)
+            self._unused.setdefault(interaction["kind"], deque()).append(interaction)
+        self._used = set()
+
+    # Recording
+
+    def record(self, interaction: dict) -> None:
+        with self._lock:
+            if self.data["turns"]:
+                interaction["turn"] = len(self.data["turns"]) - 1
+            self.data["interactions"].append(interaction)
+            self.stats["recorded"] += 1
+            self._save()
+
+    def record_turn(self, prompt: str) -> None:
+        """Remember a prompt, so `bench` can replay the same turns."""
+        with self._lock:
+            self.data["turns"].append(prompt)
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.path)
+
+    # Replay
+
+    def take(self, kind: str, key: str) -> dict:
+        """The recorded interaction for a request (each is served once)."""
+        with self._lock:
+            candidates = self._by_key.get(key, deque())
+            while candidates and id(candidates[0]) in self._used:
+                candidates.popleft()
+            exact = bool(candidates)
+            if not exact:
+                candidates = self._unused.get(kind, deque())
+                while candidates and id(candidates[0]) in self._used:
+                    candidates.popleft()
+            if not candidates:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"No recorded {kind} interaction left in {self.path}")
+            interaction = candidates.popleft()
+            self._used.add(id(interaction))
+            self.stats["replayed"] += 1
+            self.stats["exact_matches" if exact else "fallback_matches"] += 1
+        if not exact:
+            print(f"Cassette: no exact match for a {kind} request, serving the next recorded one")
+        return interaction
+
+    def unused(self, turn: int) -> int:
+        """How many interactions recorded for a turn were never served (untagged ones count for every turn)."""
+        with self._lock:
+            return sum(1 for interaction in self.data["interactions"]
+                       if interaction.get("turn", turn) == turn and id(interaction) not in self._used)
+
+    def wait(self, seconds: float, started: float) -> None:
+        """Sleep until `seconds` (recorded time, scaled by speed) after `started`."""
+        if self.speed > 0:
+            delay = seconds / self.speed - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+    # Wrappers
+
+    def wrap_openai(self, client=None):
+        return _CassetteOpenAI(self, client)
+
+    def wrap_session(self, session=None):
+        return _CassetteSession(self, session)
+
+
+class _RecordingStream:
+    """Passes an OpenAI stream through, recording each chunk with its time offset."""
+
+    def __init__(self, cassette: Cassette, stream, key: str, request: dict, started: float):
+        self.cassette = cassette
+        self.stream = stream
+        self.interaction = {"kind": "openai", "key": key, "request": request, "chunks": []}
+        self.started = started
+        self._saved = False
+
+    def __iter__(self):
+        try:
+            for chunk in self.stream:
+                self.interaction["chunks"].append({
+                    "t": round(time.monotonic() - self.started, 4),
+                    "data": chunk.model_dump(mode="json", exclude_unset=True)
+                })
+                yield chunk
+        finally:
+            self._save()
+
+    def close(self):
+        self.stream.close()
+        self._save()
+
+    def _save(self):
+        if not self._saved:
+            self._saved = True
+            self.cassette.record(self.interaction)
+
+
+class _ReplayStream:
+    """Serves recorded chunks, at recorded speed unless the cassette is set to go faster."""
+
+    def __init__(self, cassette: Cassette, interaction: dict):
+        self.cassette = cassette
+        self.interaction = interaction
+        self._closed = False
+
+    def __iter__(self):
+        from openai.types.chat import ChatCompletionChunk
+
+        started = time.monotonic()
+        for item in self.interaction["chunks"]:
+            self.cassette.wait(item["t"], started)
+            if self._closed:
+                return
+            yield ChatCompletionChunk.model_validate(item["data"])
+
+    def close(self):
+        self._closed = True
+
+
+class _Completions:
+    def __init__(self, cassette: Cassette, client):
+        self.cassette = cassette
+        self.client = client
+
+    def create(self, **params):
+        request = {name: value for name, value in params.items() if name != "stream_options"}
+        key = _request_key("openai", request)
+
+        if self.cassette.mode == "replay":
+            interaction = self.cassette.take("openai", key)
+            if "response" in interaction:
+                from openai.types.chat import ChatCompletion
+                self.cassette.wait(interaction.get("elapsed", 0), time.monotonic())
+                return ChatCompletion.model_validate(interaction["response"])
+            return _ReplayStream(self.cassette, interaction)
+
+        started = time.monotonic()
+        result = self.client.chat.completions.create(**params)
+        if params.get("stream"):
+            return _RecordingStream(self.cassette, result, key, request, started)
+        self.cassette.record({
+            "kind": "openai", "key": key, "request": request,
+            "elapsed": round(time.monotonic() - started, 4),
+            "response": result.model_dump(mode="json", exclude_unset=True)
+        })
+        return result
+
+
+class _CassetteOpenAI:
+    """Stands in for the OpenAI client (only chat.completions.create is used)."""
+
+    def __init__(self, cassette: Cassette, client):
+        completions = _Completions(cassette, client)
+        self.chat = type("Chat", (), {"completions": completions})()
+
+
+class _CassetteSession:
+    """Stands in for the shared requests session (only get() is used)."""
+
+    def __init__(self, cassette: Cassette, session):
+        self.cassette = cassette
+        self.session = session
+
+    def get(self, url, params=None, **kwargs):
+        key = _request_key("http", {"url": url, "params": params or {}})
+
+        if self.cassette.mode == "replay":
+            import requests
+
+            interaction = self.cassette.take("http", key)
+            self.cassette.wait(interaction["elapsed"], time.monotonic())
+            response = requests.Response()
+            response.status_code = interaction["status"]
+            response._content = interaction["body"].encode("utf-8")
+            response.headers.update(interaction["headers"])
+            response.url = interaction["url"]
+            response.encoding = "utf-8"
+            return response
+
+        started = time.monotonic()
+        response = self.session.get(url, params=params, **kwargs)
+        self.cassette.record({
+            "kind": "http", "key": key, "url": url, "params": params or {},
+            "elapsed": round(time.monotonic() - started, 4),
+            "status": response.status_code,
+            "headers": {"Content-Type": response.headers.get("Content-Type", "application/json")},
+            "body": response.text
+        })
+        return response
+
+
+_cassette = None
+_cassette_configured = False
+_cassette_lock = threading.Lock()
+
+
+def use_cassette(path, mode: str, speed: float = DEFAULT_REPLAY_SPEED):
+    """
+    Activate a cassette for the process ("record" or "replay"), or turn cassettes off (mode "off").
+
+    Returns:
+        Cassette, or None when turned off
+    """
+    global _cassette, _cassette_configured
+    with _cassette_lock:
+        _cassette = Cassette(path, mode, speed) if mode in ("record", "replay") else None
+        _cassette_configured = True
+    return _cassette
+
+
+def get_cassette():
+    """
+    Get the active cassette, set up from CASSETTE_MODE / CASSETTE_PATH / CASSETTE_REPLAY_SPEED on first use.
+
+    Returns:
+        Cassette, or None when CASSETTE_MODE is off (the default)
+    """
+    global _cassette, _cassette_configured
+    with _cassette_lock:
+        if not _cassette_configured:
+            mode = get_setting("CASSETTE_MODE", "off").strip().lower()
+            if mode in ("record", "replay"):
+                _cassette = Cassette(
+                    get_setting("CASSETTE_PATH", str(DEFAULT_CASSETTE_PATH)),
+                    mode,
+                    get_setting("CASSETTE_REPLAY_SPEED", DEFAULT_REPLAY_SPEED)
+                )
+            _cassette_configured = True
+    return _cassette
+
+
+def _reset_local_caches(cache_dir: Path, run: int) -> None:
+    """
+    Give a run empty answer, forecast and geocode caches, so every run makes the
+    same upstream requests as the recording did.
+    """
+    from backend import answer_cache
+    from backend.tools.weather_itinerary import forecast_cache, geocode_cache
+
+    with answer_cache._cache_lock:
+        answer_cache._cache = None
+    with forecast_cache._cache_lock:
+        forecast_cache._cache = None
+    with geocode_cache._cache_lock:
+        geocode_cache._cache = geocode_cache.GeocodeCache(
+            db_path=cache_dir / f"geocode-{run}.sqlite",
+            seed_gazetteer=get_setting("GEOCODE_GAZETTEER_SEED", True)
+        )
+
+
+def _run_turn(prompt: str) -> str:
+    from backend.chat import chat_with_ai_stream
+    return "".join(chat_with_ai_stream(prompt, []))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Record or replay upstream traffic for chat turns")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record = subparsers.add_parser("record", help="Run prompts against the live APIs and record them")
+    record.add_argument("prompts", nargs="+")
+    record.add_argument("--cassette", default=str(DEFAULT_CASSETTE_PATH))
+
+    bench = subparsers.add_parser("bench", help="Replay a cassette's turns offline and time them")
+    bench.add_argument("--cassette", default=str(DEFAULT_CASSETTE_PATH))
+    bench.add_argument("--speed", type=float, default=0, help="Replay speed (1 = recorded, 0 = as fast as possible)")
+    bench.add_argument("--repeat", type=int, default=1)
+    bench.add_argument("--max-cpu-ms", type=float, default=None, help="Fail when a turn's mean CPU time exceeds this")
+    bench.add_argument("--allow-fallback", action="store_true",
+                       help="Don't fail when a request has no exact recorded match (e.g. after a prompt or tool schema change)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        if Path(args.cassette).exists():
+            print(f"{args.cassette} already exists; choose a new path to record")
+            return 1
+        cassette = use_cassette(args.cassette, "record")
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for run, prompt in enumerate(args.prompts):
+                # Record each turn from empty caches, the way bench replays it
+                _reset_local_caches(Path(cache_dir), run)
+                cassette.record_turn(prompt)
+                answer = _run_turn(prompt)
+                print(f"Recorded: {prompt!r} ({len(answer)} chars)")
+        print(f"{cassette.stats['recorded']} interactions saved to {args.cassette}")
+        return 0
+
+    failed = False
+    with tempfile.TemporaryDirectory() as cache_dir:
+        run = 0
+        for turn, prompt in enumerate(Cassette(args.cassette, "replay").data["turns"]):
+            wall_ms, cpu_ms, fallbacks, misses, unused = [], [], 0, 0, 0
+            for _ in range(args.repeat):
+                # A fresh cassette and empty caches per run: each run replays the whole recording
+                _reset_local_caches(Path(cache_dir), run)
+                run += 1
+                cassette = use_cassette(args.cassette, "replay", args.speed)
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                _run_turn(prompt)
+                wall_ms.append((time.perf_counter() - wall_start) * 1000)
+                cpu_ms.append((time.process_time() - cpu_start) * 1000)
+                fallbacks = max(fallbacks, cassette.stats["fallback_matches"])
+                # Tools report upstream errors instead of raising, so misses only show up in the stats
+                misses = max(misses, cassette.stats["misses"])
+                unused = max(unused, cassette.unused(turn))
+            mean_cpu = sum(cpu_ms) / len(cpu_ms)
+            print(f"{prompt[:60]!r}: wall {sum(wall_ms) / len(wall_ms):.1f} ms (min {min(wall_ms):.1f}), "
+                  f"cpu {mean_cpu:.1f} ms (min {min(cpu_ms):.1f}), {fallbacks} fallback matches")
+            if args.max_cpu_ms is not None and mean_cpu > args.max_cpu_ms:
+                failed = True
+            if fallbacks and not args.allow_fallback:
+                # The turn replayed upstream data recorded for different requests
+                print(f"  {fallbacks} requests had no exact recorded match; re-record the cassette or pass --allow-fallback")
+                failed = True
+            if misses or unused:
+                # The turn made different upstream requests than the recording: its timings are not comparable
+                print(f"  {misses} requests were not in the cassette and {unused} recorded interactions were never "
+                      f"requested; re-record the cassette")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
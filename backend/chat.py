@@ -1,18 +1,14 @@
 import os
 import json
 import hashlib
-from backend.utils import get_openai_client, get_runtime_context
-from backend.tools import AVAILABLE_TOOLS, TOOL_FUNCTIONS
+from backend.utils import get_openai_client, get_runtime_context, get_setting
+from backend.tools import AVAILABLE_TOOLS, get_tool_digest, get_tool_function, get_tool_message, has_tool, is_visible_tool
+from backend.cancellation import CancellationToken, iter_stream
+from backend.digests import digest_text, get_digest_budget
+from backend.usage import STREAM_OPTIONS, track_usage
 
-# Tool-specific loading messages
-TOOL_MESSAGES = {
-    "generate_packing_list": "🧳 Generating packing list...",
-    "get_weather_forecast": "🌤️ Fetching weather forecast...",
-    "generate_trip_plan": "🗺️ Creating your itinerary..."
-}
-
-# Tools that should always show output to user
-VISIBLE_TOOLS = ["generate_packing_list", "get_weather_forecast", "generate_trip_plan"]
+SYSTEM_PROMPT_PATH = os.path.join(os.path.dirname(__file__), 'prompts', 'chat_assistant.md')
+_system_prompt_cache = {}
 
 
 def _get_tool_signature(function_name: str, function_args: dict) -> str:
@@ -29,17 +25,19 @@ def _get_tool_signature(function_name: str, function_args: dict) -> str:
 
 def _prepare_messages(system_prompt: str, conversation_history: list, user_message: str) -> list:
     """
-    Prepare messages array with system prompt, runtime context, history, and user message.
+    Prepare messages array with system prompt, history, runtime context, and user message.
     Runtime context is computed fresh and NOT persisted in conversation history.
+    
+    Static content comes first so the provider's prompt cache can reuse it: the
+    system prompt (plus tool definitions) and older history form a byte-identical
+    prefix, and the volatile runtime context sits right before the new message.
     """
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "system", "content": get_runtime_context()}
-    ]
+    messages = [{"role": "system", "content": system_prompt}]
     
     if conversation_history:
         messages.extend(conversation_history)
     
+    messages.append({"role": "system", "content": get_runtime_context()})
     messages.append({"role": "user", "content": user_message})
     return messages
 
@@ -81,14 +79,14 @@ def _collect_streaming_response(stream):
     return full_response, tool_calls
 
 
-def _execute_tool_and_collect(function_name: str, function_args: dict):
+def _execute_tool_and_collect(function_name: str, function_args: dict, cancel_token: CancellationToken = None):
     """
     Execute a tool function and collect its full result.
     
     Returns:
         str: The collected result from the tool
     """
-    result = TOOL_FUNCTIONS[function_name](**function_args)
+    result = get_tool_function(function_name)(**function_args, cancel_token=cancel_token)
     
     if hasattr(result, '__iter__') and not isinstance(result, str):
         return "".join(result)
@@ -100,13 +98,13 @@ def _stream_tool_indicator(function_name: str):
     """
     Yield the visual indicator for a tool being called.
     """
-    tool_msg = TOOL_MESSAGES.get(function_name, f"🔧 Using tool: {function_name}...")
+    tool_msg = get_tool_message(function_name)
     yield "\n\n---\n\n"
     yield f"**{tool_msg}**\n\n"
     yield "---\n\n"
 
 
-def _execute_and_stream_tool(function_name: str, function_args: dict, is_direct_output: bool, show_output: bool = True):
+def _execute_and_stream_tool(function_name: str, function_args: dict, is_direct_output: bool, show_output: bool = True, cancel_token: CancellationToken = None):
     """
     Execute a tool, optionally stream output to user, and collect result.
     
@@ -115,27 +113,42 @@ def _execute_and_stream_tool(function_name: str, function_args: dict, is_direct_
         function_args: Arguments for the tool
         is_direct_output: Whether this is a direct output tool
         show_output: Whether to stream output to user
+        cancel_token: Cancellation token for the current turn (optional)
     
     Returns:
-        str: Collected result from tool
+        tuple: (collected text, structured result returned by the tool or None)
     
     Yields:
         str: Chunks of output if show_output is True
     """
-    result = TOOL_FUNCTIONS[function_name](**function_args)
+    result = get_tool_function(function_name)(**function_args, cancel_token=cancel_token)
     collected_result = ""
+    structured = None
     
     if hasattr(result, '__iter__') and not isinstance(result, str):
-        for chunk in result:
-            collected_result += chunk
-            if show_output:
-                yield chunk
+        try:
+            while True:
+                try:
+                    chunk = next(result)
+                except StopIteration as stop:
+                    # Tools in structured mode return their parsed JSON when done
+                    structured = stop.value
+                    break
+                if cancel_token is not None and cancel_token.cancelled:
+                    break
+                collected_result += chunk
+                if show_output:
+                    yield chunk
+        finally:
+            # Close the tool generator explicitly so its upstream streams are released
+            if hasattr(result, 'close'):
+                result.close()
     else:
         collected_result = str(result)
         if show_output:
             yield collected_result
     
-    return collected_result
+    return collected_result, structured
 
 
 def _add_assistant_message_with_tool_calls(messages: list, content: str, tool_calls: list):
@@ -156,8 +169,28 @@ def _add_assistant_message_with_tool_calls(messages: list, content: str, tool_ca
     })
 
 
-def _execute_tool_calls(tool_calls: list, messages: list):
-    """Execute tool calls, stream output to user, and append tool messages to conversation."""
+def _tool_digest(function_name: str, structured, collected_result: str) -> str:
+    """
+    Model-facing content of a tool message, within TOOL_DIGEST_MAX_TOKENS.
+    
+    Built from the tool's structured result when it has one; otherwise the
+    streamed text is condensed to its headings and key bullets.
+    """
+    budget = get_digest_budget()
+    digest = get_tool_digest(function_name) if structured else None
+    if digest:
+        return digest(structured, budget)
+    return digest_text(collected_result, budget)
+
+
+def _execute_tool_calls(tool_calls: list, messages: list, cancel_token: CancellationToken = None, tool_results: list = None):
+    """
+    Execute tool calls, stream output to user, and append tool messages to conversation.
+    
+    The model gets a digest of each result (see _tool_digest) rather than the
+    user-facing text; structured results are also appended to `tool_results` for storage,
+    with the text shown for them (see compact_reply).
+    """
     # Enforce single tool execution - only process first tool
     if len(tool_calls) > 1:
         tool_calls_to_execute = tool_calls[:1]
@@ -168,28 +201,59 @@ def _execute_tool_calls(tool_calls: list, messages: list):
         function_name = tool_call["function"]["name"]
         function_args = json.loads(tool_call["function"]["arguments"])
         
-        if function_name not in TOOL_FUNCTIONS:
+        if not has_tool(function_name):
             continue
         
         for chunk in _stream_tool_indicator(function_name):
             yield chunk
         
-        should_show_output = function_name in VISIBLE_TOOLS
+        should_show_output = is_visible_tool(function_name)
+        
+        collected_result, structured = yield from _execute_and_stream_tool(
+            function_name, function_args, False, should_show_output, cancel_token
+        )
         
-        collected_result = ""
-        for chunk in _execute_and_stream_tool(function_name, function_args, False, should_show_output):
-            if should_show_output:
-                yield chunk
-            collected_result += chunk
+        if structured and tool_results is not None:
+            tool_results.append({
+                "tool": function_name,
+                "data": structured,
+                "output": collected_result if should_show_output else ""
+            })
         
         messages.append({
             "role": "tool",
             "tool_call_id": tool_call["id"],
-            "content": collected_result[:1000]
+            "content": _tool_digest(function_name, structured, collected_result)
         })
 
 
-def chat_with_ai_stream(message: str, conversation_history: list = None):
+def _load_system_prompt() -> str:
+    """The chat system prompt, read from disk again only when the file changes."""
+    stat = os.stat(SYSTEM_PROMPT_PATH)
+    if _system_prompt_cache.get("mtime") != stat.st_mtime_ns:
+        with open(SYSTEM_PROMPT_PATH, 'r', encoding='utf-8') as f:
+            _system_prompt_cache.update(mtime=stat.st_mtime_ns, text=f.read().strip())
+    return _system_prompt_cache["text"]
+
+
+def _get_answer_cache(conversation_history: list):
+    """
+    The answer cache for first-turn questions, or None.
+
+    Imported only when ANSWER_CACHE_ENABLED is set, so numpy stays out of startup otherwise.
+    """
+    if not _is_first_turn(conversation_history) or not get_setting("ANSWER_CACHE_ENABLED", False):
+        return None
+    from backend.answer_cache import get_answer_cache
+    return get_answer_cache()
+
+
+def _is_first_turn(conversation_history: list) -> bool:
+    """True if the user has not said anything yet (only the welcome message, if any)."""
+    return not any(msg.get("role") == "user" for msg in conversation_history or [])
+
+
+def chat_with_ai_stream(message: str, conversation_history: list = None, cancel_token: CancellationToken = None, turn_data: dict = None):
     """
     Main chat function with streaming support for OpenAI API with tool calling.
     
@@ -200,21 +264,42 @@ def chat_with_ai_stream(message: str, conversation_history: list = None):
     
     Note: Text responses after visible tools are suppressed to avoid echoing.
     
+    If the consumer stops iterating (e.g. a Streamlit rerun abandons the script) or
+    the cancel token is cancelled, every upstream stream is closed promptly.
+    
+    When the answer cache is enabled, first-turn questions answered without tools
+    are cached and near-duplicates are replayed locally through the same stream.
+    
     Args:
         message: User's message
         conversation_history: List of previous messages
+        cancel_token: Cancellation token for this turn (optional, created if omitted)
+        turn_data: Dict filled with extra results of the turn, e.g. "tool_results" (optional)
     
     Yields:
         Chunks of the AI's response as strings
     """
     # Load system prompt
-    prompt_path = os.path.join(os.path.dirname(__file__), 'prompts', 'chat_assistant.md')
-    with open(prompt_path, 'r', encoding='utf-8') as f:
-        system_prompt = f.read().strip()
+    system_prompt = _load_system_prompt()
     
     # Prepare messages with runtime context injection
     messages = _prepare_messages(system_prompt, conversation_history, message)
     
+    if cancel_token is None:
+        cancel_token = CancellationToken()
+    if turn_data is None:
+        turn_data = {}
+    turn_data.setdefault("tool_results", [])
+    
+    # Serve near-duplicate first-turn questions from the local answer cache
+    answer_cache = _get_answer_cache(conversation_history)
+    if answer_cache:
+        cached_answer = answer_cache.lookup(message)
+        if cached_answer is not None:
+            from backend.answer_cache import replay_answer
+            yield from replay_answer(cached_answer)
+            return
+    
     try:
         client = get_openai_client()
         last_tool_was_visible = False
@@ -222,23 +307,24 @@ def chat_with_ai_stream(message: str, conversation_history: list = None):
         tools_called_names = set()  # Track which tools have been called by name
         
         for round_count in range(1, 6):  # Max 5 rounds
-            # Filter out tools that have already been called
-            available_tools_filtered = [
-                tool for tool in AVAILABLE_TOOLS 
-                if tool['function']['name'] not in tools_called_names
-            ]
+            if cancel_token.cancelled:
+                return
             
-            # Call LLM
+            # The full tool list is always sent, in the same order: together with the
+            # system prompt it forms the cached prompt prefix. Tools already used in
+            # this turn are refused below instead of being filtered out here.
             llm_params = {
                 "model": "gpt-4o",
                 "messages": messages,
+                "tools": AVAILABLE_TOOLS,
                 "temperature": 0.7,
-                "stream": True
+                "stream": True,
+                "stream_options": STREAM_OPTIONS
             }
             
-            # Only include tools if there are still uncalled tools available
-            if available_tools_filtered:
-                llm_params["tools"] = available_tools_filtered
+            # Every tool has been used: answer in text
+            if len(tools_called_names) >= len(AVAILABLE_TOOLS):
+                llm_params["tool_choice"] = "none"
             
             stream = client.chat.completions.create(**llm_params)
             
@@ -246,7 +332,7 @@ def chat_with_ai_stream(message: str, conversation_history: list = None):
             full_response = ""
             tool_calls = []
             
-            for chunk in stream:
+            for chunk in track_usage(iter_stream(stream, cancel_token), "chat"):
                 delta = chunk.choices[0].delta
                 
                 # Collect tool calls (never shown to user)
@@ -290,6 +376,14 @@ def chat_with_ai_stream(message: str, conversation_history: list = None):
                     tools_called_names.add(executed_tool_name)
                     continue
                 
+                # Each tool runs at most once per turn
+                if executed_tool_name in tools_called_names:
+                    messages.append({
+                        "role": "system",
+                        "content": f"The tool '{executed_tool_name}' was already used in this turn. Its results are available above. Please provide a final response to the user without calling this tool again."
+                    })
+                    continue
+                
                 # Record this tool call signature and name
                 tools_called_history.append(tool_signature)
                 tools_called_names.add(executed_tool_name)
@@ -298,20 +392,27 @@ def chat_with_ai_stream(message: str, conversation_history: list = None):
                 _add_assistant_message_with_tool_calls(messages, full_response, tool_calls_to_execute)
                 
                 # Execute tool and stream output
-                for chunk in _execute_tool_calls(tool_calls_to_execute, messages):
+                for chunk in _execute_tool_calls(tool_calls_to_execute, messages, cancel_token, turn_data["tool_results"]):
                     yield chunk
                 
                 # Track if this tool was visible
-                is_visible_tool = executed_tool_name in VISIBLE_TOOLS
-                last_tool_was_visible = is_visible_tool
+                last_tool_was_visible = is_visible_tool(executed_tool_name)
                 
                 # Loop again
                 continue
             
             # No tool calls: we're done
             else:
+                # Only plain answers to general questions are reusable across users
+                if answer_cache and not tools_called_history and full_response and not cancel_token.cancelled:
+                    answer_cache.store(message, full_response)
                 break
     
+    except GeneratorExit:
+        # Consumer went away mid-answer: stop paying for upstream tokens
+        cancel_token.cancel()
+        raise
     except Exception as e:
-        yield f"Error: {str(e)}"
+        if not cancel_token.cancelled:
+            yield f"Error: {str(e)}"
 
@@ -0,0 +1,82 @@
+"""Model-facing digests of tool results: dense key facts within a token budget."""
+
+import re
+from backend.utils import get_setting
+
+# Default size of a tool message sent back to the model
+DEFAULT_MAX_TOKENS = 300
+
+# Rough chars-per-token ratio for English text with gpt-4o tokenizers
+CHARS_PER_TOKEN = 4
+
+_HEADING = re.compile(r"^(#+\s*|\*\*[^*]+\*\*:?$)")
+_MARKUP = re.compile(r"[*_`#>|]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def get_digest_budget() -> int:
+    """Token budget for one tool digest (TOOL_DIGEST_MAX_TOKENS)."""
+    return get_setting("TOOL_DIGEST_MAX_TOKENS", DEFAULT_MAX_TOKENS)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to the budget at a word boundary, marking the cut."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars - 1].rsplit(" ", 1)[0] + "…"
+
+
+def fit_levels(render, levels, max_tokens: int) -> str:
+    """
+    Render with decreasing detail until the digest fits the budget.
+
+    Args:
+        render: Callable taking a detail level and returning the digest text
+        levels: Detail levels, most detailed first
+        max_tokens: Token budget
+
+    Returns:
+        str: The most detailed rendering that fits (hard-truncated as a last resort)
+    """
+    text = ""
+    for level in levels:
+        text = render(level)
+        if estimate_tokens(text) <= max_tokens:
+            return text
+    return truncate_to_tokens(text, max_tokens)
+
+
+def digest_text(text: str, max_tokens: int) -> str:
+    """
+    Digest free-form markdown when a tool has no structured data.
+
+    Every section keeps its heading, and bullets are taken round-robin across
+    sections, so the end of a long answer is represented as well as its start.
+    """
+    sections = []  # [heading, [bullets]]
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or set(line) <= set("-|: "):
+            continue
+        is_heading = bool(_HEADING.match(line))
+        line = _MARKUP.sub("", line).lstrip("-•").strip().rstrip(":")
+        if not line:
+            continue
+        if is_heading or not sections:
+            sections.append([line if is_heading else "", [] if is_heading else [line]])
+        else:
+            sections[-1][1].append(line)
+
+    def render(per_section):
+        parts = []
+        for heading, bullets in sections:
+            shown = "; ".join(bullets[:per_section])
+            parts.append(f"{heading}: {shown}" if heading and shown else heading or shown)
+        return "\n".join(part for part in parts if part)
+
+    most = max((len(bullets) for _, bullets in sections), default=0)
+    return fit_levels(render, range(most, -1, -1), max_tokens)
@@ -0,0 +1,198 @@
+"""
+Cold-start profiling: per-module import time in a fresh interpreter, then the
+latency of the work behind the first request.
+
+Run with:
+    python -m backend.profiling [--budget-ms 2500] [--top 15] [--json]
+
+Exits with status 1 when the cold start (imports + first request) exceeds the
+budget or a deferred module is imported at startup, so it can be asserted on in CI.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from contextlib import contextmanager
+
+from backend.utils import get_setting
+
+# What the app and the API import at startup
+STARTUP_MODULES = [
+    "streamlit",
+    "dotenv",
+    "backend.chat",
+    "backend.storage",
+    "backend.turns",
+    "frontend.utils"
+]
+
+# Cold start budget (imports + first request) in milliseconds
+DEFAULT_BUDGET_MS = 2500
+
+# Libraries that should not be imported at startup (loaded on first use instead)
+DEFERRED_MODULES = ["openai", "numpy", "requests", "backend.answer_cache", "backend.tools.weather_itinerary.tool"]
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def profile_imports(modules: list = None) -> dict:
+    """
+    Import the startup modules in a fresh interpreter with -X importtime.
+
+    Returns:
+        dict: {"total_ms", "modules": [{"name", "self_ms", "cumulative_ms", "depth"}], "deferred_loaded"}
+    """
+    modules = modules or STARTUP_MODULES
+    code = (
+        "import sys\n"
+        f"for name in {modules!r}:\n"
+        "    __import__(name)\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing startup modules failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append({
+            "name": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(name) - len(name.lstrip())) // 2
+        })
+
+    top_level = [entry for entry in entries if entry["depth"] == 0]
+    return {
+        "total_ms": round(sum(entry["cumulative_ms"] for entry in top_level), 1),
+        "modules": entries,
+        "deferred_loaded": [name for name in result.stdout.strip().split(",") if name]
+    }
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    try:
+        fn()
+        return round((time.perf_counter() - start) * 1000, 1), None
+    except Exception as e:
+        return round((time.perf_counter() - start) * 1000, 1), str(e)
+
+
+@contextmanager
+def _storage_copy(user_id: str = None):
+    """
+    Point storage at a temporary copy of the user's conversations (plus legacy
+    files, for the default user), so profiling never migrates or rewrites real data.
+    """
+    from backend import storage
+
+    original = storage.STORAGE_DIR
+    with tempfile.TemporaryDirectory(prefix="profile-storage-") as copy_dir:
+        copy_root = Path(copy_dir)
+        source = storage.user_dir(user_id)
+        if source.exists():
+            shutil.copytree(source, copy_root / source.relative_to(original))
+        if storage.normalize_user_id(user_id) == storage.DEFAULT_USER:
+            for file_path in original.glob("*.json"):
+                shutil.copy2(file_path, copy_root / file_path.name)
+        storage.STORAGE_DIR = copy_root
+        try:
+            yield
+        finally:
+            storage.STORAGE_DIR = original
+
+
+def profile_first_request(user_id: str = None) -> dict:
+    """
+    Time the work the first request does after startup, on a copy of the user's storage.
+
+    Returns:
+        dict: step -> {"ms", "error"}
+    """
+    from backend import chat
+    from backend.storage import list_conversations, load_all_conversations
+    from backend.tools import get_tool_definitions, get_tool_function
+    from backend.utils import get_openai_client
+
+    steps = {
+        "list_conversations": lambda: list_conversations(user_id),
+        "load_all_conversations": lambda: load_all_conversations(user_id),
+        "openai_client": get_openai_client,
+        "openai_client_reuse": get_openai_client,
+        "system_prompt": chat._load_system_prompt,
+        "tool_definitions": get_tool_definitions,
+        "first_tool_import": lambda: get_tool_function("get_weather_forecast")
+    }
+    report = {}
+    with _storage_copy(user_id):
+        for name, step in steps.items():
+            ms, error = _timed(step)
+            report[name] = {"ms": ms, "error": error}
+    return report
+
+
+def _top_modules(imports: dict, top: int) -> list:
+    return sorted(imports["modules"], key=lambda entry: entry["self_ms"], reverse=True)[:top]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Profile cold start: import time and first-request latency")
+    parser.add_argument("--budget-ms", type=float, default=get_setting("COLD_START_BUDGET_MS", DEFAULT_BUDGET_MS),
+                        help="Fail when imports + first request exceed this (COLD_START_BUDGET_MS)")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--user", default=None, help="User whose conversations are loaded")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    imports = profile_imports()
+    first_request = profile_first_request(args.user)
+    # The client is only counted once: the reuse step shows the saving
+    first_request_ms = sum(step["ms"] for name, step in first_request.items()
+                           if name not in ("load_all_conversations", "openai_client_reuse"))
+    total_ms = round(imports["total_ms"] + first_request_ms, 1)
+    within_budget = total_ms <= args.budget_ms
+
+    if args.json:
+        print(json.dumps({
+            "imports_ms": imports["total_ms"],
+            "slowest_modules": _top_modules(imports, args.top),
+            "deferred_loaded": imports["deferred_loaded"],
+            "first_request": first_request,
+            "total_ms": total_ms,
+            "budget_ms": args.budget_ms,
+            "within_budget": within_budget
+        }, indent=2))
+    else:
+        print(f"Imports: {imports['total_ms']:.0f} ms (interpreter startup included)")
+        for entry in [e for e in imports["modules"] if e["depth"] == 0 and e["name"] in STARTUP_MODULES]:
+            print(f"  {entry['cumulative_ms']:8.1f} ms  {entry['name']}")
+        print("Slowest modules (self time):")
+        for entry in _top_modules(imports, args.top):
+            print(f"  {entry['self_ms']:8.1f} ms  {entry['name']}")
+        if imports["deferred_loaded"]:
+            print(f"Imported at startup but meant to be deferred: {', '.join(imports['deferred_loaded'])}")
+        print("First request:")
+        for name, step in first_request.items():
+            note = f"  ({step['error']})" if step["error"] else ""
+            print(f"  {step['ms']:8.1f} ms  {name}{note}")
+        print(f"Cold start: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms) -> {'OK' if within_budget else 'OVER BUDGET'}")
+
+    return 0 if within_budget and not imports["deferred_loaded"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
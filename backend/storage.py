@@ -1,55 +1,226 @@
+import os
+import re
 import json
+import hashlib
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
+from contextlib import contextmanager
 
-# Storage directory
+try:
+    import fcntl
+except ImportError:  # Windows: manifest updates are serialized within the process only
+    fcntl = None
+
+# Storage directory (created on first save, not at import)
 STORAGE_DIR = Path(__file__).parent.parent / 'assets' / 'conversations'
-STORAGE_DIR.mkdir(parents=True, exist_ok=True)
 
-def save_conversation(conversation_id: str, conversation_data: Dict) -> None:
-    """Save a conversation to a JSON file"""
-    file_path = STORAGE_DIR / f"{conversation_id}.json"
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(conversation_data, f, indent=2, ensure_ascii=False)
+# Partition used when no user name is given (and for conversations saved before partitioning)
+DEFAULT_USER = "default"
+
+# Per-user list of conversations (id, title, timestamps, token usage), so listing never opens every file
+MANIFEST_FILE = "manifest.json"
+SUMMARY_FIELDS = ("id", "title", "created_at", "updated_at", "usage")
+
+# Held (flock) by every process updating the manifest next to it, e.g. several API workers
+MANIFEST_LOCK_FILE = ".manifest.lock"
+
+_CONVERSATION_ID = re.compile(r"[A-Za-z0-9_-]+")
+_manifest_lock = threading.Lock()
+
+def normalize_user_id(user_id: Optional[str]) -> str:
+    """Case- and whitespace-insensitive user id ("default" if empty)"""
+    return (user_id or "").strip().lower() or DEFAULT_USER
+
+def user_dir(user_id: Optional[str] = None) -> Path:
+    """
+    Directory holding one user's conversations.
+
+    Users are spread over 256 shard directories by the hash of their id, e.g.
+    users/3f/3fa2.../, so no directory grows with the total number of users.
+    """
+    digest = hashlib.sha256(normalize_user_id(user_id).encode("utf-8")).hexdigest()
+    return STORAGE_DIR / "users" / digest[:2] / digest[:32]
+
+def _conversation_path(conversation_id: str, user_id: Optional[str]) -> Optional[Path]:
+    if not _CONVERSATION_ID.fullmatch(conversation_id or ""):
+        return None
+    return user_dir(user_id) / f"{conversation_id}.json"
+
+def _write_json(file_path: Path, data) -> None:
+    """Write via a temporary file so readers never see a half-written file"""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, file_path)
+
+def _summary(conversation_data: Dict) -> Dict:
+    return {field: conversation_data.get(field) for field in SUMMARY_FIELDS}
+
+@contextmanager
+def _locked_manifest(directory: Path):
+    """Serialize reads and updates of a user's manifest across threads and processes"""
+    with _manifest_lock:
+        if fcntl is None or not directory.exists():
+            yield
+            return
+        with open(directory / MANIFEST_LOCK_FILE, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _conversation_files(directory: Path) -> Dict[str, Path]:
+    return {path.stem: path for path in directory.glob("*.json") if path.name != MANIFEST_FILE}
+
+def _read_manifest(directory: Path, reconcile: bool = False) -> Dict[str, Dict]:
+    """
+    The user's manifest, rebuilt from their conversation files if it is missing or unreadable.
+
+    With reconcile=True, entries are also matched against the conversation files
+    present (names only): files missing from the manifest are added and entries
+    without a file are dropped, so a manifest that drifted heals itself.
+    """
+    manifest_path = directory / MANIFEST_FILE
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if not reconcile:
+            return manifest
+    except FileNotFoundError:
+        if not directory.exists():
+            return {}
+        manifest = None
+    except Exception as e:
+        print(f"Error reading conversation manifest {manifest_path}: {e}")
+        manifest = None
+
+    if manifest is None:
+        manifest = {conv_id: _summary(conv) for conv_id, conv in _load_files(directory).items()}
+    else:
+        files = _conversation_files(directory)
+        if files.keys() == manifest.keys():
+            return manifest
+        manifest = {conv_id: summary for conv_id, summary in manifest.items() if conv_id in files}
+        for conv_id, file_path in files.items():
+            if conv_id not in manifest:
+                conversation_data = _load_file(file_path)
+                if conversation_data is not None:
+                    manifest[conv_id] = _summary(conversation_data)
+    _write_json(manifest_path, manifest)
+    return manifest
+
+def _update_manifest(user_id: Optional[str], conversation_id: str, summary: Optional[Dict]) -> None:
+    """Set (or with summary=None, remove) a manifest entry; unchanged entries are not rewritten"""
+    directory = user_dir(user_id)
+    with _locked_manifest(directory):
+        manifest = _read_manifest(directory)
+        if manifest.get(conversation_id) == summary:
+            return
+        if summary is None:
+            manifest.pop(conversation_id, None)
+        else:
+            manifest[conversation_id] = summary
+        _write_json(directory / MANIFEST_FILE, manifest)
 
-def load_conversation(conversation_id: str) -> Optional[Dict]:
+def _load_file(file_path: Path) -> Optional[Dict]:
+    """Load one conversation file (None if it can't be read)"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            conversation_data = json.load(f)
+
+            # Add timestamps if they don't exist (for backward compatibility)
+            if "created_at" not in conversation_data:
+                # Use file modification time as fallback
+                mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
+                conversation_data["created_at"] = mod_time.isoformat()
+
+            if "updated_at" not in conversation_data:
+                mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
+                conversation_data["updated_at"] = mod_time.isoformat()
+
+            return conversation_data
+    except Exception as e:
+        print(f"Error loading conversation {file_path.stem}: {e}")
+        return None
+
+def _load_files(directory: Path) -> Dict[str, Dict]:
+    """Load every conversation file in a directory"""
+    conversations = {}
+    for conversation_id, file_path in _conversation_files(directory).items():
+        conversation_data = _load_file(file_path)
+        if conversation_data is not None:
+            conversations[conversation_id] = conversation_data
+    return conversations
+
+def migrate_legacy_conversations() -> int:
+    """
+    Move conversations saved flat in STORAGE_DIR (before per-user partitions)
+    into the default user's partition.
+
+    Returns:
+        Number of conversations moved
+    """
+    legacy_files = list(STORAGE_DIR.glob("*.json"))
+    if not legacy_files:
+        return 0
+    directory = user_dir(DEFAULT_USER)
+    directory.mkdir(parents=True, exist_ok=True)
+    for file_path in legacy_files:
+        os.replace(file_path, directory / file_path.name)
+    # Rebuilt from the moved files on next read
+    (directory / MANIFEST_FILE).unlink(missing_ok=True)
+    print(f"Moved {len(legacy_files)} conversations into the default user's storage")
+    return len(legacy_files)
+
+def save_conversation(conversation_id: str, conversation_data: Dict, user_id: Optional[str] = None) -> None:
+    """Save a conversation to a JSON file in the user's partition"""
+    file_path = _conversation_path(conversation_id, user_id)
+    if file_path is None:
+        raise ValueError(f"Invalid conversation id: {conversation_id!r}")
+    _write_json(file_path, conversation_data)
+    _update_manifest(user_id, conversation_id, _summary(conversation_data))
+
+def load_conversation(conversation_id: str, user_id: Optional[str] = None) -> Optional[Dict]:
     """Load a conversation from a JSON file"""
-    file_path = STORAGE_DIR / f"{conversation_id}.json"
-    if file_path.exists():
+    file_path = _conversation_path(conversation_id, user_id)
+    if file_path is not None and file_path.exists():
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     return None
 
-def load_all_conversations() -> Dict[str, Dict]:
-    """Load all conversations from storage"""
-    
-    conversations = {}
-    if STORAGE_DIR.exists():
-        for file_path in STORAGE_DIR.glob("*.json"):
-            conversation_id = file_path.stem
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    conversation_data = json.load(f)
-                    
-                    # Add timestamps if they don't exist (for backward compatibility)
-                    if "created_at" not in conversation_data:
-                        # Use file modification time as fallback
-                        mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-                        conversation_data["created_at"] = mod_time.isoformat()
-                    
-                    if "updated_at" not in conversation_data:
-                        mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-                        conversation_data["updated_at"] = mod_time.isoformat()
-                    
-                    conversations[conversation_id] = conversation_data
-            except Exception as e:
-                print(f"Error loading conversation {conversation_id}: {e}")
-    return conversations
+def list_conversations(user_id: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Summaries (id, title, timestamps, token usage) of a user's conversations,
+    read from their manifest without opening the conversations themselves
+    (only files the manifest is missing are opened).
+    """
+    if normalize_user_id(user_id) == DEFAULT_USER:
+        migrate_legacy_conversations()
+    directory = user_dir(user_id)
+    with _locked_manifest(directory):
+        return _read_manifest(directory, reconcile=True)
+
+def all_conversation_summaries() -> List[Dict]:
+    """Summaries of every user's conversations, read from the manifests (for reports)"""
+    summaries = []
+    for manifest_path in STORAGE_DIR.glob(f"users/*/*/{MANIFEST_FILE}"):
+        with _locked_manifest(manifest_path.parent):
+            summaries.extend(_read_manifest(manifest_path.parent).values())
+    return summaries
 
-def delete_conversation(conversation_id: str) -> None:
+def load_all_conversations(user_id: Optional[str] = None) -> Dict[str, Dict]:
+    """Load all of a user's conversations from storage"""
+    if normalize_user_id(user_id) == DEFAULT_USER:
+        migrate_legacy_conversations()
+    return _load_files(user_dir(user_id))
+
+def delete_conversation(conversation_id: str, user_id: Optional[str] = None) -> None:
     """Delete a conversation file"""
-    file_path = STORAGE_DIR / f"{conversation_id}.json"
-    if file_path.exists():
+    file_path = _conversation_path(conversation_id, user_id)
+    if file_path is not None and file_path.exists():
         file_path.unlink()
-
+        _update_manifest(user_id, conversation_id, None)
@@ -0,0 +1,203 @@
+"""Structured (JSON schema) tool output, parsed incrementally so markdown can still stream."""
+
+import json
+from backend.utils import get_setting
+from backend.cancellation import iter_stream
+from backend.usage import track_usage
+from backend.tools.registry import get_tool_renderer
+
+# Added as a system message in structured mode; the schema itself is enforced by the API
+STRUCTURED_INSTRUCTIONS = "Respond only with JSON matching the given schema. Write each list entry as plain text, without bullets or markdown."
+
+
+class IncrementalJSONParser:
+    """
+    Streaming JSON tokenizer that reports every scalar value as soon as it is complete.
+
+    Values are reported with their path from the root, e.g. ("days", 0, "title"),
+    so callers can render each one before the rest of the document has arrived.
+    """
+
+    def __init__(self):
+        self.text = []
+        self._stack = []  # open containers: {"type": "object"/"array", "key", "index", "expect_key"}
+        self._in_string = False
+        self._escape = False
+        self._buffer = []  # raw characters of the current string or bare scalar
+
+    def feed(self, text: str) -> list:
+        """
+        Consume the next piece of the document.
+
+        Returns:
+            list: (path tuple, value) for each scalar completed within this piece
+        """
+        self.text.append(text)
+        events = []
+        for ch in text:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._complete(json.loads('"' + "".join(self._buffer) + '"'), events)
+                    self._buffer = []
+                    continue
+                self._buffer.append(ch)
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._stack.append({"type": "object" if ch == "{" else "array", "key": None, "index": 0, "expect_key": ch == "{"})
+            elif ch in "}],: \t\r\n":
+                self._flush_scalar(events)
+                if ch in "}]" and self._stack:
+                    self._stack.pop()
+                elif ch == "," and self._stack:
+                    frame = self._stack[-1]
+                    if frame["type"] == "array":
+                        frame["index"] += 1
+                    else:
+                        frame["expect_key"] = True
+            else:
+                self._buffer.append(ch)
+        return events
+
+    def _flush_scalar(self, events: list) -> None:
+        if not self._buffer:
+            return
+        raw, self._buffer = "".join(self._buffer), []
+        try:
+            self._complete(json.loads(raw), events)
+        except ValueError:
+            pass
+
+    def _complete(self, value, events: list) -> None:
+        if not self._stack:
+            events.append(((), value))
+            return
+        frame = self._stack[-1]
+        if frame["type"] == "object" and frame["expect_key"]:
+            frame["key"] = value
+            frame["expect_key"] = False
+            return
+        events.append((self._path(), value))
+
+    def _path(self) -> tuple:
+        return tuple(frame["key"] if frame["type"] == "object" else frame["index"] for frame in self._stack)
+
+    def result(self):
+        """The complete parsed document, or None if it isn't valid JSON."""
+        try:
+            return json.loads("".join(self.text))
+        except ValueError:
+            return None
+
+
+def use_structured_output() -> bool:
+    """True if STRUCTURED_OUTPUT_ENABLED asks tools for JSON instead of free-form markdown."""
+    return get_setting("STRUCTURED_OUTPUT_ENABLED", False)
+
+
+def response_format(name: str, schema: dict) -> dict:
+    """OpenAI response_format enforcing a strict JSON schema."""
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def stream_structured(stream, render_value, label: str, cancel_token=None, expected_tokens: int = 0):
+    """
+    Stream a JSON completion as markdown, one value at a time.
+
+    Args:
+        stream: OpenAI completion stream producing a JSON document
+        render_value: Callable (path, value) -> markdown text (or None to skip)
+        label: Call site name for usage statistics
+        cancel_token: Cancellation token for the current turn (optional)
+        expected_tokens: Typical completion size (for cancellation savings)
+
+    Yields:
+        Markdown chunks
+
+    Returns:
+        The parsed document, or None if the output was cut short or invalid
+    """
+    parser = IncrementalJSONParser()
+    for chunk in track_usage(iter_stream(stream, cancel_token, expected_tokens=expected_tokens), label):
+        if chunk.choices[0].delta.content:
+            for path, value in parser.feed(chunk.choices[0].delta.content):
+                text = render_value(path, value)
+                if text:
+                    yield text
+    return parser.result()
+
+
+def iter_values(document, path: tuple = ()):
+    """
+    Every scalar of a parsed document with its path, in document order
+    (the same events IncrementalJSONParser reports while the document streams).
+
+    Yields:
+        (path tuple, value)
+    """
+    if isinstance(document, dict):
+        for key, value in document.items():
+            yield from iter_values(value, path + (key,))
+    elif isinstance(document, list):
+        for index, value in enumerate(document):
+            yield from iter_values(value, path + (index,))
+    else:
+        yield path, document
+
+
+def render_document(document, render_value) -> str:
+    """Markdown for a whole parsed document, identical to what stream_structured streamed for it."""
+    return "".join(text for text in (render_value(path, value) for path, value in iter_values(document)) if text)
+
+
+def compact_reply(content: str, tool_results: list) -> str:
+    """
+    Drop tool output from a finished reply when it can be rendered again from the
+    tool's structured result, so it is only stored once (as JSON).
+
+    Each entry of `tool_results` ({"tool", "data", "output"}) loses its "output";
+    entries whose output was dropped get the "position" it is rendered back at.
+
+    Returns:
+        The reply text without the dropped tool output
+    """
+    parts, cursor = [], 0
+    for result in tool_results:
+        output = result.pop("output", "")
+        renderer = get_tool_renderer(result["tool"])
+        start = content.find(output, cursor) if output else -1
+        # Only output that renders back byte for byte is dropped (e.g. not a cancelled or free-form one)
+        if start < 0 or renderer is None or renderer(result["data"]) != output:
+            continue
+        parts.append(content[cursor:start])
+        result["position"] = sum(len(part) for part in parts)
+        cursor = start + len(output)
+    parts.append(content[cursor:])
+    return "".join(parts)
+
+
+def render_reply(message: dict) -> str:
+    """The full markdown of a stored message, with dropped tool output rendered back in place."""
+    content = message.get("content") or ""
+    results = [result for result in message.get("tool_results") or () if "position" in result]
+    if not results:
+        return content
+    parts, cursor = [], 0
+    for result in sorted(results, key=lambda result: result["position"]):
+        renderer = get_tool_renderer(result["tool"])
+        parts.append(content[cursor:result["position"]])
+        parts.append(renderer(result["data"]) if renderer else "")
+        cursor = result["position"]
+    parts.append(content[cursor:])
+    return "".join(parts)
+
+
+def bullet_items(text: str) -> list:
+    """Item texts of a markdown bullet list, without the markers (for structuring free-form output)."""
+    return [line.strip().lstrip("-*•").strip() for line in text.splitlines() if line.strip()[:1] in ("-", "*", "•")]
+
@@ -1,19 +1,17 @@
-"""Tools package for OpenAI function calling."""
+"""Tools package for OpenAI function calling.
 
-from backend.tools.packing_list.tool import TOOL_DEFINITION as PACKING_LIST_TOOL, generate_packing_list
-from backend.tools.weather_itinerary.tool import TOOL_DEFINITION as WEATHER_TOOL, get_weather_forecast
-from backend.tools.trip_planner.tool import TOOL_DEFINITION as TRIP_PLANNER_TOOL, generate_trip_plan
+Tools are declared in each package's manifest.py and registered automatically;
+their implementations are imported only when a tool is first called.
+"""
 
-# Export all available tools
-AVAILABLE_TOOLS = [
-    PACKING_LIST_TOOL,
-    WEATHER_TOOL,
-    TRIP_PLANNER_TOOL
-]
+from backend.tools.registry import (
+    get_tool_definitions,
+    get_tool_digest,
+    get_tool_function,
+    get_tool_message,
+    has_tool,
+    is_visible_tool
+)
 
-# Map function names to implementations
-TOOL_FUNCTIONS = {
-    "generate_packing_list": generate_packing_list,
-    "get_weather_forecast": get_weather_forecast,
-    "generate_trip_plan": generate_trip_plan
-}
+# Export all available tools (schemas only)
+AVAILABLE_TOOLS = get_tool_definitions()
@@ -0,0 +1,161 @@
+"""Shared HTTP client for tools: pooled keep-alive connections, deadline-bounded retries and counters."""
+
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from backend.utils import get_setting
+
+# Per-attempt timeout; the overall budget is enforced by Deadline
+REQUEST_TIMEOUT_SECONDS = 10
+
+# Retry idempotent GETs on transient failures
+MAX_RETRIES = 2
+BACKOFF_SECONDS = 0.3
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Process-wide counters (connection reuse is derived from urllib3 pool counters)
+HTTP_STATS = {
+    "requests": 0,
+    "retries": 0,
+    "failures": 0,
+    "total_latency_ms": 0.0,
+    "max_latency_ms": 0.0
+}
+_stats_lock = threading.Lock()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class Deadline:
+    """Overall time budget shared by every HTTP call a tool makes."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide session, so warm requests reuse open TCP/TLS connections.
+
+    With CASSETTE_MODE=record responses are recorded; with replay they are
+    served from the cassette without any network access.
+    """
+    global _session
+    from backend.cassettes import get_cassette
+    cassette = get_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        return cassette.wrap_session()
+    with _session_lock:
+        if _session is None:
+            pool_size = get_setting("HTTP_POOL_SIZE", 10)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return cassette.wrap_session(_session) if cassette is not None else _session
+
+
+def http_get(url: str, params: dict = None, deadline: Deadline = None):
+    """
+    GET a URL through the shared session, retrying transient failures with backoff.
+
+    Each attempt's timeout is capped by the remaining deadline, so a tool never
+    spends longer than its budget waiting on the network.
+
+    Args:
+        url: URL to fetch
+        params: Query parameters
+        deadline: Overall time budget for this tool call (optional)
+
+    Returns:
+        requests.Response (possibly with an error status once retries are exhausted)
+
+    Raises:
+        requests.exceptions.RequestException: On connection errors, timeouts or an exhausted deadline
+    """
+    session = get_session()
+
+    for attempt in range(MAX_RETRIES + 1):
+        timeout = REQUEST_TIMEOUT_SECONDS
+        if deadline is not None:
+            if deadline.expired:
+                _record_failure()
+                raise requests.exceptions.Timeout(f"Deadline exceeded before requesting {url}")
+            timeout = min(timeout, deadline.remaining())
+
+        started = time.perf_counter()
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            _record_latency(started)
+            if not _should_retry(attempt, deadline):
+                _record_failure()
+                raise
+        else:
+            _record_latency(started)
+            if response.status_code not in RETRY_STATUS_CODES or not _should_retry(attempt, deadline):
+                return response
+
+        with _stats_lock:
+            HTTP_STATS["retries"] += 1
+        _backoff(attempt, deadline)
+
+
+def _should_retry(attempt: int, deadline: Deadline) -> bool:
+    return attempt < MAX_RETRIES and (deadline is None or not deadline.expired)
+
+
+def _backoff(attempt: int, deadline: Deadline) -> None:
+    delay = BACKOFF_SECONDS * (2 ** attempt)
+    if deadline is not None:
+        delay = min(delay, deadline.remaining())
+    time.sleep(delay)
+
+
+def _record_latency(started: float) -> None:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _stats_lock:
+        HTTP_STATS["requests"] += 1
+        HTTP_STATS["total_latency_ms"] += elapsed_ms
+        HTTP_STATS["max_latency_ms"] = max(HTTP_STATS["max_latency_ms"], elapsed_ms)
+
+
+def _record_failure() -> None:
+    with _stats_lock:
+        HTTP_STATS["failures"] += 1
+
+
+def get_http_stats() -> dict:
+    """
+    Snapshot of HTTP counters, including how many requests reused a pooled connection.
+
+    Returns:
+        dict: Request, retry, failure and latency counters plus connection reuse
+    """
+    with _stats_lock:
+        stats = dict(HTTP_STATS)
+
+    new_connections = 0
+    pooled_requests = 0
+    if _session is not None:
+        pool_manager = _session.get_adapter("https://").poolmanager
+        for key in pool_manager.pools.keys():
+            pool = pool_manager.pools.get(key)
+            if pool is not None:
+                new_connections += pool.num_connections
+                pooled_requests += pool.num_requests
+
+    stats["new_connections"] = new_connections
+    stats["reused_connections"] = max(0, pooled_requests - new_connections)
+    stats["avg_latency_ms"] = stats["total_latency_ms"] / stats["requests"] if stats["requests"] else 0.0
+    return stats
@@ -1,5 +1,13 @@
 """Packing list tool."""
 
-from .tool import TOOL_DEFINITION, generate_packing_list
+from .manifest import TOOL_DEFINITION
 
 __all__ = ["TOOL_DEFINITION", "generate_packing_list"]
+
+
+def __getattr__(name):
+    # The implementation is only imported when first used
+    if name == "generate_packing_list":
+        from .tool import generate_packing_list
+        return generate_packing_list
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,48 @@
+"""Packing list tool declaration (schema and metadata only; the implementation is imported on first use)."""
+
+# Tool definition for OpenAI function calling
+TOOL_DEFINITION = {
+    "type": "function",
+    "function": {
+        "name": "generate_packing_list",
+        "description": "Generate a packing list for a destination based on trip details",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "destination": {
+                    "type": "string",
+                    "description": "The destination (city, country, or region)"
+                },
+                "duration_days": {
+                    "type": "integer",
+                    "description": "Trip duration in days"
+                },
+                "activities": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of planned activities (e.g., hiking, beach, business)"
+                },
+                "season": {
+                    "type": "string",
+                    "description": "Season or month of travel"
+                },
+                "weather_context": {
+                    "type": "string",
+                    "description": "Recent weather forecast data for the destination (if available). Include temperatures, conditions, and precipitation."
+                }
+            },
+            "required": ["destination"]
+        }
+    }
+}
+
+TOOLS = [
+    {
+        "definition": TOOL_DEFINITION,
+        "function": "backend.tools.packing_list.tool:generate_packing_list",
+        "digest": "backend.tools.packing_list.tool:digest_packing_list",
+        "render": "backend.tools.packing_list.tool:render_packing_list",
+        "message": "🧳 Generating packing list...",
+        "visible": True
+    }
+]
@@ -0,0 +1,191 @@
+"""Rule-based baseline packing list: standard items picked by duration, climate band and activities."""
+
+import re
+
+# Mean daily high (°C) at or above which each climate band starts, warmest first
+CLIMATE_BANDS = [
+    ("hot", 27),
+    ("warm", 20),
+    ("mild", 12),
+    ("cool", 4),
+    ("cold", -100)
+]
+
+# Season or month words -> climate band (temperate northern-hemisphere assumption)
+SEASON_BANDS = {
+    "summer": "warm", "june": "warm", "july": "hot", "august": "hot",
+    "spring": "mild", "march": "cool", "april": "mild", "may": "mild",
+    "autumn": "mild", "fall": "mild", "september": "warm", "october": "mild", "november": "cool",
+    "winter": "cold", "december": "cold", "january": "cold", "february": "cold"
+}
+
+DEFAULT_BAND = "mild"
+
+RAIN_WORDS = ("rain", "shower", "drizzle", "storm", "thunder")
+SNOW_WORDS = ("snow", "sleet", "blizzard")
+
+# Precipitation probability (%) from which rain gear is packed
+RAIN_PROBABILITY = 50
+
+# Clothes are re-worn or washed beyond this many days
+LAUNDRY_DAYS = 7
+
+ESSENTIALS = [
+    "Passport / ID and travel documents",
+    "Phone and charger",
+    "Payment cards and some local cash",
+    "Travel insurance details",
+    "Medications and basic first-aid kit",
+    "Toiletries (travel-size)"
+]
+
+# The first item of each band is the everyday top, packed once per day up to LAUNDRY_DAYS
+BAND_CLOTHING = {
+    "hot": ["Breathable shirts / tops", "Shorts or light trousers", "Sandals", "Sun hat"],
+    "warm": ["T-shirts / light tops", "Light trousers or shorts", "Light layer for evenings", "Comfortable walking shoes"],
+    "mild": ["Long-sleeve tops", "Trousers / jeans", "Light jacket or sweater", "Comfortable walking shoes"],
+    "cool": ["Long-sleeve tops", "Warm sweater or fleece", "Trousers / jeans", "Insulated jacket", "Closed shoes"],
+    "cold": ["Thermal base layers", "Warm sweater or fleece", "Insulated winter coat", "Hat, gloves and scarf", "Warm waterproof boots"]
+}
+
+BAND_EXTRAS = {
+    "hot": ["Sunscreen", "Sunglasses", "Refillable water bottle"],
+    "warm": ["Sunscreen", "Sunglasses"],
+    "mild": ["Compact umbrella"],
+    "cool": ["Lip balm"],
+    "cold": ["Hand warmers", "Lip balm"]
+}
+
+# Activity keyword -> items (matched at the start of a word in each activity)
+ACTIVITY_ITEMS = {
+    "hik": ["Hiking boots", "Daypack", "Moisture-wicking socks"],
+    "trek": ["Hiking boots", "Daypack", "Moisture-wicking socks"],
+    "beach": ["Swimwear", "Beach towel", "Flip-flops"],
+    "swim": ["Swimwear", "Quick-dry towel"],
+    "snorkel": ["Swimwear", "Snorkel mask (optional)"],
+    "diving": ["Swimwear", "Dive certification card"],
+    "scuba": ["Swimwear", "Dive certification card"],
+    "ski": ["Ski jacket and pants", "Ski goggles", "Thermal socks"],
+    "snowboard": ["Snowboard jacket and pants", "Goggles", "Thermal socks"],
+    "business": ["Business outfits", "Dress shoes", "Laptop and charger"],
+    "conference": ["Business outfits", "Laptop and charger", "Business cards"],
+    "wedding": ["Formal outfit", "Dress shoes"],
+    "camp": ["Headlamp", "Insect repellent", "Reusable water bottle"],
+    "run": ["Running shoes", "Sports clothes"],
+    "gym": ["Sports clothes", "Trainers"],
+    "fine dining": ["Smart-casual outfit"],
+    "photo": ["Camera, spare batteries and memory cards"]
+}
+
+OFTEN_FORGOTTEN = ["Universal power adapter", "Reusable shopping bag", "Earplugs / eye mask for travel days"]
+
+
+def _band_for_temperature(mean_high: float) -> str:
+    for band, threshold in CLIMATE_BANDS:
+        if mean_high >= threshold:
+            return band
+    return CLIMATE_BANDS[-1][0]
+
+
+def climate_from_weather(weather_context: str):
+    """
+    Climate band and wet/snow flags from free-text forecast data.
+
+    Returns:
+        tuple: (band or None if no temperatures were found, rain, snow)
+    """
+    text = weather_context.lower()
+    highs = []
+    # "24°C" or a "14–24°C" range, whose upper end is the daily high
+    for low, high, unit in re.findall(r"(-?\d+(?:\.\d+)?)(?:\s*[–-]\s*(-?\d+(?:\.\d+)?))?\s*°?\s*([cf])\b", text):
+        value = float(high or low)
+        highs.append(value if unit == "c" else (value - 32) * 5 / 9)
+
+    rain = any(word in text for word in RAIN_WORDS) \
+        or any(int(p) >= RAIN_PROBABILITY for p in re.findall(r"(\d{1,3})\s*%", text))
+    snow = any(word in text for word in SNOW_WORDS)
+
+    if not highs:
+        return None, rain, snow
+    return _band_for_temperature(sum(highs) / len(highs)), rain, snow
+
+
+def climate_band(weather_context: str = None, season: str = None):
+    """
+    Climate band from the forecast if available, otherwise from the season or month.
+
+    Returns:
+        tuple: (band, rain, snow)
+    """
+    if weather_context:
+        band, rain, snow = climate_from_weather(weather_context)
+        if band:
+            return band, rain, snow or band == "cold"
+    if season:
+        for word, band in SEASON_BANDS.items():
+            if word in season.lower():
+                return band, False, band == "cold"
+    return DEFAULT_BAND, False, False
+
+
+def _add(items: list, new_items) -> None:
+    for item in new_items:
+        if item not in items:
+            items.append(item)
+
+
+def build_baseline(duration_days: int = None, activities: list = None, season: str = None, weather_context: str = None) -> dict:
+    """
+    Standard packing list for the trip, computed locally in well under a millisecond.
+
+    Returns:
+        dict: {"sections": [{"name", "items"}], "climate": band}
+    """
+    band, rain, snow = climate_band(weather_context, season)
+    days = duration_days or 3
+    changes = min(days, LAUNDRY_DAYS)
+
+    tops, *other_clothing = BAND_CLOTHING[band]
+    clothing = [f"Underwear and socks ({changes + 1} sets)", f"{tops} ({changes})"]
+    _add(clothing, other_clothing)
+    if rain:
+        _add(clothing, ["Waterproof jacket"])
+    if snow:
+        _add(clothing, ["Warm waterproof boots"])
+    clothing.append("Sleepwear")
+
+    essentials = list(ESSENTIALS)
+    optional = []
+    for activity in activities or []:
+        activity = activity.lower()
+        for keyword, items in ACTIVITY_ITEMS.items():
+            if re.search(rf"\b{keyword}", activity):
+                _add(optional, items)
+    _add(optional, BAND_EXTRAS[band])
+    if rain:
+        _add(optional, ["Compact umbrella"])
+
+    forgotten = list(OFTEN_FORGOTTEN)
+    if days > LAUNDRY_DAYS:
+        _add(forgotten, ["Small laundry kit or detergent sheets"])
+
+    return {
+        "sections": [
+            {"name": "Essentials", "items": essentials},
+            {"name": "Clothing", "items": clothing},
+            {"name": "Optional / Nice-to-have", "items": optional},
+            {"name": "Often forgotten items", "items": forgotten}
+        ],
+        "climate": band
+    }
+
+
+def render_sections(sections: list) -> str:
+    """Markdown for packing list sections (same layout as the structured renderer)."""
+    lines = []
+    for section in sections:
+        if not section["items"]:
+            continue
+        lines.append(f"\n**{section['name']}**")
+        lines.extend(f"- {item}" for item in section["items"])
+    return "\n".join(lines) + "\n"
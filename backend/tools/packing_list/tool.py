@@ -1,46 +1,124 @@
 """Packing list generation tool for travel planning."""
 
 import os
-from backend.utils import get_openai_client, get_runtime_context
-
-# Tool definition for OpenAI function calling
-TOOL_DEFINITION = {
-    "type": "function",
-    "function": {
-        "name": "generate_packing_list",
-        "description": "Generate a packing list for a destination based on trip details",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "destination": {
-                    "type": "string",
-                    "description": "The destination (city, country, or region)"
-                },
-                "duration_days": {
-                    "type": "integer",
-                    "description": "Trip duration in days"
-                },
-                "activities": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "List of planned activities (e.g., hiking, beach, business)"
-                },
-                "season": {
-                    "type": "string",
-                    "description": "Season or month of travel"
+from backend.utils import get_openai_client, get_runtime_context, get_setting
+from backend.cancellation import iter_stream
+from backend.usage import STREAM_OPTIONS, track_usage
+from backend.digests import fit_levels
+from backend.structured_output import STRUCTURED_INSTRUCTIONS, bullet_items, render_document, response_format, stream_structured, use_structured_output
+from backend.tools.packing_list.rules import build_baseline, render_sections
+
+# Typical packing list length in tokens (used to estimate savings on cancellation)
+EXPECTED_TOKENS = 500
+
+# Typical length of the destination-specific extras in tokens
+EXTRAS_EXPECTED_TOKENS = 120
+
+# "llm" generates the whole list; "rules" shows a local baseline instantly and asks the LLM only for extras
+DEFAULT_ENGINE = "llm"
+
+EXTRAS_SECTION = "Destination-specific extras"
+
+# Structured output: one entry per section, in display order
+PACKING_LIST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "items": {"type": "array", "items": {"type": "string"}}
                 },
-                "weather_context": {
-                    "type": "string",
-                    "description": "Recent weather forecast data for the destination (if available). Include temperatures, conditions, and precipitation."
-                }
-            },
-            "required": ["destination"]
+                "required": ["name", "items"],
+                "additionalProperties": False
+            }
         }
-    }
+    },
+    "required": ["sections"],
+    "additionalProperties": False
 }
 
+def render_packing_value(path: tuple, value) -> str:
+    """Markdown for one completed value of a structured packing list."""
+    if len(path) == 3 and path[0] == "sections" and path[2] == "name":
+        return f"\n**{value}**\n"
+    if len(path) == 4 and path[0] == "sections" and path[2] == "items":
+        return f"- {value}\n"
+    return None
+
+
+def render_packing_list(packing_list: dict) -> str:
+    """Markdown for a whole packing list, as it was streamed (used to show stored lists)."""
+    return render_document(packing_list, render_packing_value)
+
+
+def digest_packing_list(packing_list: dict, max_tokens: int) -> str:
+    """Model-facing digest of a packing list: every section, with as many items as fit."""
+    sections = packing_list.get("sections", [])
+    
+    def render(per_section):
+        return "\n".join(
+            f"{section['name']}: {', '.join(section['items'][:per_section])}"
+            for section in sections if section["items"]
+        )
+    
+    most = max((len(section["items"]) for section in sections), default=0)
+    return fit_levels(render, range(most, 0, -1), max_tokens)
 
-def generate_packing_list(destination: str, duration_days: int = None, activities: list = None, season: str = None, weather_context: str = None):
+
+def _load_prompt(name: str) -> str:
+    prompt_path = os.path.join(os.path.dirname(__file__), '..', '..', 'prompts', name)
+    with open(prompt_path, 'r', encoding='utf-8') as f:
+        return f.read().strip()
+
+
+def _generate_from_rules(user_message: str, duration_days: int = None, activities: list = None,
+                         season: str = None, weather_context: str = None, cancel_token=None):
+    """
+    Stream the rule-based baseline at once, then (optionally) LLM extras for the destination.
+    
+    Yields:
+        Chunks of the packing list
+    
+    Returns:
+        dict with "sections", including the extras section when it was generated
+    """
+    sections = build_baseline(duration_days, activities, season, weather_context)["sections"]
+    yield render_sections(sections)
+    
+    if not get_setting("PACKING_LIST_LLM_EXTRAS", True):
+        return {"sections": sections}
+    if cancel_token is not None and cancel_token.cancelled:
+        return {"sections": sections}
+    
+    standard_list = "\n".join(f"{section['name']}: {', '.join(section['items'])}" for section in sections)
+    client = get_openai_client()
+    stream = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": _load_prompt('packing_list_extras.md')},
+            {"role": "system", "content": get_runtime_context()},
+            {"role": "user", "content": f"{user_message}\n\nStandard list already shown:\n{standard_list}"}
+        ],
+        temperature=0.7,
+        stream=True,
+        stream_options=STREAM_OPTIONS
+    )
+    
+    yield f"\n**{EXTRAS_SECTION}**\n"
+    extras_text = ""
+    for chunk in track_usage(iter_stream(stream, cancel_token, expected_tokens=EXTRAS_EXPECTED_TOKENS), "packing_list_extras"):
+        if chunk.choices[0].delta.content:
+            extras_text += chunk.choices[0].delta.content
+            yield chunk.choices[0].delta.content
+    yield "\n"
+    
+    return {"sections": sections + [{"name": EXTRAS_SECTION, "items": bullet_items(extras_text)}]}
+
+
+def generate_packing_list(destination: str, duration_days: int = None, activities: list = None, season: str = None, weather_context: str = None, cancel_token=None):
     """
     Generate a packing list using LLM based on destination and trip details.
     Streams the response as it's generated.
@@ -51,15 +129,14 @@ def generate_packing_list(destination: str, duration_days: int = None, activitie
         activities: List of activities (optional)
         season: Season of travel (optional)
         weather_context: Weather forecast data (optional)
+        cancel_token: Cancellation token for the current turn (optional)
     
     Yields:
         Chunks of the generated packing list
-    """
-    # Load prompt from markdown file
-    prompt_path = os.path.join(os.path.dirname(__file__), '..', '..', 'prompts', 'packing_list.md')
-    with open(prompt_path, 'r', encoding='utf-8') as f:
-        system_prompt = f.read().strip()
     
+    Returns:
+        dict with "sections" when the list is structured (rules engine or structured output), otherwise None
+    """
     # Build user message with trip context
     context_parts = [f"Destination: {destination}"]
     if duration_days:
@@ -73,20 +150,42 @@ def generate_packing_list(destination: str, duration_days: int = None, activitie
     
     user_message = "\n".join(context_parts)
     
-    # Call LLM with streaming (inject runtime context)
+    # Rules engine: standard items instantly, LLM only for what's specific to the destination
+    if str(get_setting("PACKING_LIST_ENGINE", DEFAULT_ENGINE)).strip().lower() == "rules":
+        return (yield from _generate_from_rules(user_message, duration_days, activities, season, weather_context, cancel_token))
+    
+    # Load prompt from markdown file
+    system_prompt = _load_prompt('packing_list.md')
+    
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": get_runtime_context()},
+        {"role": "user", "content": user_message}
+    ]
     client = get_openai_client()
+    
+    # Structured mode: JSON sections rendered to markdown as each item completes
+    if use_structured_output():
+        stream = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages + [{"role": "system", "content": STRUCTURED_INSTRUCTIONS}],
+            temperature=0.7,
+            response_format=response_format("packing_list", PACKING_LIST_SCHEMA),
+            stream=True,
+            stream_options=STREAM_OPTIONS
+        )
+        return (yield from stream_structured(stream, render_packing_value, "generate_packing_list", cancel_token, EXPECTED_TOKENS))
+    
+    # Call LLM with streaming (inject runtime context)
     stream = client.chat.completions.create(
         model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "system", "content": get_runtime_context()},
-            {"role": "user", "content": user_message}
-        ],
+        messages=messages,
         temperature=0.7,
-        stream=True
+        stream=True,
+        stream_options=STREAM_OPTIONS
     )
     
-    # Yield chunks as they come
-    for chunk in stream:
+    # Yield chunks as they come (closes the stream if the turn is cancelled)
+    for chunk in track_usage(iter_stream(stream, cancel_token, expected_tokens=EXPECTED_TOKENS), "generate_packing_list"):
         if chunk.choices[0].delta.content:
             yield chunk.choices[0].delta.content
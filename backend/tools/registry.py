@@ -0,0 +1,96 @@
+"""Tool registry: schemas and metadata come from lightweight manifests, implementations load on first use."""
+
+import pkgutil
+import importlib
+import threading
+from pathlib import Path
+
+# Every tool package declares its tools in this module as a TOOLS list
+MANIFEST_MODULE = "manifest"
+
+# name -> {"definition", "function", "digest", "render", "message", "visible"};
+# function/digest/render are "module:attribute" paths
+_tools = {}
+_resolved = {}
+_lock = threading.Lock()
+
+
+def load_manifests() -> None:
+    """
+    Register the tools declared by every tool package's manifest (once).
+
+    Packages are scanned in name order, so the tool list sent to the model is
+    always identical. Manifests only hold dicts, so this imports no tool code.
+    """
+    with _lock:
+        if _tools:
+            return
+        package_dir = Path(__file__).parent
+        for module_info in pkgutil.iter_modules([str(package_dir)]):
+            if not module_info.ispkg:
+                continue
+            if not (package_dir / module_info.name / f"{MANIFEST_MODULE}.py").exists():
+                continue
+            manifest = importlib.import_module(f"{__package__}.{module_info.name}.{MANIFEST_MODULE}")
+            for spec in manifest.TOOLS:
+                _tools[spec["definition"]["function"]["name"]] = spec
+
+
+def _resolve(path: str):
+    """Import "package.module:attribute" and return the attribute, caching the result."""
+    with _lock:
+        if path not in _resolved:
+            module_name, attribute = path.split(":")
+            _resolved[path] = getattr(importlib.import_module(module_name), attribute)
+        return _resolved[path]
+
+
+def get_tool_definitions() -> list:
+    """OpenAI tool schemas for every registered tool, in a stable order."""
+    load_manifests()
+    return [spec["definition"] for spec in _tools.values()]
+
+
+def has_tool(name: str) -> bool:
+    load_manifests()
+    return name in _tools
+
+
+def get_tool_function(name: str):
+    """
+    The implementation of a tool, importing its module on first use.
+
+    Returns:
+        Callable taking the tool arguments (plus cancel_token), or None for unknown tools
+    """
+    load_manifests()
+    spec = _tools.get(name)
+    return _resolve(spec["function"]) if spec else None
+
+
+def get_tool_digest(name: str):
+    """The model-facing digest function for a tool's structured result, or None."""
+    load_manifests()
+    spec = _tools.get(name)
+    return _resolve(spec["digest"]) if spec and spec.get("digest") else None
+
+
+def get_tool_renderer(name: str):
+    """The function rendering a tool's structured result as the markdown it streamed, or None."""
+    load_manifests()
+    spec = _tools.get(name)
+    return _resolve(spec["render"]) if spec and spec.get("render") else None
+
+
+def get_tool_message(name: str) -> str:
+    """Loading message shown while a tool runs."""
+    load_manifests()
+    spec = _tools.get(name)
+    return spec["message"] if spec and spec.get("message") else f"🔧 Using tool: {name}..."
+
+
+def is_visible_tool(name: str) -> bool:
+    """True if the tool's output is streamed to the user."""
+    load_manifests()
+    spec = _tools.get(name)
+    return bool(spec and spec.get("visible"))
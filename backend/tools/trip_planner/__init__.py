@@ -1,5 +1,13 @@
 """Trip planner tool initialization."""
 
-from .tool import TOOL_DEFINITION, generate_trip_plan
+from .manifest import TOOL_DEFINITION
 
 __all__ = ['TOOL_DEFINITION', 'generate_trip_plan']
+
+
+def __getattr__(name):
+    # The implementation is only imported when first used
+    if name == "generate_trip_plan":
+        from .tool import generate_trip_plan
+        return generate_trip_plan
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
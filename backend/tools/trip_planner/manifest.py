@@ -0,0 +1,61 @@
+"""Trip planner tool declaration (schema and metadata only; the implementation is imported on first use)."""
+
+# Tool definition for OpenAI function calling
+TOOL_DEFINITION = {
+    "type": "function",
+    "function": {
+        "name": "generate_trip_plan",
+        "description": "Generate a day-by-day itinerary for a trip. Requires destination AND either duration_days OR date_range (at least one must be provided).",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "destination": {
+                    "type": "string",
+                    "description": "The destination (city, country, or region)"
+                },
+                "duration_days": {
+                    "type": "integer",
+                    "description": "Trip duration in days. Provide this OR date_range."
+                },
+                "date_range": {
+                    "type": "string",
+                    "description": "Date range in format 'YYYY-MM-DD to YYYY-MM-DD'. Provide this OR duration_days."
+                },
+                "travelers_count": {
+                    "type": "integer",
+                    "description": "Number of travelers (optional)"
+                },
+                "budget_level": {
+                    "type": "string",
+                    "description": "Budget level: budget, mid, or luxury (optional)",
+                    "enum": ["budget", "mid", "luxury"]
+                },
+                "trip_style": {
+                    "type": "string",
+                    "description": "Trip style: relaxed, balanced, or intense (optional)"
+                },
+                "interests": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of interests or activities (e.g., culture, food, nature, adventure) (optional)"
+                },
+                "constraints": {
+                    "type": "string",
+                    "description": "Any special constraints or requirements (e.g., accessibility needs, dietary restrictions) (optional)"
+                }
+            },
+            "required": ["destination"]
+        }
+    }
+}
+
+TOOLS = [
+    {
+        "definition": TOOL_DEFINITION,
+        "function": "backend.tools.trip_planner.tool:generate_trip_plan",
+        "digest": "backend.tools.trip_planner.tool:digest_trip_plan",
+        "render": "backend.tools.trip_planner.tool:render_trip_plan",
+        "message": "🗺️ Creating your itinerary...",
+        "visible": True
+    }
+]
@@ -0,0 +1,197 @@
+"""Parallel itinerary generation: a compact skeleton first, then every day's details concurrently."""
+
+import os
+import re
+import queue
+import contextvars
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from backend.utils import get_openai_client, get_runtime_context
+from backend.cancellation import CancellationToken, iter_stream
+from backend.structured_output import bullet_items
+from backend.usage import STREAM_OPTIONS, track_usage
+
+# Typical sizes in tokens (used to estimate savings on cancellation)
+SKELETON_EXPECTED_TOKENS = 300
+DAY_EXPECTED_TOKENS = 150
+
+# Trips longer than this are planned in one stream (the skeleton itself would get too long)
+MAX_PARALLEL_DAYS = 30
+
+# Default number of day details generated at the same time
+DEFAULT_MAX_CONCURRENCY = 6
+
+# "Day 3 | Old town and markets | Alfama, Baixa"
+SKELETON_LINE = re.compile(r"^\W*day\s+(\d+)\W*\|\s*(.+?)\s*\|\s*(.*)$", re.IGNORECASE)
+
+# How long the consumer waits on a day before re-checking cancellation
+POLL_SECONDS = 0.5
+
+_DONE = object()
+
+
+def _load_prompt(name: str) -> str:
+    prompt_path = os.path.join(os.path.dirname(__file__), '..', '..', 'prompts', name)
+    with open(prompt_path, 'r', encoding='utf-8') as f:
+        return f.read().strip()
+
+
+def parse_skeleton(text: str, num_days: int):
+    """
+    Parse the skeleton response.
+
+    Returns:
+        tuple: (summary, list of {"day", "theme", "areas"}), or None unless every day is present
+    """
+    summary = ""
+    days = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if line.upper().startswith("SUMMARY:"):
+            summary = line[len("SUMMARY:"):].strip()
+            continue
+        match = SKELETON_LINE.match(line)
+        if match and 1 <= int(match.group(1)) <= num_days:
+            days[int(match.group(1))] = {"day": int(match.group(1)), "theme": match.group(2), "areas": match.group(3)}
+    if len(days) != num_days:
+        return None
+    return summary, [days[n] for n in range(1, num_days + 1)]
+
+
+def _bullets_per_day(num_days: int) -> str:
+    """Detail level per day, matching the sequential planner's rules for trip length."""
+    return "3–5 short bullets" if num_days <= 10 else "2–3 short bullets"
+
+
+def _day_label(day: dict, start_date: str = None) -> str:
+    label = f"Day {day['day']}"
+    if start_date:
+        date = datetime.strptime(start_date, "%Y-%m-%d").date() + timedelta(days=day["day"] - 1)
+        label += f" ({date.strftime('%a %d %b')})"
+    return label
+
+
+def _stream_day(client, system_prompt: str, runtime_context: str, prompt_prefix: str, day: dict,
+                num_days: int, output: queue.Queue, cancel_token: CancellationToken) -> None:
+    """Generate one day's bullets, pushing chunks onto `output` and a final _DONE marker."""
+    try:
+        if cancel_token.cancelled:
+            return
+        areas = f" ({day['areas']})" if day["areas"] else ""
+        stream = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": runtime_context},
+                # Shared trip context + outline first, the day-specific request last
+                {"role": "user", "content": f"{prompt_prefix}\n\nWrite Day {day['day']}: {day['theme']}{areas}. Use {_bullets_per_day(num_days)}."}
+            ],
+            temperature=0.7,
+            stream=True,
+            stream_options=STREAM_OPTIONS
+        )
+        for chunk in track_usage(iter_stream(stream, cancel_token, expected_tokens=DAY_EXPECTED_TOKENS), "trip_plan_day"):
+            if chunk.choices[0].delta.content:
+                output.put(chunk.choices[0].delta.content)
+    except Exception as e:
+        print(f"Trip planner error on day {day['day']}: {e}")
+        output.put(f"- Explore {day['areas'] or 'the area'} at your own pace\n")
+    finally:
+        output.put(_DONE)
+
+
+def generate_parallel_plan(trip_context: str, num_days: int, start_date: str = None,
+                           max_concurrency: int = DEFAULT_MAX_CONCURRENCY, cancel_token: CancellationToken = None):
+    """
+    Stream an itinerary whose days are generated concurrently.
+
+    A compact skeleton (theme and areas per day) is generated first; then up to
+    `max_concurrency` days are written at once and streamed in day order, each
+    as soon as the days before it have been shown.
+
+    Args:
+        trip_context: Trip details (destination, duration, budget...) as sent to the planner
+        num_days: Number of days in the trip
+        start_date: First day in YYYY-MM-DD format, to label days with dates (optional)
+        max_concurrency: Upper bound on day generations in flight
+        cancel_token: Cancellation token for the current turn (optional)
+
+    Yields:
+        Chunks of the itinerary
+
+    Returns:
+        dict: The plan as {"summary", "days": [{"label", "title", "activities"}]} (partial if
+        cancelled), or None if the skeleton couldn't be produced and nothing was yielded
+    """
+    if cancel_token is None:
+        cancel_token = CancellationToken()
+
+    client = get_openai_client()
+    runtime_context = get_runtime_context()
+
+    stream = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": _load_prompt('trip_planner_skeleton.md')},
+            {"role": "system", "content": runtime_context},
+            {"role": "user", "content": f"{trip_context}\nNumber of days: {num_days}"}
+        ],
+        temperature=0.7,
+        stream=True,
+        stream_options=STREAM_OPTIONS
+    )
+    skeleton_text = "".join(
+        chunk.choices[0].delta.content or ""
+        for chunk in track_usage(iter_stream(stream, cancel_token, expected_tokens=SKELETON_EXPECTED_TOKENS), "trip_plan_skeleton")
+    )
+    if cancel_token.cancelled:
+        return {"summary": "", "days": []}
+    skeleton = parse_skeleton(skeleton_text, num_days)
+    if skeleton is None:
+        print("Trip planner: skeleton incomplete, falling back to a single stream")
+        return None
+    summary, days = skeleton
+    plan = {"summary": summary, "days": []}
+
+    if summary:
+        yield summary + "\n"
+
+    system_prompt = _load_prompt('trip_planner_day.md')
+    outline = "\n".join(f"Day {day['day']}: {day['theme']} ({day['areas']})" for day in days)
+    prompt_prefix = f"{trip_context}\n\nTrip outline:\n{outline}"
+    outputs = [queue.Queue() for _ in days]
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, num_days)), thread_name_prefix="trip-day")
+    completed = False
+    try:
+        # Submitted in day order, so the day being shown is always generated first
+        for day, output in zip(days, outputs):
+            # Run in a copy of this context so the day's usage counts towards the turn
+            executor.submit(contextvars.copy_context().run, _stream_day, client, system_prompt, runtime_context,
+                            prompt_prefix, day, num_days, output, cancel_token)
+
+        for day, output in zip(days, outputs):
+            label = _day_label(day, start_date)
+            yield f"\n**{label}: {day['theme']}**\n"
+            day_text = ""
+            while True:
+                try:
+                    chunk = output.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    if cancel_token.cancelled:
+                        return plan
+                    continue
+                if chunk is _DONE:
+                    break
+                day_text += chunk
+                yield chunk
+            if not day_text.endswith("\n"):
+                yield "\n"
+            plan["days"].append({"label": label, "title": day["theme"], "activities": bullet_items(day_text)})
+        completed = True
+    finally:
+        if not completed:
+            # Closes every day stream still in flight
+            cancel_token.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+    return plan
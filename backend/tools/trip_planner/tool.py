@@ -1,57 +1,95 @@
 """Trip planner tool for generating day-by-day itineraries."""
 
 import os
-from backend.utils import get_openai_client, get_runtime_context
+from datetime import datetime
+from backend.utils import get_openai_client, get_runtime_context, get_setting
+from backend.cancellation import iter_stream
+from backend.usage import STREAM_OPTIONS, track_usage
+from backend.digests import fit_levels
+from backend.structured_output import STRUCTURED_INSTRUCTIONS, render_document, response_format, stream_structured, use_structured_output
+from backend.tools.trip_planner.parallel import DEFAULT_MAX_CONCURRENCY, MAX_PARALLEL_DAYS, generate_parallel_plan
 
-# Tool definition for OpenAI function calling
-TOOL_DEFINITION = {
-    "type": "function",
-    "function": {
-        "name": "generate_trip_plan",
-        "description": "Generate a day-by-day itinerary for a trip. Requires destination AND either duration_days OR date_range (at least one must be provided).",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "destination": {
-                    "type": "string",
-                    "description": "The destination (city, country, or region)"
-                },
-                "duration_days": {
-                    "type": "integer",
-                    "description": "Trip duration in days. Provide this OR date_range."
-                },
-                "date_range": {
-                    "type": "string",
-                    "description": "Date range in format 'YYYY-MM-DD to YYYY-MM-DD'. Provide this OR duration_days."
-                },
-                "travelers_count": {
-                    "type": "integer",
-                    "description": "Number of travelers (optional)"
-                },
-                "budget_level": {
-                    "type": "string",
-                    "description": "Budget level: budget, mid, or luxury (optional)",
-                    "enum": ["budget", "mid", "luxury"]
-                },
-                "trip_style": {
-                    "type": "string",
-                    "description": "Trip style: relaxed, balanced, or intense (optional)"
-                },
-                "interests": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "List of interests or activities (e.g., culture, food, nature, adventure) (optional)"
+# Typical itinerary length in tokens (used to estimate savings on cancellation)
+EXPECTED_TOKENS = 1200
+
+# Trips at least this long are planned skeleton-first with days generated in parallel
+DEFAULT_PARALLEL_MIN_DAYS = 5
+
+# Structured output: "label" is "Day 3" or, for summarized stretches of long trips, "Days 4–8"
+TRIP_PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "days": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "label": {"type": "string"},
+                    "title": {"type": "string"},
+                    "activities": {"type": "array", "items": {"type": "string"}}
                 },
-                "constraints": {
-                    "type": "string",
-                    "description": "Any special constraints or requirements (e.g., accessibility needs, dietary restrictions) (optional)"
-                }
-            },
-            "required": ["destination"]
+                "required": ["label", "title", "activities"],
+                "additionalProperties": False
+            }
         }
-    }
+    },
+    "required": ["summary", "days"],
+    "additionalProperties": False
 }
 
+def render_plan_value(path: tuple, value) -> str:
+    """Markdown for one completed value of a structured trip plan (fields arrive in schema order)."""
+    if path == ("summary",):
+        return f"{value}\n" if value else None
+    if len(path) == 3 and path[0] == "days":
+        if path[2] == "label":
+            return f"\n**{value}"
+        if path[2] == "title":
+            return f": {value}**\n"
+    if len(path) == 4 and path[0] == "days" and path[2] == "activities":
+        return f"- {value}\n"
+    return None
+
+
+def render_trip_plan(plan: dict) -> str:
+    """Markdown for a whole trip plan, as it was streamed (used to show stored plans)."""
+    return render_document(plan, render_plan_value)
+
+
+def digest_trip_plan(plan: dict, max_tokens: int) -> str:
+    """Model-facing digest of a trip plan: every day's title, plus as many activities per day as fit."""
+    days = plan.get("days", [])
+    
+    def render(per_day):
+        lines = [plan.get("summary", "")]
+        for day in days:
+            activities = "; ".join(day["activities"][:per_day])
+            lines.append(f"{day['label']}: {day['title']}" + (f" — {activities}" if activities else ""))
+        return "\n".join(line for line in lines if line)
+    
+    most = max((len(day["activities"]) for day in days), default=0)
+    return fit_levels(render, range(most, -1, -1), max_tokens)
+
+
+def _trip_days(duration_days: int = None, date_range: str = None):
+    """
+    Number of days and first date of a trip.
+    
+    Returns:
+        tuple: (number of days or None, start date in YYYY-MM-DD format or None)
+    """
+    if date_range:
+        parts = [part.strip() for part in date_range.split(" to ")]
+        try:
+            start = datetime.strptime(parts[0], "%Y-%m-%d").date()
+            end = datetime.strptime(parts[-1], "%Y-%m-%d").date()
+            if end >= start:
+                return (end - start).days + 1, start.isoformat()
+        except ValueError:
+            pass
+    return duration_days, None
+
 
 def generate_trip_plan(
     destination: str,
@@ -61,7 +99,8 @@ def generate_trip_plan(
     budget_level: str = None,
     trip_style: str = None,
     interests: list = None,
-    constraints: str = None
+    constraints: str = None,
+    cancel_token=None
 ):
     """
     Generate a day-by-day itinerary using LLM based on trip details.
@@ -76,15 +115,14 @@ def generate_trip_plan(
         trip_style: Trip style/pace (optional)
         interests: List of interests (optional)
         constraints: Special requirements (optional)
+        cancel_token: Cancellation token for the current turn (optional)
     
     Yields:
         Chunks of the generated itinerary
-    """
-    # Load prompt from markdown file
-    prompt_path = os.path.join(os.path.dirname(__file__), '..', '..', 'prompts', 'trip_planner.md')
-    with open(prompt_path, 'r', encoding='utf-8') as f:
-        system_prompt = f.read().strip()
     
+    Returns:
+        dict with "summary" and "days" when the plan is structured, otherwise None
+    """
     # Build user message with trip context
     context_parts = [f"Destination: {destination}"]
     
@@ -108,20 +146,54 @@ def generate_trip_plan(
     
     user_message = "\n".join(context_parts)
     
-    # Call LLM with streaming (inject runtime context)
+    # Long trips: skeleton first, then days concurrently (falls through if the skeleton is unusable)
+    num_days, start_date = _trip_days(duration_days, date_range)
+    if get_setting("TRIP_PLANNER_PARALLEL_ENABLED", True) and num_days \
+            and get_setting("TRIP_PLANNER_PARALLEL_MIN_DAYS", DEFAULT_PARALLEL_MIN_DAYS) <= num_days <= MAX_PARALLEL_DAYS:
+        plan = yield from generate_parallel_plan(
+            user_message,
+            num_days,
+            start_date,
+            max_concurrency=get_setting("TRIP_PLANNER_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY),
+            cancel_token=cancel_token
+        )
+        if plan is not None:
+            return plan
+    
+    # Load prompt from markdown file
+    prompt_path = os.path.join(os.path.dirname(__file__), '..', '..', 'prompts', 'trip_planner.md')
+    with open(prompt_path, 'r', encoding='utf-8') as f:
+        system_prompt = f.read().strip()
+    
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": get_runtime_context()},
+        {"role": "user", "content": user_message}
+    ]
     client = get_openai_client()
+    
+    # Structured mode: JSON days rendered to markdown as each activity completes
+    if use_structured_output():
+        stream = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages + [{"role": "system", "content": STRUCTURED_INSTRUCTIONS}],
+            temperature=0.7,
+            response_format=response_format("trip_plan", TRIP_PLAN_SCHEMA),
+            stream=True,
+            stream_options=STREAM_OPTIONS
+        )
+        return (yield from stream_structured(stream, render_plan_value, "generate_trip_plan", cancel_token, EXPECTED_TOKENS))
+    
+    # Call LLM with streaming (inject runtime context)
     stream = client.chat.completions.create(
         model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "system", "content": get_runtime_context()},
-            {"role": "user", "content": user_message}
-        ],
+        messages=messages,
         temperature=0.7,
-        stream=True
+        stream=True,
+        stream_options=STREAM_OPTIONS
     )
     
-    # Yield chunks as they come
-    for chunk in stream:
+    # Yield chunks as they come (closes the stream if the turn is cancelled)
+    for chunk in track_usage(iter_stream(stream, cancel_token, expected_tokens=EXPECTED_TOKENS), "generate_trip_plan"):
         if chunk.choices[0].delta.content:
             yield chunk.choices[0].delta.content
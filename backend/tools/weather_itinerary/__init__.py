@@ -1,5 +1,16 @@
 """Weather forecast fetcher tool."""
 
-from .tool import TOOL_DEFINITION, get_weather_forecast
+from .manifest import TOOL_DEFINITION, MULTI_CITY_TOOL_DEFINITION as BATCH_TOOL_DEFINITION
 
-__all__ = ["TOOL_DEFINITION", "get_weather_forecast"]
+__all__ = ["TOOL_DEFINITION", "get_weather_forecast", "BATCH_TOOL_DEFINITION", "get_multi_city_weather_forecast"]
+
+
+def __getattr__(name):
+    # The implementations are only imported when first used
+    if name == "get_weather_forecast":
+        from .tool import get_weather_forecast
+        return get_weather_forecast
+    if name == "get_multi_city_weather_forecast":
+        from .batch import get_multi_city_weather_forecast
+        return get_multi_city_weather_forecast
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
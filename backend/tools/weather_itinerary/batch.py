@@ -0,0 +1,228 @@
+"""Multi-destination weather forecast: one tool call and one upstream request for a whole trip."""
+
+import os
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from backend.utils import get_openai_client, get_runtime_context, get_setting
+from backend.cancellation import iter_stream
+from backend.usage import STREAM_OPTIONS, track_usage
+from backend.tools.http_client import Deadline
+from backend.tools.weather_itinerary.forecast_cache import get_forecast_cache
+from backend.digests import digest_text
+from backend.tools.weather_itinerary.tool import (
+    DEFAULT_DEADLINE_SECONDS,
+    EXPECTED_TOKENS,
+    digest_forecast,
+    forecast_result,
+    geocode_location,
+    _build_forecast,
+    _check_date_range,
+    _fetch_forecast_windows,
+    _format_unavailable_message,
+    _normalize_inputs,
+    _record_demand,
+    format_weather_summary,
+    typical_conditions_report,
+    use_local_formatter
+)
+from backend.tools.weather_itinerary.renderer import render_weather_report
+
+# Upper bound on destinations per call and on concurrent geocoding lookups
+MAX_DESTINATIONS = 10
+MAX_GEOCODE_WORKERS = 5
+
+def geocode_locations(locations: list, deadline: Deadline = None) -> list:
+    """
+    Geocode several locations concurrently (cached places resolve instantly).
+
+    Returns:
+        List of geocode results (or None for unknown places), in input order
+    """
+    if not locations:
+        return []
+    workers = min(MAX_GEOCODE_WORKERS, len(locations))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda location: geocode_location(location, deadline), locations))
+
+
+def fetch_weather_forecasts(requests_list: list, units: str = "C", deadline: Deadline = None) -> list:
+    """
+    Fetch forecasts for several places with at most one upstream request.
+
+    Places already in the forecast cache are served from it; the rest are
+    fetched together using Open-Meteo's comma-separated coordinate lists.
+
+    Args:
+        requests_list: List of dicts with "lat", "lon", "start" and "end"
+        units: Temperature units ("C" or "F")
+        deadline: Overall network budget for the calling tool (optional)
+
+    Returns:
+        List of forecast dictionaries (or None on failure), in input order
+    """
+    forecast_cache = get_forecast_cache()
+    windows = [None] * len(requests_list)
+    missing = {}  # (lat, lon) -> indexes waiting for it
+
+    for i, item in enumerate(requests_list):
+        if forecast_cache:
+            windows[i] = forecast_cache.get(item["lat"], item["lon"], units)
+        if windows[i] is None:
+            missing.setdefault((item["lat"], item["lon"]), []).append(i)
+
+    if missing:
+        coordinates = list(missing)
+        try:
+            fetched = _fetch_forecast_windows(coordinates, units, deadline)
+        except requests.exceptions.RequestException as e:
+            print(f"Weather API request error: {e}")
+            fetched = None
+
+        if fetched and len(fetched) == len(coordinates):
+            for (lat, lon), window in zip(coordinates, fetched):
+                if forecast_cache:
+                    forecast_cache.put(lat, lon, units, window)
+                for i in missing[(lat, lon)]:
+                    windows[i] = window
+
+    forecasts = []
+    for item, window in zip(requests_list, windows):
+        forecasts.append(_build_forecast(window, item["start"], item["end"], units) if window else None)
+    return forecasts
+
+
+def digest_multi_city_forecast(result: dict, max_tokens: int) -> str:
+    """Model-facing digest of a multi-city forecast, splitting the budget evenly between destinations."""
+    parts = len(result["forecasts"]) + len(result["notes"])
+    if not parts:
+        return ""
+    share = max(1, max_tokens // parts)
+    digests = [digest_forecast(forecast, share) for forecast in result["forecasts"]]
+    digests += [digest_text(note, share) for note in result["notes"]]
+    return "\n\n".join(digests)
+
+
+def _normalize_destination(destination) -> dict:
+    """Normalize one destination like the single-city tool's arguments."""
+    if not isinstance(destination, dict):
+        destination = {}
+    location, date_range, _ = _normalize_inputs(destination.get("location"), destination.get("date_range"), None)
+    return {"location": location, "date_range": date_range}
+
+
+def get_multi_city_weather_forecast(destinations: list, units: str = "C", cancel_token=None):
+    """
+    Fetch and summarize weather forecasts for several destinations in one go.
+
+    Args:
+        destinations: List of dicts with 'location' and 'date_range' ({'start', 'end'})
+        units: Temperature units (C or F, default C)
+        cancel_token: Cancellation token for the current turn (optional)
+
+    Yields:
+        Chunks of the combined weather forecast summary
+
+    Returns:
+        dict: {"forecasts": [forecast_result...], "notes": [typical reports and errors]}
+    """
+    destinations = destinations if isinstance(destinations, list) else []
+    if len(destinations) > MAX_DESTINATIONS:
+        yield f"\n📅 **Note**: Showing weather for the first {MAX_DESTINATIONS} destinations only.\n\n"
+        destinations = destinations[:MAX_DESTINATIONS]
+
+    # Validate locally so invalid destinations never cost a network call
+    destinations = [_normalize_destination(d) for d in destinations]
+    units = _normalize_inputs(None, None, units)[2]
+    errors = []
+    for d in destinations:
+        error = _check_date_range(d["date_range"]["start"], d["date_range"]["end"])
+        errors.append("location_not_found" if not d["location"] else error)
+
+    if cancel_token is not None and cancel_token.cancelled:
+        return
+    deadline = Deadline(get_setting("WEATHER_TOOL_DEADLINE_SECONDS", DEFAULT_DEADLINE_SECONDS))
+    # Far-future destinations are geocoded too, for a climate-normals answer
+    valid_indexes = [i for i, error in enumerate(errors) if error in (None, "too_far_future")]
+    places = geocode_locations([destinations[i]["location"] for i in valid_indexes], deadline)
+
+    typical_reports = []
+    requests_list = []
+    for i, place in zip(valid_indexes, places):
+        if place is None:
+            errors[i] = "location_not_found"
+        elif errors[i] == "too_far_future":
+            typical_report = typical_conditions_report(place, destinations[i]["date_range"], units)
+            if typical_report:
+                typical_reports.append(typical_report)
+                errors[i] = None
+        else:
+            date_range = destinations[i]["date_range"]
+            _record_demand(destinations[i]["location"], units, place)
+            requests_list.append({"index": i, "place": place, "lat": place["lat"], "lon": place["lon"],
+                                  "start": date_range["start"], "end": date_range["end"]})
+
+    if cancel_token is not None and cancel_token.cancelled:
+        return
+    forecasts = fetch_weather_forecasts(requests_list, units, deadline)
+
+    local_formatter = use_local_formatter()
+    blocks = []
+    result = {"forecasts": [], "notes": list(typical_reports)}
+    for item, forecast_data in zip(requests_list, forecasts):
+        if not forecast_data:
+            errors[item["index"]] = "api_error"
+            continue
+        result["forecasts"].append(forecast_result(item["place"], forecast_data))
+        if local_formatter:
+            blocks.append(render_weather_report(item['place']['formatted'], forecast_data))
+            continue
+        blocks.append(f"""Location: {item['place']['formatted']}
+Date Range: {item['start']} to {item['end']}
+
+Weather Data:
+{format_weather_summary(forecast_data)}""")
+
+    for destination, error in zip(destinations, errors):
+        if error:
+            message = _format_unavailable_message(error, destination["location"], destination["date_range"])
+            result["notes"].append(message)
+            yield message
+
+    for typical_report in typical_reports:
+        yield typical_report + "\n"
+
+    if not blocks:
+        return result
+
+    # Rendered locally: no LLM round at all
+    if local_formatter:
+        yield "\n".join(blocks)
+        return result
+
+    # One formatting call for the whole trip
+    if cancel_token is not None and cancel_token.cancelled:
+        return
+
+    # Load prompt from markdown file
+    prompt_path = os.path.join(os.path.dirname(__file__), '..', '..', 'prompts', 'weather_itinerary.md')
+    with open(prompt_path, 'r', encoding='utf-8') as f:
+        system_prompt = f.read().strip()
+
+    client = get_openai_client()
+    stream = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": get_runtime_context()},
+            {"role": "user", "content": "\n\n---\n\n".join(blocks)}
+        ],
+        temperature=0.3,  # Lower temperature for consistent formatting
+        stream=True,
+        stream_options=STREAM_OPTIONS
+    )
+
+    # Yield chunks as they come (closes the stream if the turn is cancelled)
+    for chunk in track_usage(iter_stream(stream, cancel_token, expected_tokens=EXPECTED_TOKENS * len(blocks)), "get_multi_city_weather_forecast"):
+        if chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+    return result
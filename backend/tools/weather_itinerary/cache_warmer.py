@@ -0,0 +1,238 @@
+"""Background warmer that keeps the most requested destinations' forecasts in cache."""
+
+import time
+import threading
+from backend.utils import get_setting
+from backend.tools.http_client import Deadline
+from backend.tools.weather_itinerary.geocode_cache import get_geocode_cache, normalize_location
+from backend.tools.weather_itinerary.forecast_cache import get_forecast_cache
+
+# How many of the most requested destinations are kept warm
+DEFAULT_TOP_K = 30
+
+# Seconds between warming cycles
+DEFAULT_INTERVAL_SECONDS = 300
+
+# Forecasts expiring before the next cycle plus this margin are refreshed ahead of time,
+# so popular destinations never go cold at a model update boundary
+REFRESH_MARGIN_SECONDS = 120
+
+# Upstream requests (geocoding + forecast) the warmer may make per minute
+DEFAULT_MAX_REQUESTS_PER_MINUTE = 10
+
+# Places per forecast request (Open-Meteo accepts comma-separated coordinate lists)
+BATCH_SIZE = 10
+
+# Request counts are multiplied by this every cycle so yesterday's peak fades out
+DECAY = 0.95
+
+# Upper bound on tracked destinations; the least requested are dropped first
+MAX_TRACKED = 1000
+
+# Network budget for one warming request
+REQUEST_DEADLINE_SECONDS = 15
+
+
+class RateBudget:
+    """Token bucket allowing `per_minute` upstream requests, refilled continuously."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(1, per_minute)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class CacheWarmer:
+    """
+    Tracks how often each destination is requested and, on a schedule,
+    refreshes geocode and forecast cache entries for the top-K of them.
+    """
+
+    def __init__(self, top_k: int = DEFAULT_TOP_K, interval_seconds: int = DEFAULT_INTERVAL_SECONDS,
+                 max_requests_per_minute: int = DEFAULT_MAX_REQUESTS_PER_MINUTE):
+        self.top_k = top_k
+        self.interval_seconds = interval_seconds
+        self.budget = RateBudget(max_requests_per_minute)
+        self._destinations = {}  # (normalized location, units) -> {"location", "units", "count", "place"}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {
+            "requests": 0,
+            "warm_hits": 0,
+            "cold_misses": 0,
+            "cycles": 0,
+            "geocodes_refreshed": 0,
+            "forecasts_refreshed": 0,
+            "upstream_requests": 0,
+            "skipped_for_budget": 0
+        }
+
+    def record(self, location: str, units: str, place: dict = None, warm: bool = None) -> None:
+        """
+        Count one request for a destination.
+
+        Args:
+            location: Location as the user gave it
+            units: Temperature units ("C" or "F")
+            place: Geocode result, if already resolved
+            warm: Whether the forecast was already cached (None if unknown)
+        """
+        key = (normalize_location(location), units)
+        if not key[0]:
+            return
+        with self._lock:
+            entry = self._destinations.get(key)
+            if entry is None:
+                if len(self._destinations) >= MAX_TRACKED:
+                    del self._destinations[min(self._destinations, key=lambda k: self._destinations[k]["count"])]
+                entry = self._destinations[key] = {"location": location, "units": units, "count": 0.0, "place": None}
+            entry["count"] += 1
+            if place:
+                entry["place"] = place
+            self.stats["requests"] += 1
+            if warm is True:
+                self.stats["warm_hits"] += 1
+            elif warm is False:
+                self.stats["cold_misses"] += 1
+
+    def top_destinations(self) -> list:
+        """The top-K destinations by (decayed) request count, most requested first."""
+        with self._lock:
+            ranked = sorted(self._destinations.values(), key=lambda entry: entry["count"], reverse=True)
+            return [dict(entry) for entry in ranked[:self.top_k]]
+
+    def warm(self) -> None:
+        """
+        Run one warming cycle: geocode unresolved top destinations, then fetch
+        forecasts that are missing or expire before the next cycle, in batches.
+        """
+        # Imported here: tool.py records demand through this module
+        from backend.tools.weather_itinerary.tool import geocode_location, _fetch_forecast_windows
+
+        forecast_cache = get_forecast_cache()
+        geocode_cache = get_geocode_cache()
+        stale = {}  # units -> [(lat, lon)]
+        lookahead = self.interval_seconds + REFRESH_MARGIN_SECONDS
+
+        for entry in self.top_destinations():
+            place = entry["place"] or (geocode_cache.lookup(entry["location"]) if geocode_cache else None)
+            if place is None:
+                if not self._acquire():
+                    break
+                place = geocode_location(entry["location"], Deadline(REQUEST_DEADLINE_SECONDS))
+                if place is None:
+                    continue
+                self._count("geocodes_refreshed")
+            self._remember_place(entry, place)
+
+            if forecast_cache and not forecast_cache.contains(place["lat"], place["lon"], entry["units"], lookahead):
+                coordinates = stale.setdefault(entry["units"], [])
+                if (place["lat"], place["lon"]) not in coordinates:
+                    coordinates.append((place["lat"], place["lon"]))
+
+        for units, coordinates in stale.items():
+            for i in range(0, len(coordinates), BATCH_SIZE):
+                batch = coordinates[i:i + BATCH_SIZE]
+                if not self._acquire():
+                    return
+                try:
+                    windows = _fetch_forecast_windows(batch, units, Deadline(REQUEST_DEADLINE_SECONDS))
+                except Exception as e:
+                    print(f"Cache warmer forecast error: {e}")
+                    continue
+                if not windows or len(windows) != len(batch):
+                    continue
+                for (lat, lon), window in zip(batch, windows):
+                    forecast_cache.put(lat, lon, units, window, ahead_seconds=lookahead)
+                self._count("forecasts_refreshed", len(batch))
+
+    def _acquire(self) -> bool:
+        if self.budget.try_acquire():
+            self._count("upstream_requests")
+            return True
+        self._count("skipped_for_budget")
+        return False
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += amount
+
+    def _remember_place(self, entry: dict, place: dict) -> None:
+        with self._lock:
+            tracked = self._destinations.get((normalize_location(entry["location"]), entry["units"]))
+            if tracked is not None:
+                tracked["place"] = place
+
+    def _decay(self) -> None:
+        with self._lock:
+            for entry in self._destinations.values():
+                entry["count"] *= DECAY
+
+    def start(self) -> None:
+        """Start the background warming thread (once per process)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="forecast-cache-warmer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval_seconds)
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"Cache warmer error: {e}")
+            self._decay()
+            self._count("cycles")
+
+    def get_stats(self) -> dict:
+        """
+        Snapshot of warmer counters.
+
+        Returns:
+            dict: Request hit/miss counts, hit rate, refresh counters and the current top destinations
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        measured = stats["warm_hits"] + stats["cold_misses"]
+        stats["hit_rate"] = round(stats["warm_hits"] / measured, 3) if measured else None
+        stats["top_destinations"] = [
+            {"location": entry["location"], "units": entry["units"], "count": round(entry["count"], 1)}
+            for entry in self.top_destinations()
+        ]
+        return stats
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def get_cache_warmer():
+    """
+    Get the process-wide cache warmer, starting its background thread on first use.
+
+    Returns:
+        CacheWarmer, or None when CACHE_WARMER_ENABLED is turned off
+    """
+    global _warmer
+    if not get_setting("CACHE_WARMER_ENABLED", False):
+        return None
+    with _warmer_lock:
+        if _warmer is None:
+            _warmer = CacheWarmer(
+                top_k=get_setting("CACHE_WARMER_TOP_K", DEFAULT_TOP_K),
+                interval_seconds=get_setting("CACHE_WARMER_INTERVAL_SECONDS", DEFAULT_INTERVAL_SECONDS),
+                max_requests_per_minute=get_setting("CACHE_WARMER_MAX_REQUESTS_PER_MINUTE", DEFAULT_MAX_REQUESTS_PER_MINUTE)
+            )
+            _warmer.start()
+    return _warmer
@@ -0,0 +1,190 @@
+"""Offline monthly climate normals for dates beyond the forecast horizon."""
+
+import csv
+import json
+import math
+import threading
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from backend.utils import get_setting
+
+NORMALS_CSV_PATH = Path(__file__).parent / 'data' / 'climate_normals.csv'
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent.parent / 'assets' / 'cache'
+
+VARIABLES = ["temp_max", "temp_min", "precipitation"]
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+# Spatial index cell size; neighbouring cells cover any point within MAX_DISTANCE_KM
+GRID_DEGREES = 5
+
+# Beyond this distance a city's normals are no longer representative
+MAX_DISTANCE_KM = 150
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def build_normals_arrays(cache_dir=DEFAULT_CACHE_DIR) -> Path:
+    """
+    Compile the bundled normals CSV into a float32 (places x 12 months x variables)
+    .npy file plus a small JSON index, rebuilding only when the CSV is newer.
+
+    Returns:
+        Path: The .npy file with the normals
+    """
+    cache_dir = Path(cache_dir)
+    values_path = cache_dir / 'climate_normals.npy'
+    index_path = cache_dir / 'climate_normals.json'
+    if values_path.exists() and index_path.exists() \
+            and values_path.stat().st_mtime >= NORMALS_CSV_PATH.stat().st_mtime:
+        return values_path
+
+    places = {}
+    with open(NORMALS_CSV_PATH, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            place = places.setdefault(row["name"], {
+                "name": row["name"],
+                "country": row["country"],
+                "lat": float(row["latitude"]),
+                "lon": float(row["longitude"]),
+                "values": np.full((12, len(VARIABLES)), np.nan, dtype=np.float32)
+            })
+            place["values"][:, VARIABLES.index(row["variable"])] = [float(row[m]) for m in MONTHS]
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    ordered = list(places.values())
+    np.save(values_path, np.stack([p["values"] for p in ordered]))
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump([{k: p[k] for k in ("name", "country", "lat", "lon")} for p in ordered], f)
+    return values_path
+
+
+class ClimatologyTable:
+    """
+    Memory-mapped monthly normals with a lat/lon grid index for nearest-place lookup.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        values_path = build_normals_arrays(cache_dir)
+        self.values = np.load(values_path, mmap_mode='r')
+        with open(Path(cache_dir) / 'climate_normals.json', 'r', encoding='utf-8') as f:
+            self.places = json.load(f)
+        self.coords = np.radians(np.array([[p["lat"], p["lon"]] for p in self.places], dtype=np.float64))
+
+        self._grid = {}
+        for i, place in enumerate(self.places):
+            self._grid.setdefault(self._cell(place["lat"], place["lon"]), []).append(i)
+
+    @staticmethod
+    def _cell(lat: float, lon: float) -> tuple:
+        return (math.floor(lat / GRID_DEGREES), math.floor(lon / GRID_DEGREES))
+
+    def nearest(self, lat: float, lon: float):
+        """
+        Find the closest place with normals within MAX_DISTANCE_KM.
+
+        Returns:
+            tuple: (place index, distance in km), or None if nothing is close enough
+        """
+        row, col = self._cell(lat, lon)
+        n_cols = 360 // GRID_DEGREES
+        candidates = [
+            i
+            for d_row in (-1, 0, 1)
+            for d_col in (-1, 0, 1)
+            # Wrap longitude cells around the antimeridian
+            for i in self._grid.get((row + d_row, (col + d_col + n_cols // 2) % n_cols - n_cols // 2), [])
+        ]
+        if not candidates:
+            return None
+
+        # Haversine distance to every candidate at once
+        lat_r, lon_r = math.radians(lat), math.radians(lon)
+        points = self.coords[candidates]
+        a = np.sin((points[:, 0] - lat_r) / 2) ** 2 \
+            + math.cos(lat_r) * np.cos(points[:, 0]) * np.sin((points[:, 1] - lon_r) / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+        best = int(distances.argmin())
+        if distances[best] > MAX_DISTANCE_KM:
+            return None
+        return candidates[best], float(distances[best])
+
+    def typical_conditions(self, lat: float, lon: float, start_date: str, end_date: str, units: str = "C"):
+        """
+        Monthly normals for every month touched by a date range.
+
+        Returns:
+            dict with "place", "distance_km" and per-month "months", or None if no normals are nearby
+        """
+        match = self.nearest(lat, lon)
+        if match is None:
+            return None
+        index, distance_km = match
+
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        month_numbers = []
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month) and len(month_numbers) < 12:
+            month_numbers.append(month)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+        months = []
+        for month in month_numbers:
+            temp_max, temp_min, precipitation = (float(v) for v in self.values[index, month - 1])
+            if units == "F":
+                temp_max, temp_min = temp_max * 9 / 5 + 32, temp_min * 9 / 5 + 32
+            months.append({
+                "month": datetime(2000, month, 1).strftime("%B"),
+                "temp_max": round(temp_max),
+                "temp_min": round(temp_min),
+                "precipitation": round(precipitation)
+            })
+
+        return {"place": self.places[index], "distance_km": round(distance_km), "months": months}
+
+
+def render_typical_conditions(location: str, date_range: dict, normals: dict, units: str = "C") -> str:
+    """Markdown summary of typical conditions, clearly labelled as averages rather than a forecast."""
+    units_symbol = "°F" if units == "F" else "°C"
+    source = normals["place"]["name"]
+    if normals["distance_km"] > 25:
+        source += f" (~{normals['distance_km']} km away)"
+
+    lines = [
+        f"**Typical weather: {location} ({date_range['start']} → {date_range['end']})**",
+        "",
+        f"These dates are more than 14 days away, so this is based on long-term monthly averages for {source}, not a forecast.",
+        ""
+    ]
+    for month in normals["months"]:
+        lines.append(
+            f"- {month['month']}: {month['temp_min']}–{month['temp_max']}{units_symbol}, "
+            f"~{month['precipitation']} mm rain in the month"
+        )
+    return "\n".join(lines) + "\n"
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_climatology():
+    """
+    Get the process-wide climatology table.
+
+    Returns:
+        ClimatologyTable, or None when CLIMATOLOGY_ENABLED is turned off or the data can't be loaded
+    """
+    global _table
+    if not get_setting("CLIMATOLOGY_ENABLED", True):
+        return None
+    with _table_lock:
+        if _table is None:
+            try:
+                _table = ClimatologyTable()
+            except (OSError, ValueError) as e:
+                print(f"Climatology data unavailable: {e}")
+                return None
+    return _table
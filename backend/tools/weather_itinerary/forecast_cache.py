@@ -0,0 +1,155 @@
+"""TTL cache of full forecast windows, shared by every date range requested for a place."""
+
+import time
+import threading
+from backend.utils import get_setting
+
+# Coordinates are rounded to ~1 km so nearby geocodes of the same city share an entry
+COORD_PRECISION = 2
+
+# Global models behind Open-Meteo are re-run every few hours (GFS/ECMWF every 6 h);
+# entries expire at the next run boundary (UTC) so we never serve a superseded run for long
+DEFAULT_UPDATE_INTERVAL_HOURS = 6
+
+# Upper bound on entries kept in memory
+MAX_ENTRIES = 1000
+
+
+def _next_model_update(now: float, interval_hours: int) -> float:
+    """Timestamp of the next forecast model update boundary after `now`."""
+    interval = interval_hours * 3600
+    return (now // interval + 1) * interval
+
+
+class ForecastCache:
+    """
+    Full forecast windows keyed by rounded lat/lon and units.
+
+    Concurrent requests for the same key are coalesced, so within one model
+    update interval each place costs exactly one upstream call.
+    """
+
+    def __init__(self, update_interval_hours: int = DEFAULT_UPDATE_INTERVAL_HOURS, max_entries: int = MAX_ENTRIES):
+        self.update_interval_hours = update_interval_hours
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(lat: float, lon: float, units: str) -> tuple:
+        return (round(lat, COORD_PRECISION), round(lon, COORD_PRECISION), units)
+
+    def get_or_fetch(self, lat: float, lon: float, units: str, fetch):
+        """
+        Return the cached window for a place, calling `fetch()` once on a miss.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            units: Temperature units ("C" or "F")
+            fetch: Callable returning the full forecast window, or None on failure
+
+        Returns:
+            The forecast window, or None if it couldn't be fetched
+        """
+        key = self.make_key(lat, lon, units)
+
+        window = self._get(key)
+        if window is not None:
+            return window
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only one caller per key goes upstream; the rest wait and reuse its result
+        with key_lock:
+            window = self._get(key)
+            if window is not None:
+                return window
+
+            with self._lock:
+                self.stats["misses"] += 1
+            window = fetch()
+            if window is not None:
+                self._put(key, window)
+            return window
+
+    def get(self, lat: float, lon: float, units: str):
+        """Return the cached window for a place, or None if missing or expired."""
+        window = self._get(self.make_key(lat, lon, units))
+        if window is None:
+            with self._lock:
+                self.stats["misses"] += 1
+        return window
+
+    def put(self, lat: float, lon: float, units: str, window: dict, ahead_seconds: float = 0) -> None:
+        """
+        Store a window fetched outside get_or_fetch (e.g. as part of a batch request).
+
+        A window refreshed ahead of time (by the cache warmer) is kept past a model
+        update boundary that falls within the next `ahead_seconds`.
+        """
+        self._put(self.make_key(lat, lon, units), window, ahead_seconds)
+
+    def contains(self, lat: float, lon: float, units: str, min_ttl_seconds: float = 0) -> bool:
+        """
+        True if a window is cached for a place and stays fresh for at least
+        `min_ttl_seconds` (doesn't count as a hit or miss).
+        """
+        with self._lock:
+            entry = self._entries.get(self.make_key(lat, lon, units))
+            return entry is not None and time.time() + min_ttl_seconds < entry["expires_at"]
+
+    def _get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() >= entry["expires_at"]:
+                del self._entries[key]
+                return None
+            self.stats["hits"] += 1
+            return entry["window"]
+
+    def _put(self, key: tuple, window: dict, ahead_seconds: float = 0) -> None:
+        now = time.time()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict(now)
+            self._entries[key] = {
+                "window": window,
+                "expires_at": _next_model_update(now + ahead_seconds, self.update_interval_hours)
+            }
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, or the soonest-to-expire one if none have expired."""
+        expired = [key for key, entry in self._entries.items() if now >= entry["expires_at"]]
+        if not expired:
+            expired = [min(self._entries, key=lambda k: self._entries[k]["expires_at"])]
+        for key in expired:
+            del self._entries[key]
+            self._key_locks.pop(key, None)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_forecast_cache():
+    """
+    Get the process-wide forecast cache.
+
+    Returns:
+        ForecastCache, or None when FORECAST_CACHE_ENABLED is turned off
+    """
+    global _cache
+    if not get_setting("FORECAST_CACHE_ENABLED", True):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ForecastCache(
+                update_interval_hours=get_setting("FORECAST_UPDATE_INTERVAL_HOURS", DEFAULT_UPDATE_INTERVAL_HOURS)
+            )
+    return _cache
@@ -0,0 +1,219 @@
+"""Persistent geocode cache backed by SQLite, optionally seeded from a bundled gazetteer."""
+
+import csv
+import time
+import bisect
+import difflib
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from backend.utils import get_setting
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent.parent / 'assets' / 'cache' / 'geocode.sqlite'
+GAZETTEER_PATH = Path(__file__).parent / 'data' / 'gazetteer.csv'
+
+# Minimum similarity for a typo ("Barcellona") to resolve to a known place
+FUZZY_CUTOFF = 0.9
+
+# Common ways of writing a country that differ from the names Open-Meteo returns
+COUNTRY_ALIASES = {
+    "usa": "united states",
+    "us": "united states",
+    "united states of america": "united states",
+    "uk": "united kingdom",
+    "great britain": "united kingdom",
+    "england": "united kingdom",
+    "scotland": "united kingdom",
+    "uae": "united arab emirates",
+    "czech republic": "czechia",
+    "holland": "netherlands",
+    "korea": "south korea"
+}
+
+
+def normalize_location(location: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace ("São Paulo, BR" -> "sao paulo br")."""
+    text = unicodedata.normalize("NFKD", location)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = "".join(c if c.isalnum() else " " for c in text)
+    return " ".join(text.split())
+
+
+def _split_location(location: str):
+    """Split "Rome, Lazio, Italy" into ("rome", ["lazio", "italy"]) with country aliases applied."""
+    parts = [normalize_location(part) for part in location.split(",")]
+    parts = [part for part in parts if part]
+    if not parts:
+        return "", []
+    qualifiers = [COUNTRY_ALIASES.get(part, part) for part in parts[1:]]
+    return parts[0], qualifiers
+
+
+class GeocodeCache:
+    """
+    Geocode results keyed on normalized location strings.
+
+    All rows are mirrored in an in-memory dict so hits never touch the disk;
+    SQLite only makes them survive restarts. A sorted key list supports fast
+    prefix search, which also narrows the candidates for fuzzy matching.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, seed_gazetteer: bool = True):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS places ("
+            "key TEXT PRIMARY KEY, name TEXT, country TEXT, lat REAL, lon REAL, "
+            "source TEXT, updated_at REAL)"
+        )
+        self._places = {}
+        self._sorted_keys = []
+        self.stats = {"exact_hits": 0, "fuzzy_hits": 0, "misses": 0}
+
+        if seed_gazetteer:
+            self._seed_from_gazetteer()
+        self._load()
+
+    def _seed_from_gazetteer(self) -> None:
+        """Insert bundled major cities (under "city" and "city country" keys) without overwriting."""
+        rows = []
+        with open(GAZETTEER_PATH, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                name_key = normalize_location(row["name"])
+                for key in (name_key, f"{name_key} {normalize_location(row['country'])}"):
+                    rows.append((key, row["name"], row["country"], float(row["latitude"]),
+                                 float(row["longitude"]), "gazetteer", time.time()))
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO places VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _load(self) -> None:
+        """Mirror every stored row in memory."""
+        with self._lock:
+            cursor = self._conn.execute("SELECT key, name, country, lat, lon FROM places")
+            for key, name, country, lat, lon in cursor:
+                self._places[key] = _make_place(name, country, lat, lon)
+            self._sorted_keys = sorted(self._places)
+
+    def lookup(self, location: str):
+        """
+        Resolve a location locally (exact key, then known city + country, then typo-tolerant).
+
+        Returns:
+            Dictionary like geocode_location's result, or None if the place is unknown
+        """
+        key = normalize_location(location)
+        place = self._places.get(key)
+        if place is None:
+            place = self._lookup_by_parts(location)
+        if place is not None:
+            self.stats["exact_hits"] += 1
+            return dict(place)
+
+        city, qualifiers = _split_location(location)
+        match = self._fuzzy_match(" ".join([city] + qualifiers[-1:]))
+        if match is not None:
+            self.stats["fuzzy_hits"] += 1
+            return dict(self._places[match])
+
+        self.stats["misses"] += 1
+        return None
+
+    def _lookup_by_parts(self, location: str):
+        """Match "City, Region, Country" against stored "city country" or bare "city" keys."""
+        city, qualifiers = _split_location(location)
+        if not city:
+            return None
+        for qualifier in reversed(qualifiers):
+            place = self._places.get(f"{city} {qualifier}")
+            if place is not None:
+                return place
+        if not qualifiers:
+            return self._places.get(city)
+        return None
+
+    def search_prefix(self, prefix: str, limit: int = 10) -> list:
+        """
+        Find known location keys starting with a prefix (e.g. for autocomplete).
+
+        Returns:
+            List of matching normalized keys, in alphabetical order
+        """
+        prefix = normalize_location(prefix)
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self._sorted_keys, prefix)
+        matches = []
+        for key in self._sorted_keys[start:]:
+            if not key.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.append(key)
+        return matches
+
+    def _fuzzy_match(self, key: str):
+        """Closest known key sharing the first two characters, if similar enough."""
+        if len(key) < 4:
+            return None
+        candidates = self.search_prefix(key[:2], limit=500)
+        matches = difflib.get_close_matches(key, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        return matches[0] if matches else None
+
+    def store(self, location: str, place: dict) -> None:
+        """Persist a geocode result fetched from the network under the query and its canonical name."""
+        keys = {normalize_location(location)}
+        canonical_key = normalize_location(f"{place['name']} {place['country']}")
+        if canonical_key not in self._places:
+            keys.add(canonical_key)
+        keys.discard("")
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO places VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(key, place["name"], place["country"], place["lat"], place["lon"], "api", time.time())
+                     for key in keys]
+                )
+            for key in keys:
+                if key not in self._places:
+                    bisect.insort(self._sorted_keys, key)
+                self._places[key] = place
+
+
+def _make_place(name: str, country: str, lat: float, lon: float) -> dict:
+    """Build a place in the same shape geocode_location returns."""
+    return {
+        "lat": lat,
+        "lon": lon,
+        "name": name,
+        "country": country or "",
+        "formatted": f"{name}, {country or ''}"
+    }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_geocode_cache():
+    """
+    Get the process-wide geocode cache.
+
+    Returns:
+        GeocodeCache, or None when GEOCODE_CACHE_ENABLED is turned off or the database can't be opened
+    """
+    global _cache
+    if not get_setting("GEOCODE_CACHE_ENABLED", True):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = GeocodeCache(
+                    db_path=get_setting("GEOCODE_CACHE_PATH", str(DEFAULT_CACHE_PATH)),
+                    seed_gazetteer=get_setting("GEOCODE_GAZETTEER_SEED", True)
+                )
+            except (sqlite3.Error, OSError) as e:
+                print(f"Geocode cache unavailable: {e}")
+                return None
+    return _cache
@@ -0,0 +1,124 @@
+"""Optional hourly forecast insights, aggregated per day with vectorized NumPy operations."""
+
+import warnings
+import numpy as np
+
+HOURLY_VARIABLES = "temperature_2m,apparent_temperature,precipitation_probability,precipitation,wind_speed_10m"
+
+# An hour counts as rainy if rain is likely or measurable
+RAIN_PROBABILITY = 50
+RAIN_MM = 0.1
+
+# An hour is good for being outdoors if it's daytime, dry-ish, not too windy and comfortable
+OUTDOOR_HOURS = (7, 21)
+OUTDOOR_MAX_RAIN_PROBABILITY = 30
+OUTDOOR_MAX_WIND = 30
+COMFORT_RANGE_C = (12, 28)
+
+
+def hourly_to_arrays(hourly: dict) -> dict:
+    """
+    Convert Open-Meteo's hourly lists into a compact (days x 24) grid per variable.
+
+    Missing values become NaN. Days are the local calendar days of the response.
+
+    Returns:
+        dict with "dates" (list of YYYY-MM-DD) and one float32 array per variable
+    """
+    times = np.asarray(hourly.get("time", []), dtype="U16")
+    if times.size == 0:
+        return {"dates": []}
+
+    dates, day_index = np.unique(np.char.partition(times, "T")[:, 0], return_inverse=True)
+    hour_index = np.char.partition(times, "T")[:, 2].astype("U2").astype(np.int8)
+
+    grids = {"dates": dates.tolist()}
+    for variable in HOURLY_VARIABLES.split(","):
+        values = np.array([np.nan if v is None else v for v in hourly.get(variable, [])], dtype=np.float32)
+        grid = np.full((len(dates), 24), np.nan, dtype=np.float32)
+        if values.size == times.size:
+            grid[day_index, hour_index] = values
+        grids[variable] = grid
+    return grids
+
+
+def _longest_runs(mask: np.ndarray):
+    """
+    Longest run of True per row of a (days x hours) mask.
+
+    Returns:
+        tuple: (start_hour, length) arrays, one entry per day
+    """
+    hours = np.arange(mask.shape[1])
+    last_false = np.maximum.accumulate(np.where(mask, -1, hours), axis=1)
+    run_length = hours - last_false
+    best_end = run_length.argmax(axis=1)
+    best_length = run_length.max(axis=1)
+    return best_end - best_length + 1, best_length
+
+
+def summarize_hourly(grids: dict, units: str = "C") -> dict:
+    """
+    Per-day feels-like range, rainiest stretch and best outdoor window.
+
+    Returns:
+        dict mapping YYYY-MM-DD to a small summary dict
+    """
+    if not grids.get("dates"):
+        return {}
+
+    feels = grids["apparent_temperature"]
+    rain = (grids["precipitation_probability"] >= RAIN_PROBABILITY) | (grids["precipitation"] >= RAIN_MM)
+
+    comfort_low, comfort_high = COMFORT_RANGE_C
+    if units == "F":
+        comfort_low, comfort_high = comfort_low * 9 / 5 + 32, comfort_high * 9 / 5 + 32
+    daytime = np.zeros(24, dtype=bool)
+    daytime[OUTDOOR_HOURS[0]:OUTDOOR_HOURS[1]] = True
+    # NaN comparisons are False, so missing hours never count as good
+    good = (
+        daytime
+        & (grids["precipitation_probability"] <= OUTDOOR_MAX_RAIN_PROBABILITY)
+        & (grids["wind_speed_10m"] <= OUTDOOR_MAX_WIND)
+        & (feels >= comfort_low)
+        & (feels <= comfort_high)
+    )
+
+    # Days with no data at all yield NaN ("All-NaN slice" warning is expected)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        feels_min = np.nanmin(feels, axis=1)
+        feels_max = np.nanmax(feels, axis=1)
+    rain_hours = rain.sum(axis=1)
+    rain_start, rain_length = _longest_runs(rain)
+    good_start, good_length = _longest_runs(good)
+
+    summaries = {}
+    for i, day in enumerate(grids["dates"]):
+        summaries[day] = {
+            "feels_min": None if np.isnan(feels_min[i]) else round(float(feels_min[i]), 1),
+            "feels_max": None if np.isnan(feels_max[i]) else round(float(feels_max[i]), 1),
+            "rain_hours": int(rain_hours[i]),
+            "rain_window": _window(rain_start[i], rain_length[i]),
+            "best_outdoor_window": _window(good_start[i], good_length[i])
+        }
+    return summaries
+
+
+def _window(start: int, length: int):
+    """Format an hour run as "HH:00-HH:00", or None if empty."""
+    if length <= 0:
+        return None
+    return f"{int(start):02d}:00-{int(start + length):02d}:00"
+
+
+def format_hourly_line(summary: dict, units_symbol: str) -> str:
+    """Compact one-line hourly insight for format_weather_summary."""
+    parts = []
+    if summary["feels_min"] is not None:
+        parts.append(f"Feels like {summary['feels_min']}-{summary['feels_max']}{units_symbol}")
+    if summary["best_outdoor_window"]:
+        parts.append(f"best outdoor {summary['best_outdoor_window']}")
+    if summary["rain_window"]:
+        parts.append(f"rain likely {summary['rain_window']} ({summary['rain_hours']}h total)")
+    return "; ".join(parts)
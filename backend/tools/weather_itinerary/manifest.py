@@ -0,0 +1,106 @@
+"""Weather tool declarations (schemas and metadata only; the implementations are imported on first use)."""
+
+# Tool definition for OpenAI function calling
+TOOL_DEFINITION = {
+    "type": "function",
+    "function": {
+        "name": "get_weather_forecast",
+        "description": "Fetch and summarize weather forecast for a location and date range. Use when user asks about weather, OR when user asks what to wear/pack AND location + dates are known.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "location": {
+                    "type": "string",
+                    "description": "The location (city and country, e.g., 'Rome, Italy')"
+                },
+                "date_range": {
+                    "type": "object",
+                    "properties": {
+                        "start": {
+                            "type": "string",
+                            "description": "Start date in YYYY-MM-DD format"
+                        },
+                        "end": {
+                            "type": "string",
+                            "description": "End date in YYYY-MM-DD format"
+                        }
+                    },
+                    "required": ["start", "end"],
+                    "description": "Date range for the weather forecast"
+                },
+                "units": {
+                    "type": "string",
+                    "enum": ["C", "F"],
+                    "description": "Temperature units (Celsius or Fahrenheit)",
+                    "default": "C"
+                }
+            },
+            "required": ["location", "date_range"]
+        }
+    }
+}
+
+MULTI_CITY_TOOL_DEFINITION = {
+    "type": "function",
+    "function": {
+        "name": "get_multi_city_weather_forecast",
+        "description": "Fetch and summarize weather forecasts for a trip covering several cities in one call. Use instead of get_weather_forecast when the trip has 2 or more destinations.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "destinations": {
+                    "type": "array",
+                    "description": "Destinations in travel order, each with its own dates",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "location": {
+                                "type": "string",
+                                "description": "The location (city and country, e.g., 'Rome, Italy')"
+                            },
+                            "date_range": {
+                                "type": "object",
+                                "properties": {
+                                    "start": {
+                                        "type": "string",
+                                        "description": "Start date in YYYY-MM-DD format"
+                                    },
+                                    "end": {
+                                        "type": "string",
+                                        "description": "End date in YYYY-MM-DD format"
+                                    }
+                                },
+                                "required": ["start", "end"]
+                            }
+                        },
+                        "required": ["location", "date_range"]
+                    }
+                },
+                "units": {
+                    "type": "string",
+                    "enum": ["C", "F"],
+                    "description": "Temperature units (Celsius or Fahrenheit)",
+                    "default": "C"
+                }
+            },
+            "required": ["destinations"]
+        }
+    }
+}
+
+TOOLS = [
+    {
+        "definition": TOOL_DEFINITION,
+        "function": "backend.tools.weather_itinerary.tool:get_weather_forecast",
+        "digest": "backend.tools.weather_itinerary.tool:digest_forecast",
+        "message": "🌤️ Fetching weather forecast...",
+        "visible": True
+    },
+    {
+        "definition": MULTI_CITY_TOOL_DEFINITION,
+        "function": "backend.tools.weather_itinerary.batch:get_multi_city_weather_forecast",
+        "digest": "backend.tools.weather_itinerary.batch:digest_multi_city_forecast",
+        "message": "🌤️ Fetching weather forecasts for your destinations...",
+        "visible": True
+    }
+]
@@ -0,0 +1,137 @@
+"""Deterministic local weather report renderer (alternative to the gpt-4o-mini formatting call)."""
+
+from datetime import datetime
+
+# WMO weather code -> broad category used for patterns and advice
+CODE_CATEGORIES = {
+    0: "clear", 1: "clear",
+    2: "cloudy", 3: "cloudy",
+    45: "fog", 48: "fog",
+    51: "drizzle", 53: "drizzle", 55: "drizzle",
+    61: "rain", 63: "rain", 65: "rain", 80: "rain", 81: "rain", 82: "rain",
+    71: "snow", 73: "snow", 75: "snow", 77: "snow", 85: "snow", 86: "snow",
+    95: "storm", 96: "storm", 99: "storm"
+}
+
+# Short advice per category, in priority order
+CATEGORY_ADVICE = [
+    ("storm", "Thunderstorms expected on {days} — keep an indoor backup plan"),
+    ("snow", "Snow expected on {days} — allow extra travel time"),
+    ("rain", "Rain expected on {days} — carry an umbrella"),
+    ("fog", "Fog likely on {days} — views and early transfers may be affected"),
+    ("drizzle", "Light drizzle on {days} — a light rain jacket is enough")
+]
+
+# A day counts as wet if its code is wet or rain is likely
+WET_CATEGORIES = {"drizzle", "rain", "snow", "storm"}
+WET_PROBABILITY = 60
+
+# Average max temperature change (first vs last days) that counts as a trend
+TREND_DEGREES = 3
+
+
+def _day_label(iso_date: str) -> str:
+    """'2026-01-12' -> 'Mon 12'"""
+    return datetime.strptime(iso_date, "%Y-%m-%d").strftime("%a %d")
+
+
+def _format_temp(value) -> str:
+    return "?" if value is None else f"{round(value)}"
+
+
+def _is_wet(day: dict) -> bool:
+    category = CODE_CATEGORIES.get(day["weather_code"], "")
+    return category in WET_CATEGORIES or (day["precipitation_prob"] or 0) >= WET_PROBABILITY
+
+
+def _key_patterns(days: list) -> list:
+    """Multi-day patterns only; single-day events are already visible in the table."""
+    if len(days) < 2:
+        return []
+
+    patterns = []
+    wet = [_is_wet(day) for day in days]
+    wet_count = sum(wet)
+    half = len(days) // 2
+    if wet_count == 0:
+        patterns.append("Dry throughout")
+    elif wet_count == len(days):
+        patterns.append("Wet every day")
+    elif wet_count >= 2:
+        if all(wet[:half]) and not any(wet[half:]):
+            patterns.append("Rain early, drying out later")
+        elif all(wet[half:]) and not any(wet[:half]):
+            patterns.append("Dry start, rain later")
+        else:
+            patterns.append(f"Rain on {wet_count} of {len(days)} days")
+
+    maxes = [day["temp_max"] for day in days if day["temp_max"] is not None]
+    if len(maxes) >= 3:
+        third = max(1, len(maxes) // 3)
+        change = sum(maxes[-third:]) / third - sum(maxes[:third]) / third
+        if change >= TREND_DEGREES:
+            patterns.append("Gradual warming")
+        elif change <= -TREND_DEGREES:
+            patterns.append("Cooling trend")
+
+    return patterns
+
+
+def _advice(days: list) -> list:
+    lines = []
+    for category, template in CATEGORY_ADVICE:
+        matching = [_day_label(day["date"]) for day in days if CODE_CATEGORIES.get(day["weather_code"]) == category]
+        if matching:
+            lines.append(template.format(days=", ".join(matching)))
+    return lines
+
+
+def render_weather_report(location: str, forecast_data: dict) -> str:
+    """
+    Render a forecast as markdown: overview, per-day table, key patterns and advice.
+
+    Args:
+        location: Formatted location name (e.g. "Rome, Italy")
+        forecast_data: Result of fetch_weather_forecast
+
+    Returns:
+        str: Markdown report
+    """
+    days = forecast_data["days"]
+    units_symbol = "°F" if forecast_data["units"] == "F" else "°C"
+
+    lows = [day["temp_min"] for day in days if day["temp_min"] is not None]
+    highs = [day["temp_max"] for day in days if day["temp_max"] is not None]
+    wet_days = sum(_is_wet(day) for day in days)
+
+    lines = [f"**Weather forecast: {location} ({days[0]['date']} → {days[-1]['date']})**", ""]
+    if lows and highs:
+        lines.append(
+            f"{len(days)} day(s), {_format_temp(min(lows))}–{_format_temp(max(highs))}{units_symbol}, "
+            f"{wet_days} wet day(s)."
+        )
+        lines.append("")
+
+    lines.append("| Day | Temp | Conditions | Rain |")
+    lines.append("|-----|------|------------|------|")
+    for day in days:
+        rain = f"{day['precipitation_prob']}%" if day["precipitation_prob"] is not None else "–"
+        conditions = day["condition"]
+        if day.get("hourly") and day["hourly"].get("best_outdoor_window"):
+            conditions += f" (best outdoors {day['hourly']['best_outdoor_window']})"
+        lines.append(
+            f"| {_day_label(day['date'])} | {_format_temp(day['temp_min'])}–{_format_temp(day['temp_max'])}{units_symbol} "
+            f"| {conditions} | {rain} |"
+        )
+
+    patterns = _key_patterns(days)
+    if patterns:
+        lines.append("")
+        lines.append(f"**Key patterns:** {' · '.join(patterns)}")
+
+    advice = _advice(days)
+    if advice:
+        lines.append("")
+        lines.extend(f"- {line}" for line in advice)
+
+    return "\n".join(lines) + "\n"
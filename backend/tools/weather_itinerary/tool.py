@@ -1,188 +1,292 @@
 """Weather-adaptive itinerary adjuster tool for travel planning."""
 
 import os
+import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from backend.utils import get_openai_client, get_runtime_context
-
-# Tool definition for OpenAI function calling
-TOOL_DEFINITION = {
-    "type": "function",
-    "function": {
-        "name": "get_weather_forecast",
-        "description": "Fetch and summarize weather forecast for a location and date range. Use when user asks about weather, OR when user asks what to wear/pack AND location + dates are known.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "location": {
-                    "type": "string",
-                    "description": "The location (city and country, e.g., 'Rome, Italy')"
-                },
-                "date_range": {
-                    "type": "object",
-                    "properties": {
-                        "start": {
-                            "type": "string",
-                            "description": "Start date in YYYY-MM-DD format"
-                        },
-                        "end": {
-                            "type": "string",
-                            "description": "End date in YYYY-MM-DD format"
-                        }
-                    },
-                    "required": ["start", "end"],
-                    "description": "Date range for the weather forecast"
-                },
-                "units": {
-                    "type": "string",
-                    "enum": ["C", "F"],
-                    "description": "Temperature units (Celsius or Fahrenheit)",
-                    "default": "C"
-                }
-            },
-            "required": ["location", "date_range"]
-        }
-    }
+from backend.utils import get_openai_client, get_runtime_context, get_setting
+from backend.cancellation import iter_stream
+from backend.usage import STREAM_OPTIONS, track_usage
+from backend.tools.weather_itinerary.geocode_cache import get_geocode_cache
+from backend.tools.weather_itinerary.forecast_cache import get_forecast_cache
+from backend.tools.weather_itinerary.cache_warmer import get_cache_warmer
+from backend.tools.http_client import Deadline, http_get
+from backend.digests import fit_levels
+from backend.tools.weather_itinerary.renderer import render_weather_report
+from backend.tools.weather_itinerary.climatology import get_climatology, render_typical_conditions
+from backend.tools.weather_itinerary.hourly import HOURLY_VARIABLES, hourly_to_arrays, summarize_hourly, format_hourly_line
+
+# Typical formatted forecast length in tokens (used to estimate savings on cancellation)
+EXPECTED_TOKENS = 250
+
+# Open-Meteo free API limits:
+# - Can forecast up to ~7-16 days ahead (varies by model/date)
+# - For past dates, need to use historical API (not implemented here)
+# - Use conservative 14-day limit to avoid API errors
+MAX_FORECAST_DAYS = 14
+
+# Overall network budget for one weather tool call (geocoding + forecast, including retries)
+DEFAULT_DEADLINE_SECONDS = 12
+
+# How the fetched data is turned into prose: "llm" (gpt-4o-mini) or "local" (template renderer)
+DEFAULT_FORMATTER = "llm"
+
+# Loads the formatting prompt and client while geocoding is in flight
+_prepare_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="weather-prepare")
+
+# Cumulative per-stage timings of get_weather_forecast (see get_pipeline_stats)
+PIPELINE_STATS = {
+    "calls": 0,
+    "total_ms": {}
 }
+_stats_lock = threading.Lock()
 
+DAILY_VARIABLES = "temperature_2m_max,temperature_2m_min,precipitation_sum,precipitation_probability_max,wind_speed_10m_max,weather_code"
 
-def geocode_location(location: str):
+def geocode_location(location: str, deadline: Deadline = None):
     """
     Geocode a location to get latitude and longitude using Open-Meteo's geocoding API.
+    Known places (bundled major cities and previous lookups) are resolved from the
+    local geocode cache; only genuinely new places hit the network.
     
     Args:
         location: Location string (e.g., "Rome, Italy")
+        deadline: Overall network budget for the calling tool (optional)
     
     Returns:
         Dictionary with lat, lon, and formatted location name, or None if failed
     """
+    geocode_cache = get_geocode_cache()
+    if geocode_cache:
+        cached_place = geocode_cache.lookup(location)
+        if cached_place:
+            return cached_place
+    
     try:
         geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
-        response = requests.get(geocoding_url, params={"name": location, "count": 1, "language": "en"}, timeout=10)
+        response = http_get(geocoding_url, params={"name": location, "count": 1, "language": "en"}, deadline=deadline)
         response.raise_for_status()
         data = response.json()
         
         if data.get("results"):
             result = data["results"][0]
-            return {
+            place = {
                 "lat": result["latitude"],
                 "lon": result["longitude"],
                 "name": result["name"],
                 "country": result.get("country", ""),
                 "formatted": f"{result['name']}, {result.get('country', '')}"
             }
+            if geocode_cache:
+                geocode_cache.store(location, place)
+            return place
         return None
     except Exception as e:
         print(f"Geocoding error: {e}")
         return None
 
 
-def fetch_weather_forecast(lat: float, lon: float, start_date: str, end_date: str, units: str = "C"):
+def _fetch_forecast_windows(coordinates: list, units: str = "C", deadline: Deadline = None):
+    """
+    Fetch full forecast windows (today + MAX_FORECAST_DAYS) for one or more places
+    from Open-Meteo API in a single request.
+    
+    Args:
+        coordinates: List of (lat, lon) tuples
+        units: Temperature units ("C" or "F")
+        deadline: Overall network budget for the calling tool (optional)
+    
+    Returns:
+        List of dictionaries with the raw "daily" arrays and "timezone" (same order as coordinates), or None if failed
+    """
+    weather_url = "https://api.open-meteo.com/v1/forecast"
+    temp_unit = "fahrenheit" if units == "F" else "celsius"
+    
+    params = {
+        "latitude": ",".join(str(lat) for lat, _ in coordinates),
+        "longitude": ",".join(str(lon) for _, lon in coordinates),
+        "daily": DAILY_VARIABLES,
+        "temperature_unit": temp_unit,
+        "forecast_days": MAX_FORECAST_DAYS + 1,
+        "timezone": "auto"
+    }
+    # Optional hourly mode: hourly variables feed per-day insights (rain windows, best outdoor hours)
+    if get_setting("WEATHER_HOURLY_ENABLED", False):
+        params["hourly"] = HOURLY_VARIABLES
+    
+    response = http_get(weather_url, params=params, deadline=deadline)
+    
+    # Check response status and get detailed error if it fails
+    if response.status_code != 200:
+        try:
+            error_data = response.json()
+            error_msg = error_data.get('reason', 'Unknown error')
+            print(f"Weather API error ({response.status_code}): {error_msg}")
+            print(f"Full error response: {error_data}")
+        except:
+            print(f"Weather API error: {response.status_code} - {response.text}")
+        return None
+    
+    data = response.json()
+    # A single location comes back as an object, several as a list
+    if isinstance(data, dict):
+        data = [data]
+    windows = []
+    for item in data:
+        window = {"daily": item.get("daily", {}), "timezone": item.get("timezone", "")}
+        if item.get("hourly"):
+            # Aggregate hourly data once, columnar, and cache only the compact per-day summaries
+            window["hourly"] = summarize_hourly(hourly_to_arrays(item["hourly"]), units)
+        windows.append(window)
+    return windows
+
+
+def _fetch_forecast_window(lat: float, lon: float, units: str = "C", deadline: Deadline = None):
+    """
+    Fetch the full forecast window (today + MAX_FORECAST_DAYS) for one place.
+    
+    Returns:
+        Dictionary with the raw "daily" arrays and "timezone", or None if failed
+    """
+    windows = _fetch_forecast_windows([(lat, lon)], units, deadline)
+    return windows[0] if windows else None
+
+
+def _check_date_range(start_date: str, end_date: str):
+    """
+    Check that a date range can be served by the forecast.
+    
+    Returns:
+        str: Error reason ("past_dates", "too_far_future", "invalid_date_format"), or None if valid
+    """
+    from datetime import date
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return "invalid_date_format"
+    
+    today = date.today()
+    if (end - today).days < 0:
+        return "past_dates"
+    if (start - today).days > MAX_FORECAST_DAYS:
+        return "too_far_future"
+    return None
+
+
+def _build_forecast(window: dict, start_date: str, end_date: str, units: str = "C"):
+    """
+    Slice a cached forecast window down to the requested dates, clamping the end
+    date to the forecast limit.
+    
+    Returns:
+        Dictionary with daily weather data, or None if no days fall in the range
+    """
+    from datetime import timedelta, date
+    
+    # Adjust end date if it exceeds the forecast limit
+    max_forecast_date = date.today() + timedelta(days=MAX_FORECAST_DAYS)
+    date_adjusted = False
+    original_end_date = end_date
+    
+    if datetime.strptime(end_date, "%Y-%m-%d").date() > max_forecast_date:
+        end_date = max_forecast_date.strftime("%Y-%m-%d")
+        date_adjusted = True
+        print(f"Weather API: Adjusting end date from {original_end_date} to {end_date} ({MAX_FORECAST_DAYS}-day forecast limit)")
+    
+    # Format the requested slice of daily data into a more readable structure
+    daily = window["daily"]
+    forecast_days = []
+    hourly_summaries = window.get("hourly", {})
+    
+    for i in range(len(daily.get("time", []))):
+        # ISO dates compare correctly as strings
+        if not start_date <= daily["time"][i] <= end_date:
+            continue
+        weather_code = daily["weather_code"][i]
+        day_data = {
+            "date": daily["time"][i],
+            "temp_max": daily["temperature_2m_max"][i],
+            "temp_min": daily["temperature_2m_min"][i],
+            "precipitation": daily["precipitation_sum"][i],
+            "precipitation_prob": daily["precipitation_probability_max"][i],
+            "wind_speed": daily["wind_speed_10m_max"][i],
+            "weather_code": weather_code,
+            "condition": _interpret_weather_code(weather_code),
+            "units": units
+        }
+        if daily["time"][i] in hourly_summaries:
+            day_data["hourly"] = hourly_summaries[daily["time"][i]]
+        forecast_days.append(day_data)
+    
+    if not forecast_days:
+        print(f"Weather API: No forecast days between {start_date} and {end_date}")
+        return None
+    
+    return {
+        "days": forecast_days,
+        "timezone": window["timezone"],
+        "units": units,
+        "date_adjusted": date_adjusted,
+        "original_end_date": original_end_date if date_adjusted else None
+    }
+
+
+def fetch_weather_forecast(lat: float, lon: float, start_date: str, end_date: str, units: str = "C", deadline: Deadline = None):
     """
     Fetch weather forecast from Open-Meteo API.
     Note: Free API provides forecasts up to 7-16 days ahead depending on variables.
     
+    The full 14-day window is fetched once per place and cached until the next
+    forecast model update; any date range is then served by slicing it.
+    
     Args:
         lat: Latitude
         lon: Longitude
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
         units: Temperature units ("C" or "F")
+        deadline: Overall network budget for the calling tool (optional)
+    
+    Returns:
+        Dictionary with daily weather data, or None if failed
+    """
+    error_reason = _check_date_range(start_date, end_date)
+    if error_reason == "past_dates":
+        print(f"Weather API: Cannot fetch forecast for past dates (end date: {end_date})")
+        return None
+    if error_reason == "too_far_future":
+        print(f"Weather API: Start date {start_date} is too far in future (max {MAX_FORECAST_DAYS} days ahead)")
+        return None
+    if error_reason:
+        print(f"Weather API: Invalid date range {start_date} to {end_date}")
+        return None
+    
+    return _fetch_validated_forecast(lat, lon, start_date, end_date, units, deadline)
+
+
+def _fetch_validated_forecast(lat: float, lon: float, start_date: str, end_date: str, units: str = "C", deadline: Deadline = None):
+    """
+    Fetch (or reuse the cached window) and slice a forecast for dates already
+    checked with _check_date_range.
     
     Returns:
         Dictionary with daily weather data, or None if failed
     """
     try:
-        from datetime import datetime, timedelta, date
-        
-        # Parse dates
-        start = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end = datetime.strptime(end_date, "%Y-%m-%d").date()
-        today = date.today()
-        
-        # Calculate days ahead
-        days_until_start = (start - today).days
-        days_until_end = (end - today).days
-        
-        # Open-Meteo free API limits: 
-        # - Can forecast up to ~7-16 days ahead (varies by model/date)
-        # - For past dates, need to use historical API (not implemented here)
-        # - Use conservative 14-day limit to avoid API errors
-        MAX_FORECAST_DAYS = 14
-        
-        if days_until_end < 0:
-            print(f"Weather API: Cannot fetch forecast for past dates (end date: {end_date})")
-            return None
-        
-        if days_until_start > MAX_FORECAST_DAYS:
-            print(f"Weather API: Start date {start_date} is too far in future (max {MAX_FORECAST_DAYS} days ahead)")
-            return None
-        
-        # Adjust end date if it exceeds the forecast limit
-        max_forecast_date = today + timedelta(days=MAX_FORECAST_DAYS)
-        date_adjusted = False
-        original_end_date = end_date
-        
-        if end > max_forecast_date:
-            end_date = max_forecast_date.strftime("%Y-%m-%d")
-            date_adjusted = True
-            print(f"Weather API: Adjusting end date from {original_end_date} to {end_date} ({MAX_FORECAST_DAYS}-day forecast limit)")
-            end = max_forecast_date
-        
-        weather_url = "https://api.open-meteo.com/v1/forecast"
-        temp_unit = "fahrenheit" if units == "F" else "celsius"
-        
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum,precipitation_probability_max,wind_speed_10m_max,weather_code",
-            "temperature_unit": temp_unit,
-            "start_date": start_date,
-            "end_date": end_date,
-            "timezone": "auto"
-        }
-        
-        response = requests.get(weather_url, params=params, timeout=10)
-        
-        # Check response status and get detailed error if it fails
-        if response.status_code != 200:
-            try:
-                error_data = response.json()
-                error_msg = error_data.get('reason', 'Unknown error')
-                print(f"Weather API error ({response.status_code}): {error_msg}")
-                print(f"Full error response: {error_data}")
-            except:
-                print(f"Weather API error: {response.status_code} - {response.text}")
+        # Serve from the cached window when another request already fetched this place
+        forecast_cache = get_forecast_cache()
+        if forecast_cache:
+            window = forecast_cache.get_or_fetch(lat, lon, units, lambda: _fetch_forecast_window(lat, lon, units, deadline))
+        else:
+            window = _fetch_forecast_window(lat, lon, units, deadline)
+        if not window:
             return None
         
-        data = response.json()
-        
-        # Format the daily data into a more readable structure
-        daily = data.get("daily", {})
-        forecast_days = []
-        
-        for i in range(len(daily.get("time", []))):
-            weather_code = daily["weather_code"][i]
-            day_data = {
-                "date": daily["time"][i],
-                "temp_max": daily["temperature_2m_max"][i],
-                "temp_min": daily["temperature_2m_min"][i],
-                "precipitation": daily["precipitation_sum"][i],
-                "precipitation_prob": daily["precipitation_probability_max"][i],
-                "wind_speed": daily["wind_speed_10m_max"][i],
-                "weather_code": weather_code,
-                "condition": _interpret_weather_code(weather_code),
-                "units": units
-            }
-            forecast_days.append(day_data)
-        
-        return {
-            "days": forecast_days,
-            "timezone": data.get("timezone", ""),
-            "units": units,
-            "date_adjusted": date_adjusted,
-            "original_end_date": original_end_date if date_adjusted else None
-        }
+        return _build_forecast(window, start_date, end_date, units)
     except requests.exceptions.RequestException as e:
         print(f"Weather API request error: {e}")
         return None
@@ -235,114 +339,270 @@ def format_weather_summary(forecast_data: dict) -> str:
             f"Precip: {day['precipitation']}mm ({day['precipitation_prob']}% chance), "
             f"Wind: {day['wind_speed']} km/h"
         )
+        if day.get("hourly"):
+            summary_lines.append(f"  {format_hourly_line(day['hourly'], units_symbol)}")
     
     return "\n".join(summary_lines)
 
 
+def use_local_formatter() -> bool:
+    """True if WEATHER_FORMATTER selects the local template renderer instead of the LLM."""
+    return str(get_setting("WEATHER_FORMATTER", DEFAULT_FORMATTER)).strip().lower() == "local"
+
+
+def typical_conditions_report(geo_data: dict, date_range: dict, units: str = "C"):
+    """
+    Offline "typical conditions" answer for dates beyond the forecast horizon.
+    
+    Returns:
+        str: Markdown report, or None if no climate normals exist near the location
+    """
+    climatology = get_climatology()
+    if not climatology:
+        return None
+    try:
+        normals = climatology.typical_conditions(geo_data["lat"], geo_data["lon"], date_range["start"], date_range["end"], units)
+    except ValueError:
+        return None
+    if not normals:
+        return None
+    return render_typical_conditions(geo_data["formatted"], date_range, normals, units)
+
+
+def forecast_result(geo_data: dict, forecast_data: dict) -> dict:
+    """Compact structured form of a forecast, returned by the weather tools for digests and storage."""
+    return {
+        "location": geo_data["formatted"],
+        "units": forecast_data["units"],
+        "days": [
+            {key: day[key] for key in ("date", "condition", "temp_min", "temp_max", "precipitation_prob")}
+            for day in forecast_data["days"]
+        ]
+    }
+
+
+def digest_forecast(result: dict, max_tokens: int) -> str:
+    """Model-facing digest of one forecast: one line per day, or the overall range and wet days if too long."""
+    units_symbol = "°F" if result["units"] == "F" else "°C"
+    days = result["days"]
+    
+    def render(level):
+        header = f"{result['location']} {days[0]['date']}→{days[-1]['date']}"
+        if level == "days":
+            lines = [
+                f"{day['date']}: {day['condition']}, {day['temp_min']}–{day['temp_max']}{units_symbol}, rain {day['precipitation_prob']}%"
+                for day in days
+            ]
+            return "\n".join([header] + lines)
+        lows = [day["temp_min"] for day in days if day["temp_min"] is not None]
+        highs = [day["temp_max"] for day in days if day["temp_max"] is not None]
+        wet = [day["date"][5:] for day in days if (day["precipitation_prob"] or 0) >= 50]
+        temps = f"{min(lows)}–{max(highs)}{units_symbol}" if lows and highs else "temperatures n/a"
+        return f"{header}: {temps}; rain likely on {', '.join(wet) if wet else 'no days'}"
+    
+    if not days:
+        return result["location"]
+    return fit_levels(render, ("days", "summary"), max_tokens)
+
+
+def _format_unavailable_message(error_reason: str, location: str, date_range: dict) -> str:
+    """User-facing explanation of why a forecast couldn't be produced."""
+    # Provide specific error message based on the reason
+    if error_reason == "location_not_found":
+        return f"\n⚠️ **Weather forecast unavailable** - I couldn't find the location '{location}'. Please try a different city name or include the country (e.g., 'Paris, France').\n\n"
+    elif error_reason == "past_dates":
+        return f"\n⚠️ **Weather forecast unavailable** - The dates you requested ({date_range['start']} to {date_range['end']}) are in the past. I can only provide forecasts for current and future dates.\n\n"
+    elif error_reason == "too_far_future":
+        return f"\n⚠️ **Weather forecast unavailable** - The start date ({date_range['start']}) is too far in the future. I can only provide weather forecasts up to **14 days** ahead. Please try dates closer to today.\n\n"
+    elif error_reason == "invalid_date_format":
+        return f"\n⚠️ **Weather forecast unavailable** - Invalid date format. Dates should be in YYYY-MM-DD format.\n\n"
+    else:
+        # Generic API error
+        return f"\n⚠️ **Weather forecast unavailable** - I couldn't fetch live weather data for {location}. This might be a temporary API issue. Please try again later.\n\n"
+
+
+def _record_demand(location: str, units: str, place: dict) -> None:
+    """Tell the cache warmer (if enabled) about a forecast request and whether it was already warm."""
+    warmer = get_cache_warmer()
+    if not warmer:
+        return
+    forecast_cache = get_forecast_cache()
+    warm = forecast_cache.contains(place["lat"], place["lon"], units) if forecast_cache else None
+    warmer.record(location, units, place, warm)
+
+
+def _normalize_inputs(location, date_range, units):
+    """Trim free-text arguments and fall back to Celsius for unknown units."""
+    location = str(location or "").strip()
+    if not isinstance(date_range, dict):
+        # Missing or malformed: validated as an invalid date format
+        date_range = {}
+    date_range = {
+        "start": str(date_range.get("start") or "").strip(),
+        "end": str(date_range.get("end") or "").strip()
+    }
+    units = str(units or "C").strip().upper()
+    return location, date_range, units if units in ("C", "F") else "C"
+
+
+@contextmanager
+def _stage(timings: dict, name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = (time.perf_counter() - started) * 1000
+
+
+def _prepare_llm(timings: dict):
+    """Load the formatting prompt and the OpenAI client (runs while geocoding is in flight)."""
+    with _stage(timings, "prepare"):
+        prompt_path = os.path.join(os.path.dirname(__file__), '..', '..', 'prompts', 'weather_itinerary.md')
+        with open(prompt_path, 'r', encoding='utf-8') as f:
+            system_prompt = f.read().strip()
+        return system_prompt, get_openai_client()
+
+
+def _record_timings(timings: dict) -> None:
+    """Add one call's stage timings to PIPELINE_STATS (see get_pipeline_stats)."""
+    with _stats_lock:
+        PIPELINE_STATS["calls"] += 1
+        for name, ms in timings.items():
+            PIPELINE_STATS["total_ms"][name] = PIPELINE_STATS["total_ms"].get(name, 0.0) + ms
+
+
+def get_pipeline_stats() -> dict:
+    """
+    Snapshot of weather pipeline timings.
+    
+    Returns:
+        dict: Number of calls and average milliseconds per stage
+    """
+    with _stats_lock:
+        calls = PIPELINE_STATS["calls"]
+        averages = {name: round(ms / calls, 1) for name, ms in PIPELINE_STATS["total_ms"].items()} if calls else {}
+    return {"calls": calls, "avg_ms": averages}
+
+
 def get_weather_forecast(
     location: str,
     date_range: dict,
-    units: str = "C"
+    units: str = "C",
+    cancel_token=None
 ):
     """
     Fetch and summarize weather forecast for a location and date range.
     Returns a concise, human-readable forecast summary.
     
+    Runs as a staged pipeline: inputs are validated locally before any I/O,
+    geocoding overlaps with loading the prompt and client, and the first
+    output is yielded as soon as the forecast arrives.
+    
     Args:
         location: Travel location
         date_range: Dictionary with 'start' and 'end' dates
         units: Temperature units (C or F, default C)
+        cancel_token: Cancellation token for the current turn (optional)
     
     Yields:
         Chunks of the weather forecast summary
+    
+    Returns:
+        dict: forecast_result of the forecast shown, or None if no forecast was available
     """
-    # Load prompt from markdown file
-    prompt_path = os.path.join(os.path.dirname(__file__), '..', '..', 'prompts', 'weather_itinerary.md')
-    with open(prompt_path, 'r', encoding='utf-8') as f:
-        system_prompt = f.read().strip()
-    
-    # Try to geocode and fetch weather
-    geo_data = geocode_location(location)
-    forecast_data = None
-    error_reason = None
-    
-    # Check if geocoding failed
-    if not geo_data:
-        error_reason = "location_not_found"
-    else:
-        # Check date constraints before fetching weather
-        from datetime import datetime, date
-        try:
-            start = datetime.strptime(date_range["start"], "%Y-%m-%d").date()
-            end = datetime.strptime(date_range["end"], "%Y-%m-%d").date()
-            today = date.today()
-            
-            days_until_start = (start - today).days
-            days_until_end = (end - today).days
-            
-            # Check for past dates
-            if days_until_end < 0:
-                error_reason = "past_dates"
-            # Check if start date is too far in the future
-            elif days_until_start > 14:
-                error_reason = "too_far_future"
-            else:
-                # Dates are valid, try to fetch weather
-                forecast_data = fetch_weather_forecast(
-                    geo_data["lat"],
-                    geo_data["lon"],
-                    date_range["start"],
-                    date_range["end"],
-                    units
-                )
-                # If still None, it's an API error
-                if not forecast_data:
-                    error_reason = "api_error"
-        except ValueError:
-            error_reason = "invalid_date_format"
-    
-    # Build user message for LLM
-    if forecast_data:
-        # Success: we have weather data
-        # Check if dates were adjusted
+    timings = {}
+    started = time.perf_counter()
+    try:
+        # Stage 1: validate and normalize locally; bad dates never cost a network call
+        with _stage(timings, "validate"):
+            location, date_range, units = _normalize_inputs(location, date_range, units)
+            error_reason = _check_date_range(date_range["start"], date_range["end"])
+            if not location:
+                error_reason = "location_not_found"
+        if error_reason in ("past_dates", "invalid_date_format", "location_not_found"):
+            yield _format_unavailable_message(error_reason, location, date_range)
+            return
+        
+        if cancel_token is not None and cancel_token.cancelled:
+            return
+        
+        # Stage 2: geocode while the prompt and client are prepared in the background
+        deadline = Deadline(get_setting("WEATHER_TOOL_DEADLINE_SECONDS", DEFAULT_DEADLINE_SECONDS))
+        local_formatter = use_local_formatter()
+        prepared = None
+        if not local_formatter and error_reason is None:
+            prepared = _prepare_executor.submit(_prepare_llm, timings)
+        
+        with _stage(timings, "geocode"):
+            geo_data = geocode_location(location, deadline)
+        if not geo_data:
+            yield _format_unavailable_message("location_not_found", location, date_range)
+            return
+        
+        # Beyond the forecast horizon: answer with climate normals instead of refusing
+        if error_reason == "too_far_future":
+            typical_report = typical_conditions_report(geo_data, date_range, units)
+            yield typical_report or _format_unavailable_message(error_reason, location, date_range)
+            return
+        
+        if cancel_token is not None and cancel_token.cancelled:
+            return
+        
+        _record_demand(location, units, geo_data)
+        
+        # Stage 3: forecast (dates already validated above)
+        with _stage(timings, "forecast"):
+            forecast_data = _fetch_validated_forecast(
+                geo_data["lat"],
+                geo_data["lon"],
+                date_range["start"],
+                date_range["end"],
+                units,
+                deadline
+            )
+        if not forecast_data:
+            yield _format_unavailable_message("api_error", location, date_range)
+            return
+        
+        # Stage 4: stream; the date note goes out before waiting on the LLM
         if forecast_data.get("date_adjusted"):
+            timings.setdefault("first_output", (time.perf_counter() - started) * 1000)
             yield f"\n📅 **Note**: Weather forecast limited to 14 days ahead. Showing forecast through {forecast_data['days'][-1]['date']} (original request: {forecast_data['original_end_date']}).\n\n"
         
+        # Render locally when configured: same sections, no extra LLM round
+        if local_formatter:
+            timings.setdefault("first_output", (time.perf_counter() - started) * 1000)
+            yield render_weather_report(geo_data['formatted'], forecast_data)
+            return forecast_result(geo_data, forecast_data)
+        
         user_message = f"""Location: {geo_data['formatted']}
 Date Range: {date_range['start']} to {date_range['end']}
 
 Weather Data:
 {format_weather_summary(forecast_data)}"""
         
-    else:
-        # Provide specific error message based on the reason
-        if error_reason == "location_not_found":
-            yield f"\n⚠️ **Weather forecast unavailable** - I couldn't find the location '{location}'. Please try a different city name or include the country (e.g., 'Paris, France').\n\n"
-        elif error_reason == "past_dates":
-            yield f"\n⚠️ **Weather forecast unavailable** - The dates you requested ({date_range['start']} to {date_range['end']}) are in the past. I can only provide forecasts for current and future dates.\n\n"
-        elif error_reason == "too_far_future":
-            yield f"\n⚠️ **Weather forecast unavailable** - The start date ({date_range['start']}) is too far in the future. I can only provide weather forecasts up to **14 days** ahead. Please try dates closer to today.\n\n"
-        elif error_reason == "invalid_date_format":
-            yield f"\n⚠️ **Weather forecast unavailable** - Invalid date format. Dates should be in YYYY-MM-DD format.\n\n"
-        else:
-            # Generic API error
-            yield f"\n⚠️ **Weather forecast unavailable** - I couldn't fetch live weather data for {location}. This might be a temporary API issue. Please try again later.\n\n"
-        return
-    
-    # Call LLM with streaming to format the weather nicely
-    client = get_openai_client()
-    stream = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "system", "content": get_runtime_context()},
-            {"role": "user", "content": user_message}
-        ],
-        temperature=0.3,  # Lower temperature for consistent formatting
-        stream=True
-    )
-    
-    # Yield chunks as they come
-    for chunk in stream:
-        if chunk.choices[0].delta.content:
-            yield chunk.choices[0].delta.content
+        system_prompt, client = prepared.result()
+        if cancel_token is not None and cancel_token.cancelled:
+            return
+        
+        stream = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": get_runtime_context()},
+                {"role": "user", "content": user_message}
+            ],
+            temperature=0.3,  # Lower temperature for consistent formatting
+            stream=True,
+            stream_options=STREAM_OPTIONS
+        )
+        
+        # Yield chunks as they come (closes the stream if the turn is cancelled)
+        for chunk in track_usage(iter_stream(stream, cancel_token, expected_tokens=EXPECTED_TOKENS), "get_weather_forecast"):
+            if chunk.choices[0].delta.content:
+                timings.setdefault("first_output", (time.perf_counter() - started) * 1000)
+                yield chunk.choices[0].delta.content
+        return forecast_result(geo_data, forecast_data)
+    finally:
+        timings["total"] = (time.perf_counter() - started) * 1000
+        _record_timings(timings)
@@ -0,0 +1,323 @@
+"""Background execution of chat turns, independent of the Streamlit script run."""
+
+import time
+import uuid
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from backend.cancellation import CancellationToken
+from backend.storage import save_conversation
+from backend.structured_output import compact_reply, render_reply
+from backend.usage import merge_usage, new_usage, usage_scope
+from backend.utils import get_setting
+
+# Turns generated at the same time across all conversations
+DEFAULT_WORKERS = 4
+
+# Seconds between saves of a reply that is still streaming
+DEFAULT_CHECKPOINT_SECONDS = 2.0
+
+# Finished jobs stay attachable (e.g. from a reloaded page) this long
+FINISHED_JOB_TTL_SECONDS = 600
+
+# How often a follower re-checks a quiet job
+FOLLOW_POLL_SECONDS = 0.5
+
+
+class TurnJob:
+    """
+    One chat turn: the user's message, the assistant reply being generated and
+    the chunks streamed so far, which any number of followers can replay.
+    """
+
+    def __init__(self, conversation_id: str, conversation: dict, user_message: dict, user_id: str = None):
+        self.job_id = uuid.uuid4().hex
+        self.conversation_id = conversation_id
+        self.user_id = user_id
+        self.conversation = conversation
+        self.user_message = user_message
+        # Placeholder reply, checkpointed to storage while the turn streams
+        self.message = {
+            "id": uuid.uuid4().hex,
+            "role": "assistant",
+            "content": "",
+            "partial": True,
+            "job_id": self.job_id
+        }
+        self.status = "queued"  # queued | running | done | cancelled | error
+        self.cancel_token = CancellationToken()
+        self.turn_data = {}
+        self.discarded = False  # The conversation was deleted: stop and never save again
+        self.finished_at = None
+        self._chunks = []
+        self._cond = threading.Condition()
+        self._async_waiters = []  # (event loop, asyncio.Event) of async followers waiting for chunks
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def text(self) -> str:
+        with self._cond:
+            return "".join(self._chunks)
+
+    def cancel(self) -> None:
+        """Stop generating; the reply keeps what was streamed so far."""
+        self.cancel_token.cancel()
+
+    def follow(self, start: int = 0):
+        """
+        Stream the reply from chunk `start`, waiting for new chunks until the turn ends.
+
+        Closing the generator only detaches the follower; the turn keeps running.
+
+        Yields:
+            Chunks of the assistant's reply
+        """
+        position = start
+        while True:
+            with self._cond:
+                while position >= len(self._chunks) and not self.finished:
+                    self._cond.wait(FOLLOW_POLL_SECONDS)
+                chunks = self._chunks[position:]
+                finished = self.finished
+            position += len(chunks)
+            yield from chunks
+            if finished and not chunks:
+                return
+
+    async def afollow(self, start: int = 0):
+        """
+        Like follow(), for asyncio code: waiting for chunks does not hold a thread.
+
+        Yields:
+            Chunks of the assistant's reply
+        """
+        loop = asyncio.get_running_loop()
+        position = start
+        while True:
+            event = asyncio.Event()
+            with self._cond:
+                chunks = self._chunks[position:]
+                finished = self.finished
+                if not chunks and not finished:
+                    self._async_waiters.append((loop, event))
+            position += len(chunks)
+            for chunk in chunks:
+                yield chunk
+            if finished and not chunks:
+                return
+            if not chunks:
+                try:
+                    await event.wait()
+                finally:
+                    with self._cond:
+                        if (loop, event) in self._async_waiters:
+                            self._async_waiters.remove((loop, event))
+
+    def _append(self, chunk: str) -> None:
+        with self._cond:
+            self._chunks.append(chunk)
+            self._notify()
+
+    def _finish(self, status: str) -> None:
+        with self._cond:
+            self.status = status
+            self.finished_at = time.monotonic()
+            self._notify()
+
+    def _notify(self) -> None:
+        """Wake every follower (called with the condition held)."""
+        self._cond.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # The follower's event loop has closed
+
+
+def _history_before(messages: list, user_message: dict) -> list:
+    """Role/content history preceding the user's message (unfinished replies excluded)."""
+    history = []
+    for message in messages:
+        if message is user_message:
+            break
+        content = render_reply(message)
+        if content and not message.get("partial"):
+            history.append({"role": message["role"], "content": content})
+    return history
+
+
+class TurnRunner:
+    """
+    Worker pool running chat turns in the background.
+
+    Turns of one conversation run one after another in submission order, so each
+    sees the previous reply in its history; different conversations run in parallel.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, checkpoint_seconds: float = DEFAULT_CHECKPOINT_SECONDS):
+        self.checkpoint_seconds = checkpoint_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="turn")
+        self._queues = {}  # conversation_id -> deque of TurnJob
+        self._jobs = {}  # job_id -> TurnJob
+        self._conversation_locks = {}  # conversation_id -> RLock
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "completed": 0, "cancelled": 0, "failed": 0, "checkpoints": 0}
+
+    def submit(self, conversation_id: str, conversation: dict, user_message: dict, user_id: str = None) -> TurnJob:
+        """
+        Queue a turn answering `user_message`, which must already be in the conversation.
+        The conversation is saved in `user_id`'s storage partition.
+
+        The placeholder reply is appended to the conversation and saved right away.
+
+        Returns:
+            TurnJob: The job, whose follow() streams the reply
+        """
+        job = TurnJob(conversation_id, conversation, user_message, user_id)
+        with self.conversation_lock(conversation_id):
+            conversation["messages"].append(job.message)
+            save_conversation(conversation_id, conversation, user_id)
+
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+            self.stats["submitted"] += 1
+            queue = self._queues.setdefault(conversation_id, deque())
+            queue.append(job)
+            start_worker = len(queue) == 1
+        if start_worker:
+            self._executor.submit(self._run_queue, conversation_id)
+        return job
+
+    def conversation_lock(self, conversation_id: str):
+        """
+        Lock held while a conversation is changed or saved, by the turn workers and
+        by anyone else changing the same conversation dict (the app, the API).
+        """
+        with self._lock:
+            return self._conversation_locks.setdefault(conversation_id, threading.RLock())
+
+    def get_job(self, job_id: str):
+        """The job with this id, or None if it is unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_active_job(self, conversation_id: str):
+        """The conversation's running or queued job, or None."""
+        with self._lock:
+            queue = self._queues.get(conversation_id)
+            return queue[0] if queue else None
+
+    def discard_conversation(self, conversation_id: str) -> None:
+        """Cancel a deleted conversation's turns without saving it again."""
+        with self._lock:
+            jobs = list(self._queues.get(conversation_id, ()))
+        for job in jobs:
+            job.discarded = True
+            job.cancel()
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and now - job.finished_at > FINISHED_JOB_TTL_SECONDS:
+                del self._jobs[job_id]
+
+    def _run_queue(self, conversation_id: str) -> None:
+        while True:
+            with self._lock:
+                job = self._queues[conversation_id][0]
+            try:
+                self._run(job)
+            except Exception as e:
+                print(f"Turn {job.job_id} failed: {e}")
+                job._finish("error")
+            with self._lock:
+                self.stats[{"done": "completed", "cancelled": "cancelled"}.get(job.status, "failed")] += 1
+                queue = self._queues[conversation_id]
+                queue.popleft()
+                if not queue:
+                    del self._queues[conversation_id]
+                    return
+
+    def _run(self, job: TurnJob) -> None:
+        # Imported here so that importing this module does not load the chat stack
+        from backend.chat import chat_with_ai_stream
+
+        job.status = "running"
+        lock = self.conversation_lock(job.conversation_id)
+        messages = job.conversation["messages"]
+        with lock:
+            history = _history_before(messages, job.user_message)
+        last_checkpoint = time.monotonic()
+
+        # Every completion of the turn (tools included) is accounted to it
+        with usage_scope() as turn_usage:
+            stream = chat_with_ai_stream(job.user_message["content"], history, job.cancel_token, job.turn_data)
+            try:
+                for chunk in stream:
+                    job._append(chunk)
+                    if time.monotonic() - last_checkpoint >= self.checkpoint_seconds:
+                        self._checkpoint(job)
+                        last_checkpoint = time.monotonic()
+            finally:
+                stream.close()
+
+        # Swap in the finished reply as a new dict, so concurrent saves never see it half-updated
+        # Structured tool output is stored once, as JSON, and rendered again on load
+        reply = {"id": job.message["id"], "role": "assistant", "content": job.text}
+        if job.turn_data.get("tool_results"):
+            reply["content"] = compact_reply(job.text, job.turn_data["tool_results"])
+            reply["tool_results"] = job.turn_data["tool_results"]
+        if turn_usage["requests"]:
+            reply["usage"] = turn_usage
+        with lock:
+            if turn_usage["requests"]:
+                job.conversation["usage"] = merge_usage(job.conversation.get("usage") or new_usage(), {**turn_usage, "turns": 1})
+            for index, message in enumerate(messages):
+                if message is job.message:
+                    messages[index] = reply
+            job.message = reply
+            job.conversation["updated_at"] = datetime.now().isoformat()
+            if not job.discarded:
+                try:
+                    save_conversation(job.conversation_id, job.conversation, job.user_id)
+                except Exception as e:
+                    # The reply is complete in memory; the next save of the conversation stores it
+                    print(f"Error saving turn {job.job_id}: {e}")
+        job._finish("cancelled" if job.cancel_token.cancelled else "done")
+
+    def _checkpoint(self, job: TurnJob) -> None:
+        with self.conversation_lock(job.conversation_id):
+            job.message["content"] = job.text
+            if job.discarded:
+                return
+            try:
+                save_conversation(job.conversation_id, job.conversation, job.user_id)
+            except Exception as e:
+                print(f"Error checkpointing turn {job.job_id}: {e}")
+                return
+        with self._lock:
+            self.stats["checkpoints"] += 1
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_turn_runner() -> TurnRunner:
+    """Get the process-wide turn runner, shared across sessions (TURN_WORKERS threads)."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = TurnRunner(
+                workers=get_setting("TURN_WORKERS", DEFAULT_WORKERS),
+                checkpoint_seconds=get_setting("TURN_CHECKPOINT_SECONDS", DEFAULT_CHECKPOINT_SECONDS)
+            )
+    return _runner
@@ -0,0 +1,200 @@
+"""
+Token usage reported by streamed completions: provider prompt-cache hits, and
+token/cost accounting per call site (tool), per model and per conversation.
+
+Summary report over stored conversations:
+    python -m backend.usage [--user NAME] [--top 10]
+"""
+
+import sys
+import time
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Ask streamed completions for a final usage chunk (it has no choices)
+STREAM_OPTIONS = {"include_usage": True}
+
+# USD per million tokens: (input, cached input, output). Longest matching model prefix wins.
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00)
+}
+
+# Process-wide prompt cache counters, per call site label
+PROMPT_CACHE_STATS = {}
+# Process-wide token, cost and latency totals
+USAGE_STATS = {"by_model": {}, "by_label": {}}
+_stats_lock = threading.Lock()
+
+# Usage of the turn running in this context (set by usage_scope)
+_scope = contextvars.ContextVar("usage_scope", default=None)
+
+
+def completion_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+    """Cost in USD of one completion (0 for models without a known price)."""
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if (model or "").startswith(prefix):
+            input_price, cached_price, output_price = MODEL_PRICES[prefix]
+            return ((prompt_tokens - cached_tokens) * input_price + cached_tokens * cached_price
+                    + completion_tokens * output_price) / 1_000_000
+    return 0.0
+
+
+def new_usage() -> dict:
+    """Empty usage totals, as kept per turn and persisted per conversation."""
+    return {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+            "cost_usd": 0.0, "latency_ms": 0.0, "by_model": {}, "by_label": {}}
+
+
+def _add(totals: dict, counts: dict) -> None:
+    for key, value in counts.items():
+        totals[key] = round(totals.get(key, 0) + value, 6)
+
+
+def merge_usage(target: dict, usage: dict) -> dict:
+    """Add usage totals (e.g. a turn's) into `target` (e.g. the conversation's)."""
+    _add(target, {key: value for key, value in usage.items() if not isinstance(value, dict)})
+    for group in ("by_model", "by_label"):
+        for name, counts in usage.get(group, {}).items():
+            _add(target.setdefault(group, {}).setdefault(name, {}), counts)
+    return target
+
+
+@contextmanager
+def usage_scope():
+    """
+    Collect the usage of every completion made in this context (e.g. one chat turn).
+
+    Threads started for the turn must run in a copy of the context
+    (contextvars.copy_context().run) to be counted.
+
+    Yields:
+        dict: Usage totals (see new_usage), filled as completions finish
+    """
+    usage = new_usage()
+    token = _scope.set(usage)
+    try:
+        yield usage
+    finally:
+        _scope.reset(token)
+
+
+def record_usage(usage, label: str, model: str = None, latency_ms: float = 0.0) -> None:
+    """
+    Add one completion's usage to PROMPT_CACHE_STATS and USAGE_STATS, and to
+    the current usage scope if there is one.
+    """
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    model = model or "unknown"
+    counts = {
+        "requests": 1,
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": completion_cost(model, prompt_tokens, cached_tokens, completion_tokens),
+        "latency_ms": round(latency_ms, 1)
+    }
+
+    scope = _scope.get()
+    with _stats_lock:
+        _add(USAGE_STATS["by_model"].setdefault(model, {}), counts)
+        _add(USAGE_STATS["by_label"].setdefault(label, {}), counts)
+        if scope is not None:
+            merge_usage(scope, {**counts, "by_model": {model: counts}, "by_label": {label: counts}})
+
+        stats = PROMPT_CACHE_STATS.setdefault(label, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        stats["requests"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_tokens"] += cached_tokens
+
+
+def track_usage(chunks, label: str):
+    """
+    Pass stream chunks through, recording the final usage chunk and dropping it
+    (it carries no choices, so callers can keep reading chunk.choices[0]).
+
+    Yields:
+        Chunks that have choices
+    """
+    started = time.perf_counter()
+    try:
+        for chunk in chunks:
+            usage = getattr(chunk, "usage", None)
+            if usage:
+                record_usage(usage, label, getattr(chunk, "model", None), (time.perf_counter() - started) * 1000)
+            if chunk.choices:
+                yield chunk
+    finally:
+        # Propagate early exits so the underlying stream is closed/cancelled
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def get_prompt_cache_stats() -> dict:
+    """
+    Snapshot of prompt cache counters.
+
+    Returns:
+        dict: Per label requests, prompt and cached tokens, and the cached ratio
+    """
+    with _stats_lock:
+        snapshot = {label: dict(stats) for label, stats in PROMPT_CACHE_STATS.items()}
+    for stats in snapshot.values():
+        stats["cached_ratio"] = round(stats["cached_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else None
+    return snapshot
+
+
+def get_usage_stats() -> dict:
+    """
+    Snapshot of token, cost and latency totals since the process started.
+
+    Returns:
+        dict: {"by_model": {model: totals}, "by_label": {label: totals}}
+    """
+    with _stats_lock:
+        return {group: {name: dict(totals) for name, totals in stats.items()} for group, stats in USAGE_STATS.items()}
+
+
+def _format_row(name: str, totals: dict) -> str:
+    requests = totals.get("requests", 0)
+    avg_latency = totals.get("latency_ms", 0) / requests if requests else 0
+    return (f"  {name[:40]:40} {requests:6} req  {totals.get('prompt_tokens', 0):9} in  "
+            f"{totals.get('cached_tokens', 0):9} cached  {totals.get('completion_tokens', 0):8} out  "
+            f"${totals.get('cost_usd', 0):9.4f}  {avg_latency:7.0f} ms/req")
+
+
+def main(argv=None) -> int:
+    from backend.storage import list_conversations, all_conversation_summaries
+
+    parser = argparse.ArgumentParser(description="Token and cost report over stored conversations")
+    parser.add_argument("--user", default=None, help="Only this user's conversations (default: every user)")
+    parser.add_argument("--top", type=int, default=10, help="Most expensive conversations to list")
+    args = parser.parse_args(argv)
+
+    summaries = list(list_conversations(args.user).values()) if args.user else all_conversation_summaries()
+    total = new_usage()
+    for summary in summaries:
+        merge_usage(total, summary.get("usage") or {})
+
+    print(f"{len(summaries)} conversations, {total.get('turns', 0):.0f} turns with usage")
+    print(_format_row("Total", total))
+    for group, title in (("by_model", "By model"), ("by_label", "By tool / call site")):
+        print(f"{title}:")
+        for name, totals in sorted(total.get(group, {}).items(), key=lambda item: -item[1].get("cost_usd", 0)):
+            print(_format_row(name, totals))
+
+    print("Most expensive conversations:")
+    costly = sorted(summaries, key=lambda summary: -(summary.get("usage") or {}).get("cost_usd", 0))[:args.top]
+    for summary in costly:
+        if summary.get("usage"):
+            print(_format_row(f"{summary.get('title') or 'Untitled'} ({summary['id'][:8]})", summary["usage"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,32 @@
 """OpenAI client management and utilities."""
 
 import os
+import threading
 import streamlit as st
-from openai import OpenAI
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+# One client per API key: creating it is costly and it holds the connection pool
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
 
 def get_openai_client():
     """
     Get OpenAI client with API key from Streamlit secrets (Cloud) or environment variable (local).
-    Initializes the client lazily to avoid import-time errors.
+    Initializes the client lazily to avoid import-time errors, and reuses it
+    (the openai package itself is only imported on first use).
+    
+    With CASSETTE_MODE=record the client records its streams; with replay it
+    serves recorded ones and needs no API key.
     """
+    global _client, _client_key
+    from backend.cassettes import get_cassette
+    cassette = get_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        return cassette.wrap_openai()
+    
     # Get API key from Streamlit secrets (Cloud) or environment variable (local)
     try:
         api_key = st.secrets["OPENAI_API_KEY"]
@@ -24,15 +39,49 @@ def get_openai_client():
             "OPENAI_API_KEY not found. Please set it in Streamlit secrets (Cloud) or .env file (local)."
         )
 
-    # Initialize and return OpenAI client
-    return OpenAI(api_key=api_key)
+    # Initialize once and reuse the OpenAI client
+    with _client_lock:
+        if _client is None or _client_key != api_key:
+            from openai import OpenAI
+            _client = OpenAI(api_key=api_key)
+            _client_key = api_key
+    return cassette.wrap_openai(_client) if cassette is not None else _client
+
+
+def get_setting(name: str, default=None):
+    """
+    Read an optional setting from Streamlit secrets (Cloud) or environment variable (local).
+    
+    Values are coerced to the type of `default` (bool, int or float) when one is given.
+    
+    Returns:
+        The configured value, or `default` if the setting is not defined
+    """
+    try:
+        value = st.secrets[name]
+    except (KeyError, FileNotFoundError):
+        value = os.getenv(name)
+
+    if value is None or default is None:
+        return default if value is None else value
+
+    if isinstance(default, bool):
+        return str(value).strip().lower() in ("1", "true", "yes", "on")
+    try:
+        return type(default)(value)
+    except (TypeError, ValueError):
+        print(f"Invalid value for setting {name}: {value!r}, using default {default!r}")
+        return default
 
 
 def get_runtime_context():
     """
-    Generate runtime context with current date and time.
+    Generate runtime context with the current date.
     This should be computed fresh on every LLM request and NOT persisted in conversation history.
     
+    Only day granularity is included: the text then stays byte-identical for a
+    whole day, so it doesn't break the provider's prompt prefix caching.
+    
     Returns:
         String with formatted runtime context
     """
@@ -45,8 +94,7 @@ def get_runtime_context():
         tz = "UTC"
     
     context = f"""Runtime Context:
-Current date: {now.strftime('%Y-%m-%d')}
-Current time: {now.strftime('%H:%M:%S')}
+Current date: {now.strftime('%Y-%m-%d')} ({now.strftime('%A')})
 Timezone: {tz}
 
 Interpret relative dates (e.g., "next month", "this weekend", "in 2 weeks") relative to the current date above."""
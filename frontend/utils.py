@@ -1,9 +1,26 @@
 import streamlit as st
 import uuid
 import os
+import sys
+import json
 from datetime import datetime
 
-from backend.storage import save_conversation, delete_conversation
+from backend.storage import save_conversation, delete_conversation, load_conversation as load_stored_conversation
+from backend.structured_output import render_reply
+from backend.utils import get_setting
+from backend.turns import get_turn_runner
+
+# Messages rendered per rerun; older ones are behind a "show earlier" button
+DEFAULT_TRANSCRIPT_WINDOW = 20
+
+# Replies rebuilt from structured tool results, memoized per session
+MAX_RENDERED_MESSAGES = 200
+
+# Opened conversations kept in memory per session beyond the current one
+DEFAULT_SESSION_MEMORY_BUDGET_KB = 2048
+
+# Rough per-message cost of the dict and its small fields, on top of the content
+MESSAGE_OVERHEAD_BYTES = 400
 
 
 def check_authentication():
@@ -12,6 +29,7 @@ def check_authentication():
     Returns True if authenticated, False otherwise.
     Shows login UI if not authenticated.
     Note: Authentication only persists during the current session.
+    The name entered at login selects the user's own conversation storage (it is not a secret).
     The correct password is read from st.secrets (Streamlit Cloud) or APP_PASSWORD env var (local).
     """
     # Get the correct password from Streamlit secrets (Cloud) or environment variable (local)
@@ -36,11 +54,13 @@ def check_authentication():
     st.title("🔒 Welcome to AI Travel Assistant")
     st.write("Please enter the password to continue")
     
+    user_name = st.text_input("Your name (optional, keeps your conversations separate)", key="user_name_input")
     user_password = st.text_input("Password", type="password", key="password_input")
     
     if st.button("Login", type="primary"):
         if user_password == correct_password:
             st.session_state.authenticated = True
+            st.session_state.user_id = user_name.strip() or None
             st.rerun()
         else:
             st.error("Incorrect password. Please try again.")
@@ -48,12 +68,18 @@ def check_authentication():
     return False
 
 
+def current_user_id():
+    """The signed-in user's storage partition (None for the default one)."""
+    return st.session_state.get("user_id")
+
+
 def create_new_conversation():
     """Create a new conversation with a welcome message"""
     conversation_id = str(uuid.uuid4())
     
     # Welcome message for new conversations
     welcome_message = {
+        "id": uuid.uuid4().hex,
         "role": "assistant",
         "content": """👋 Welcome to your AI Travel Assistant!
 
@@ -75,26 +101,45 @@ Just tell me where you'd like to go, when you're traveling, or what you need hel
     }
     st.session_state.conversations[conversation_id] = conversation_data
     st.session_state.current_conversation_id = conversation_id
-    st.session_state.messages = [welcome_message]
+    # The session and the conversation share one message list
+    st.session_state.messages = conversation_data["messages"]
+    reset_transcript_window()
+    evict_inactive_conversations()
     # Save to storage
-    save_conversation(conversation_id, conversation_data)
+    save_conversation(conversation_id, conversation_data, current_user_id())
     # Trigger rerun to display the welcome message
     st.rerun()
 
 
 def load_conversation(conversation_id):
-    """Load a conversation"""
+    """Load a conversation (the sidebar only holds summaries until one is opened)"""
+    if "messages" not in st.session_state.conversations[conversation_id]:
+        stored = load_stored_conversation(conversation_id, current_user_id())
+        if stored:
+            compact_messages(stored["messages"])
+            conversation_bytes(conversation_id, stored)
+        st.session_state.conversations[conversation_id] = stored or {
+            **st.session_state.conversations[conversation_id], "messages": []
+        }
     st.session_state.current_conversation_id = conversation_id
     st.session_state.messages = st.session_state.conversations[conversation_id]["messages"]
+    reset_transcript_window()
+    evict_inactive_conversations()
 
 
 def delete_conversation_handler(conversation_id):
     """Delete a conversation from session state and storage"""
-    # Delete from storage
-    delete_conversation(conversation_id)
+    # Stop any reply still being generated, so it does not save the conversation again;
+    # under the conversation lock, so a save already under way cannot write it back
+    runner = get_turn_runner()
+    with runner.conversation_lock(conversation_id):
+        runner.discard_conversation(conversation_id)
+        # Delete from storage
+        delete_conversation(conversation_id, current_user_id())
     # Remove from session state
     if conversation_id in st.session_state.conversations:
         del st.session_state.conversations[conversation_id]
+    st.session_state.get("conversation_sizes", {}).pop(conversation_id, None)
     # If it was the current conversation, clear it
     if st.session_state.current_conversation_id == conversation_id:
         st.session_state.current_conversation_id = None
@@ -102,3 +147,186 @@ def delete_conversation_handler(conversation_id):
     # Rerun to update the UI
     st.rerun()
 
+
+def compact_messages(messages):
+    """Intern the repeated short strings of loaded messages (roles), so all messages share one copy."""
+    for message in messages:
+        message["role"] = sys.intern(message["role"])
+
+
+def _message_bytes(message):
+    size = MESSAGE_OVERHEAD_BYTES + sys.getsizeof(message.get("content") or "")
+    if message.get("tool_results"):
+        size += len(json.dumps(message["tool_results"], ensure_ascii=False, default=str))
+    return size
+
+
+def conversation_bytes(conversation_id, conversation):
+    """
+    Approximate memory held by a conversation's messages.
+
+    Measured once when the conversation is loaded; afterwards only messages
+    added since the last measurement are measured.
+    """
+    sizes = st.session_state.setdefault("conversation_sizes", {})  # id -> (message count, bytes)
+    messages = conversation.get("messages", ())
+    count, total = sizes.get(conversation_id, (0, 0))
+    if count > len(messages):
+        count, total = 0, 0
+    total += sum(_message_bytes(message) for message in messages[count:])
+    sizes[conversation_id] = (len(messages), total)
+    return total
+
+
+def evict_inactive_conversations():
+    """
+    Keep opened conversations other than the current one within SESSION_MEMORY_BUDGET_KB.
+
+    Least recently opened conversations go back to their summary (messages are on
+    disk and reloaded when opened again). The current conversation is never evicted.
+    """
+    current_id = st.session_state.current_conversation_id
+    recent = st.session_state.setdefault("recent_conversations", [])
+    if current_id in recent:
+        recent.remove(current_id)
+    recent.append(current_id)
+
+    budget = get_setting("SESSION_MEMORY_BUDGET_KB", DEFAULT_SESSION_MEMORY_BUDGET_KB) * 1024
+    conversations = st.session_state.conversations
+    used = 0
+    # Most recently opened first; everything past the budget is evicted
+    for conversation_id in reversed(recent[:-1]):
+        conversation = conversations.get(conversation_id)
+        if conversation is None or "messages" not in conversation:
+            recent.remove(conversation_id)
+            continue
+        if get_turn_runner().get_active_job(conversation_id):
+            # Its reply is still streaming into this copy
+            continue
+        used += conversation_bytes(conversation_id, conversation)
+        if used > budget:
+            _evict_conversation(conversation_id)
+            recent.remove(conversation_id)
+
+
+def _evict_conversation(conversation_id):
+    conversation = st.session_state.conversations[conversation_id]
+    rendered = st.session_state.get("rendered_markdown", {})
+    for message in conversation["messages"]:
+        rendered.pop(message.get("id"), None)
+    st.session_state.get("conversation_sizes", {}).pop(conversation_id, None)
+    st.session_state.conversations[conversation_id] = {
+        key: value for key, value in conversation.items() if key != "messages"
+    }
+
+
+def get_transcript_window():
+    """Number of recent messages shown per rerun (TRANSCRIPT_WINDOW)."""
+    return max(1, get_setting("TRANSCRIPT_WINDOW", DEFAULT_TRANSCRIPT_WINDOW))
+
+
+def reset_transcript_window():
+    """Show only the most recent messages again (e.g. after switching conversations)."""
+    st.session_state.transcript_window = get_transcript_window()
+
+
+def _show_earlier_messages():
+    st.session_state.transcript_window += get_transcript_window()
+
+
+def message_id(message):
+    """Stable id of a message, assigned on first use and saved with the conversation."""
+    if "id" not in message:
+        message["id"] = uuid.uuid4().hex
+    return message["id"]
+
+
+def render_message_markdown(message):
+    """
+    Markdown for a message. Replies whose tool output is rebuilt from stored JSON
+    are rendered once per message id and reused on every rerun; plain messages
+    are shown as they are.
+
+    Returns:
+        str: The markdown to display
+    """
+    if not any("position" in result for result in message.get("tool_results") or ()):
+        content = message.get("content")
+        return content if isinstance(content, str) else str(content or "")
+    rendered = st.session_state.setdefault("rendered_markdown", {})
+    key = message_id(message)
+    if key not in rendered:
+        rendered[key] = render_reply(message)
+        # Drop the oldest entries (dicts keep insertion order)
+        while len(rendered) > MAX_RENDERED_MESSAGES:
+            rendered.pop(next(iter(rendered)))
+    return rendered[key]
+
+
+def render_transcript(messages):
+    """
+    Display the most recent messages of the conversation.
+
+    Only the last transcript_window messages are rendered, so the cost of a
+    rerun does not grow with the length of the conversation.
+    """
+    if "transcript_window" not in st.session_state:
+        reset_transcript_window()
+
+    start = max(0, len(messages) - st.session_state.transcript_window)
+    if start:
+        st.button(
+            f"⬆️ Show earlier messages ({start} hidden)",
+            key="show_earlier_messages",
+            on_click=_show_earlier_messages
+        )
+
+    for index in range(start, len(messages)):
+        message = messages[index]
+        if message.get("partial"):
+            message = _attach_partial_reply(messages, index)
+            if message is None:
+                continue
+        with st.chat_message(message["role"]):
+            st.markdown(render_message_markdown(message))
+
+
+def stream_turn(job):
+    """Stream a background turn's reply; leaving the script early only detaches from it."""
+    stream = job.follow()
+    try:
+        st.write_stream(stream)
+    finally:
+        stream.close()
+
+
+def _attach_partial_reply(messages, index):
+    """
+    Show a reply that was still streaming when it was last saved.
+
+    Live turns are followed until they finish. Returns the finished message to
+    render, or None if it has been displayed already.
+    """
+    message = messages[index]
+    job = get_turn_runner().get_job(message.get("job_id"))
+    if job is None:
+        # The process restarted mid-turn: keep what was checkpointed
+        with st.chat_message("assistant"):
+            if message.get("content"):
+                st.markdown(message["content"])
+            st.caption("This reply was interrupted before it finished.")
+        return None
+
+    if not job.finished:
+        with st.chat_message("assistant"):
+            stream_turn(job)
+        if not job.finished:
+            return None
+        with get_turn_runner().conversation_lock(job.conversation_id):
+            messages[index] = job.message
+        return None
+
+    # Another session (or an earlier run) holds the finished copy
+    with get_turn_runner().conversation_lock(job.conversation_id):
+        messages[index] = job.message
+    return job.message
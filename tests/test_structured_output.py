@@ -0,0 +1,94 @@
+"""Tests for the incremental JSON parser and the structured reply round trip."""
+
+import json
+
+import pytest
+
+from backend.structured_output import IncrementalJSONParser, compact_reply, iter_values, render_reply
+from backend.tools.trip_planner.tool import render_trip_plan
+
+PLAN = {
+    "summary": "Three days in \"Roma\" \\ à la carte",
+    "days": [
+        {"label": "Day 1", "title": "Old town", "activities": ["Forum, then \"Colosseum\"", "Gelato — twice\n"]},
+        {"label": "Day 2", "title": "Art", "activities": []},
+        {"label": "Day 3", "title": "Food", "activities": ["Trastevere", "Testaccio market"]}
+    ]
+}
+
+DOCUMENTS = [
+    PLAN,
+    {"matrix": [[1, 2.5, -3e2], [], [[True, False, None]]], "empty": {}, "tail": "x"},
+    {"escapes": "quote \" backslash \\ slash / tab \t unicode é 😀", "n": 0},
+    ["a", {"b": ["c", {"d": "e"}]}, 12]
+]
+
+
+def _feed_in_pieces(text: str, size: int):
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_events_do_not_depend_on_chunk_boundaries(document, size):
+    text = json.dumps(document, indent=1)
+    parser, events = _feed_in_pieces(text, size)
+    assert events == list(iter_values(document))
+    assert parser.result() == document
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_boundary_inside_escape_sequences(ensure_ascii):
+    document = {"text": "a\"b\\c\ndé😀"}
+    text = json.dumps(document, ensure_ascii=ensure_ascii)
+    for split in range(1, len(text)):
+        parser = IncrementalJSONParser()
+        events = parser.feed(text[:split]) + parser.feed(text[split:])
+        assert events == [(("text",), document["text"])]
+
+
+def test_boundary_inside_escapes_json_dumps_never_writes():
+    text = r'{"text": "a\/b\u00e9\ud83d\ude00"}'
+    for split in range(1, len(text)):
+        parser = IncrementalJSONParser()
+        events = parser.feed(text[:split]) + parser.feed(text[split:])
+        assert events == [(("text",), "a/bé😀")]
+
+
+def test_values_are_reported_as_soon_as_they_complete():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"days": [{"label": "Day 1", "act') == [(("days", 0, "label"), "Day 1")]
+    assert parser.feed('ivities": ["Forum", "Gel') == [(("days", 0, "activities", 0), "Forum")]
+    assert parser.feed('ato"]}, {"label": 2') == [(("days", 0, "activities", 1), "Gelato")]
+    # A bare number is only complete once a delimiter follows it
+    assert parser.feed('5}]}') == [(("days", 1, "label"), 25)]
+
+
+def test_result_is_none_for_a_truncated_document():
+    parser, _ = _feed_in_pieces('{"summary": "cut', 4)
+    assert parser.result() is None
+
+
+def test_structured_reply_is_stored_once_and_rendered_back():
+    output = render_trip_plan(PLAN)
+    content = "Here you go:\n\n---\n\n**🗺️ Creating your itinerary...**\n\n---\n\n" + output + "\nEnjoy!"
+    tool_results = [{"tool": "generate_trip_plan", "data": PLAN, "output": output}]
+
+    compacted = compact_reply(content, tool_results)
+
+    assert output not in compacted
+    assert "output" not in tool_results[0]
+    assert render_reply({"content": compacted, "tool_results": tool_results}) == content
+
+
+def test_output_that_does_not_render_back_is_kept():
+    content = "Intro\n" + render_trip_plan(PLAN)[:-5]
+    tool_results = [{"tool": "generate_trip_plan", "data": PLAN, "output": content[len("Intro\n"):]}]
+
+    assert compact_reply(content, tool_results) == content
+    assert "position" not in tool_results[0]
+    assert render_reply({"content": content, "tool_results": tool_results}) == content